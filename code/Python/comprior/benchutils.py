@@ -1,4 +1,4 @@
-import os, configparser, logging
+import os, configparser, logging, hashlib, shutil, fcntl
 import pandas as pd
 import subprocess
 import knowledgebases as kbs
@@ -16,6 +16,7 @@ metricScales = {
 
 ##### CONFIG #####
 config = None
+configPaths = None
 LOGGER_NAME = "Comprior"
 
 def loadConfig(path):
@@ -24,7 +25,8 @@ def loadConfig(path):
        :param path: absolute path or list of absolute paths to the config files. For multiple config files specifying the same parameters, the ones from the last config file in the list will be used.
        :type path: str or list of str
        """
-    global config
+    global config, configPaths
+    configPaths = path
     config = configparser.ConfigParser()
     config._interpolation = configparser.ExtendedInterpolation()
     config.read(path)
@@ -71,23 +73,83 @@ def getConfigBoolean(category, identifier):
     global config
     return config.getboolean(category, identifier)
 
+def setConfigValue(category, identifier, value):
+    """Overwrites the value of a config parameter in the current process.
+
+       :param category: the parameter's category name.
+       :type category: str
+       :param identifier: the parameter name.
+       :type identifier: str
+       :param value: the new parameter value.
+       :type value: str
+       """
+    global config
+    config[category][identifier] = value
+
+def isCompactPrecision():
+    """Checks if feature values are held in compact precision (float32 instead of float64), as specified by the config's precision parameter.
+
+       :return: true if the precision parameter is float32.
+       :rtype: bool
+       """
+    precision = getConfigValue("Preprocessing", "precision").strip().lower()
+    if precision not in ["float32", "float64"]:
+        raise ValueError("Unknown precision " + precision + ", use float32 or float64.")
+    return precision == "float32"
+
 ##### FILE READING AND WRITING #####
-def loadRanking(rankingFile):
+def loadRanking(rankingFile, maxRows = None):
     """Load a feature ranking from a file.
 
        :param rankingFile: absolute path to the file containing a feature ranking.
        :type rankingFile: str
+       :param maxRows: number of top ranked features to load, None to load the whole ranking. Parsing stops after these rows.
+       :type maxRows: int
        :return: the feature ranking as a DataFrame.
        :rtype: :class:`pandas.DataFrame`
        """
     try:
-        ranking = pd.read_csv(rankingFile, sep = "\t")
+        ranking = pd.read_csv(rankingFile, sep = "\t", nrows = maxRows)
     except:
         #in case ranking is empty, just create an empty dataframe
         ranking = pd.DataFrame(columns = ["attribute", "score"])
 
     return ranking
 
+def getDatasetShape(datasetFile):
+    """Get the number of samples and features of a labeled data set without loading it completely.
+
+       :param datasetFile: absolute path to the labeled data set (samples in rows, first two columns are sample ID and class label).
+       :type datasetFile: str
+       :return: number of samples and number of features.
+       :rtype: tuple(int, int)
+       """
+    with open(datasetFile, "r") as f:
+        header = f.readline()
+        samples = sum(1 for line in f if line.strip() != "")
+    features = len(header.split(",")) - 2
+    return samples, features
+
+def getInputShape(inputFile, separator, genesInColumns):
+    """Get the number of samples and features of an unprocessed input data set without loading it completely.
+
+       :param inputFile: absolute path to the input data set (first row and column contain the identifiers).
+       :type inputFile: str
+       :param separator: separator of the data set's cells.
+       :type separator: str
+       :param genesInColumns: whether the features are located in the columns.
+       :type genesInColumns: bool
+       :return: number of samples and number of features.
+       :rtype: tuple(int, int)
+       """
+    with open(inputFile, "r") as f:
+        header = f.readline()
+        rows = sum(1 for line in f if line.strip() != "")
+    columns = len(header.rstrip("\r\n").rstrip(separator).split(separator)) - 1
+    if genesInColumns:
+        return rows, columns
+    return columns, rows
+
 ##### DIRECTORY MANAGEMENT #####
 def createOrClearDirectory(directoryLocation):
     """If the provided directory location is already existing, remove all files in that directory.
@@ -116,21 +178,27 @@ def createDirectory(directoryLocation):
     except:
         return
 
-def removeDirectoryContent(directoryLocation):
+def removeDirectoryContent(directoryLocation, recursive = False):
     """Remove the files inside a directory.
+       Subdirectories are kept unless recursive is set, in which case they are removed with all their content (e.g. the binary stores of data sets, see :func:`datastore.writeStore`).
 
        :param directoryLocation: absolute path to the directory that must be cleared.
        :type directoryLocation: str
+       :param recursive: whether to remove subdirectories as well.
+       :type recursive: bool
        """
-    try:
-        filelist = [f for f in os.listdir(directoryLocation)]
-        for f in filelist:
-            if f == ".gitignore":
-                continue
-            removeFile(directoryLocation + f)
-    except:
+    if not os.path.isdir(directoryLocation):
         #no directory to delete
         return
+    for f in os.listdir(directoryLocation):
+        if f == ".gitignore":
+            continue
+        path = os.path.join(directoryLocation, f)
+        if os.path.isdir(path):
+            if recursive:
+                shutil.rmtree(path)
+        else:
+            removeFile(path)
 
 def removeFile(file):
     """Delete a file.
@@ -143,17 +211,41 @@ def removeFile(file):
     #except:
     #    return #No FILE to delete
 
+def hashFile(file):
+    """Compute the SHA-256 hash of a file's content.
+       The file is read in blocks so that large data sets do not have to fit into memory.
+
+       :param file: absolute path to the file to hash.
+       :type file: str
+       :return: hex digest of the file content.
+       :rtype: str
+       """
+    fileHash = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            fileHash.update(block)
+    return fileHash.hexdigest()
+
     #remove all intermediate and result files before running anything new
-def cleanupResults():
+def cleanupResults(keepCaches = False):
     """Remove all intermediate files from former runs, e.g. generated during preprocessing or mapping.
+
+       :param keepCaches: whether to keep knowledge base query results and identifier mappings, e.g. when running multiple data sets in batch mode.
+       :type keepCaches: bool
        """
+    #the preprocessing directories contain the binary stores of the data sets
     removeDirectoryContent(getConfigValue("General", "preprocessing"))
-    removeDirectoryContent(getConfigValue("General", "preprocessing") + "preprocessed/")
-    removeDirectoryContent(getConfigValue("General", "preprocessing") + "ready/")
-    removeDirectoryContent(getConfigValue("General", "crossVal_preprocessing") + "preprocessed/")
-    removeDirectoryContent(getConfigValue("General", "crossVal_preprocessing") + "ready/")
-    removeDirectoryContent(getConfigValue("General", "externalKbDir"))
-    removeDirectoryContent(getConfigValue("General", "intermediateDir") + "identifierMappings/")
+    removeDirectoryContent(getConfigValue("General", "preprocessing") + "preprocessed/", True)
+    removeDirectoryContent(getConfigValue("General", "preprocessing") + "ready/", True)
+    removeDirectoryContent(getConfigValue("General", "crossVal_preprocessing") + "preprocessed/", True)
+    removeDirectoryContent(getConfigValue("General", "crossVal_preprocessing") + "ready/", True)
+    if not keepCaches:
+        removeDirectoryContent(getConfigValue("General", "externalKbDir"))
+        removeDirectoryContent(getConfigValue("General", "queryCacheDir"))
+        removeDirectoryContent(getConfigValue("General", "intermediateDir") + "identifierMappings/")
+    removeDirectoryContent(getConfigValue("General", "intermediateDir") + "rankingRegistry/")
+    #filtered views have binary stores as well
+    removeDirectoryContent(getConfigValue("General", "intermediateDir") + "filteredViews/", True)
     removeDirectoryContent(getConfigValue("General", "intermediateDir"))
 
 ##### LOGGING #####
@@ -171,6 +263,10 @@ def createLogger(outputPath):
     #create logger and set default level to debug
     LOGGER = logging.getLogger(LOGGER_NAME)
     LOGGER.setLevel(logging.DEBUG)
+    #remove handlers of a former run in the same process (batch mode), so that every run logs into its own file
+    for handler in list(LOGGER.handlers):
+        LOGGER.removeHandler(handler)
+        handler.close()
     formatter = logging.Formatter(FORMAT_STR)
 
     #add handler to write log to file at custom level
@@ -396,6 +492,8 @@ def retrieveMappings(itemList, originalFormat, desiredFormat):
     """Query the knowledge base to map the identifiers.
        We have mapping via BiomaRt and gConvert available.
        gConvert is currently used because BiomaRt is unstable and blocks when parallel queries are sent.
+       Retrieved mappings are kept in a mapping file per format pair, including the identifiers that could not be mapped (with an empty desired identifier), so that no identifier is queried twice.
+       Processes query and extend the mapping file one after the other (guarded by a lock file), so that they neither query the same identifiers nor lose each other's mappings.
 
        :param itemList: list of identifier names to be mapped
        :type itemList: list of str
@@ -403,15 +501,66 @@ def retrieveMappings(itemList, originalFormat, desiredFormat):
        :type originalFormat: str
        :param desiredFormat:  desired format to which the identifiers should be mapped.
        :type desiredFormat: str
-       :return: mapping table for all identifiers.
+       :return: mapping table for all identifiers that could be mapped.
        :rtype: :class:`pandas.DataFrame`
        """
-    # create directory and paths for mapped gene rankings
-    kbs_factory = kbs.KnowledgeBaseFactory()
-    mart = kbs_factory.createKnowledgeBase("gConvert")
-    # mart = kbs_factory.createKnowledgeBase("Biomart")
-    mapping = mart.mapItems(itemList, originalFormat, desiredFormat)
-    return mapping
+    #reuse mappings that were already retrieved in this run (or former runs of the same batch)
+    mappingFile = getConfigValue("General", "intermediateDir") + "identifierMappings/" + originalFormat + "_" + desiredFormat + ".csv"
+    knownMappings = readMappings(mappingFile, originalFormat, desiredFormat)
+    knownItems = set(knownMappings[originalFormat])
+    missingItems = [item for item in itemList if str(item) not in knownItems]
+
+    if len(missingItems) > 0:
+        createDirectory(os.path.dirname(mappingFile))
+        with open(mappingFile + ".lock", "w") as lockFile:
+            #the lock is released when the file is closed, also if the process dies
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            #another process may have retrieved the mappings while we were waiting for the lock
+            knownMappings = readMappings(mappingFile, originalFormat, desiredFormat)
+            knownItems = set(knownMappings[originalFormat])
+            missingItems = list(dict.fromkeys(str(item) for item in itemList if str(item) not in knownItems))
+            if len(missingItems) > 0:
+                # create directory and paths for mapped gene rankings
+                kbs_factory = kbs.KnowledgeBaseFactory()
+                mart = kbs_factory.createKnowledgeBase("gConvert")
+                # mart = kbs_factory.createKnowledgeBase("Biomart")
+                newMappings = mart.mapItems(missingItems, originalFormat, desiredFormat).astype(str)
+                #remember identifiers that could not be mapped, so that they are not queried again
+                mappedItems = set(newMappings[originalFormat])
+                unmappedItems = pd.DataFrame({originalFormat: [item for item in missingItems if item not in mappedItems], desiredFormat: None})
+                knownMappings = pd.concat([knownMappings, newMappings, unmappedItems], ignore_index = True).drop_duplicates()
+                #write into a temporary file first so that parallel processes never read incomplete mappings
+                tmpFile = mappingFile + "." + str(os.getpid())
+                knownMappings.to_csv(tmpFile, index = False)
+                os.rename(tmpFile, mappingFile)
+
+    #keep the order of itemList, so that the first mapping of duplicates is the same as when querying all items at once
+    itemPositions = {}
+    for position, item in enumerate(itemList):
+        itemPositions.setdefault(str(item), position)
+    mapping = knownMappings[knownMappings[originalFormat].isin(itemPositions.keys()) & knownMappings[desiredFormat].notna()]
+    order = mapping[originalFormat].map(itemPositions).sort_values(kind = "mergesort").index
+    return mapping.loc[order].reset_index(drop = True)
+
+def readMappings(mappingFile, originalFormat, desiredFormat):
+    """Read the identifier mappings that were retrieved before (see :func:`retrieveMappings`).
+
+       :param mappingFile: absolute path to the mapping file.
+       :type mappingFile: str
+       :param originalFormat:  current format of the identifiers.
+       :type originalFormat: str
+       :param desiredFormat:  desired format to which the identifiers should be mapped.
+       :type desiredFormat: str
+       :return: mapping table, with a missing desired identifier for identifiers that could not be mapped.
+       :rtype: :class:`pandas.DataFrame`
+       """
+    if os.path.isfile(mappingFile):
+        try:
+            #identifiers are kept as they are (e.g. "NA"), only empty desired identifiers mark unmapped ones
+            return pd.read_csv(mappingFile, dtype = str, keep_default_na = False, na_values = {desiredFormat: [""]})
+        except Exception:
+            logDebug("DEBUG: Could not read identifier mappings from " + mappingFile)
+    return pd.DataFrame(columns = [originalFormat, desiredFormat])
 
 
 def mapDataMatrix(inputMatrix, genesInColumns, originalFormat, desiredFormat, outputFile, labeled):
@@ -425,7 +574,7 @@ def mapDataMatrix(inputMatrix, genesInColumns, originalFormat, desiredFormat, ou
        :type originalFormat: str
        :param desiredFormat:  desired format to which the feature names should be mapped.
        :type desiredFormat: str
-       :param outputFile:  absolute path to the output file in which the mapped data set should be stored.
+       :param outputFile:  absolute path to the output file in which the mapped data set should be stored, None to not store it.
        :type outputFile: str
        :param labeled:  if the data matrix is additionally labeled.
        :type labeled: bool
@@ -455,5 +604,26 @@ def mapDataMatrix(inputMatrix, genesInColumns, originalFormat, desiredFormat, ou
     if labeled:
         final_matrix = labels.to_frame().merge(final_matrix, left_index = True, right_index = True)
 
-    final_matrix.to_csv(outputFile)
-    return final_matrix
\ No newline at end of file
+    if outputFile is not None:
+        final_matrix.to_csv(outputFile)
+    return final_matrix
+
+def mapFeaturePositions(items, originalFormat, desiredFormat):
+    """Determine which features of a data set are kept when mapping it with :func:`mapDataMatrix`, and their mapped names, without touching the data set's values.
+       Features are matched and deduplicated exactly like in :func:`mapDataMatrix`, so that the values can be mapped block by block afterwards.
+
+       :param items: feature names of the data set, in their original order.
+       :type items: list of str
+       :param originalFormat:  current format of the feature names in the data set.
+       :type originalFormat: str
+       :param desiredFormat:  desired format to which the feature names should be mapped.
+       :type desiredFormat: str
+       :return: position in items and mapped name of every feature of the mapped data set, in the order of the mapped data set.
+       :rtype: list of tuple(int, str)
+       """
+    mapping = mapIdentifiers(items, originalFormat, desiredFormat)
+    positions = pd.DataFrame({"position": range(len(items))}, index = pd.Index(items))
+    mapped_positions = mapping.merge(positions, right_on=positions.index, left_on=originalFormat)
+    mapped_positions = mapped_positions.drop_duplicates(subset=[originalFormat], keep="first")
+    mapped_positions = mapped_positions.drop_duplicates(subset=[desiredFormat], keep="first")
+    return list(zip(mapped_positions["position"], mapped_positions[desiredFormat]))
\ No newline at end of file
@@ -0,0 +1,464 @@
+import os, shutil, hashlib, tempfile, time
+import pandas as pd
+import benchutils
+import datastore
+
+#content hashes of the files this process has hashed, by path, modification time, and size of the file
+fileHashes = {}
+
+
+def acquireLock(lockFile):
+    """Tries to create a lock file that makes sure that only one process computes a shared result (see :class:`RankingRegistry` and :class:`FilteredViewRegistry`).
+       Lock files of processes that do not exist anymore (e.g. because they were killed) are removed.
+
+       :param lockFile: absolute path to the lock file.
+       :type lockFile: str
+       :return: true if this process holds the lock now.
+       :rtype: bool
+       """
+    try:
+        fd = os.open(lockFile, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            with open(lockFile, "r") as f:
+                pid = int(f.read())
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            benchutils.logDebug("DEBUG: Remove stale lock " + lockFile)
+            os.remove(lockFile)
+        except (OSError, ValueError):
+            #lock file is just being written or removed, or belongs to a process we cannot signal
+            pass
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def hashFile(path, memoDir = None):
+    """Computes the content hash of a file, reusing the hash of former calls as long as the file was not modified (e.g. for the stage cache, the registries, and the input files sent to remote workers).
+       As selectors run in separate processes, hashes can be memoized in a directory as well, so that every version of a data set is only hashed once per run.
+
+       :param path: absolute path to the file.
+       :type path: str
+       :param memoDir: absolute path to the directory where hashes are memoized for other processes, None to only memoize them in this process.
+       :type memoDir: str
+       :return: hex digest of the file content.
+       :rtype: str
+       """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key in fileHashes:
+        return fileHashes[key]
+    memoFile = None
+    if memoDir is not None:
+        memoName = hashlib.sha256("\0".join(str(part) for part in key).encode("utf-8")).hexdigest()
+        memoFile = os.path.join(memoDir, memoName + ".hash")
+        if os.path.isfile(memoFile):
+            with open(memoFile, "r") as f:
+                fileHashes[key] = f.read().strip()
+            return fileHashes[key]
+    fileHashes[key] = benchutils.hashFile(path)
+    if memoFile is not None:
+        #write into a temporary file first so that other processes never read an incomplete hash
+        tmpFile = memoFile + "." + str(os.getpid())
+        with open(tmpFile, "w") as f:
+            f.write(fileHashes[key])
+        os.rename(tmpFile, memoFile)
+    return fileHashes[key]
+
+
+class StageCache():
+    """Caches the output files of pipeline stages across benchmarking runs.
+       Every cached output is stored under a key that is computed from the content of the stage's input files and the stage's parameters, so a stage whose key did not change since a former run is not executed again.
+       Cache entries are directories inside cacheDir named by their key, each containing the cached file and the path it was originally written to.
+       If the cache grows larger than sizeLimit, the least recently used entries are removed.
+
+       :param cacheDir: absolute path to the cache directory.
+       :type cacheDir: str
+       :param sizeLimit: maximum size of the cache in bytes. 0 disables caching.
+       :type sizeLimit: int
+       """
+    OUTPUT_FILE = "output"
+    PATH_FILE = "outputPath"
+
+    def __init__(self, cacheDir, sizeLimit):
+        self.cacheDir = cacheDir
+        self.sizeLimit = sizeLimit
+        if self.isEnabled():
+            benchutils.createDirectory(cacheDir)
+        super().__init__()
+
+    def isEnabled(self):
+        """Checks if caching is enabled.
+
+           :return: true if cache entries are looked up and stored.
+           :rtype: bool
+           """
+        return self.sizeLimit > 0
+
+    def computeKey(self, inputFiles, params, knownHashes = None):
+        """Computes the cache key of a stage.
+
+           :param inputFiles: absolute paths to all files the stage reads. Their paths and contents are part of the key.
+           :type inputFiles: list of str
+           :param params: all parameters that influence the stage's output, e.g. the stage name and its config values.
+           :type params: list of str
+           :param knownHashes: content hashes of input files that are not (yet) written, by path (see :meth:`StageCache.isCached`). None to hash all input files.
+           :type knownHashes: dict
+           :return: the cache key.
+           :rtype: str
+           """
+        keyHash = hashlib.sha256()
+        for inputFile in inputFiles:
+            keyHash.update(inputFile.encode("utf-8"))
+            #input files are hashed once per process (and the processes forked from it) as long as they are not modified
+            fileHash = knownHashes[inputFile] if knownHashes is not None and inputFile in knownHashes else hashFile(inputFile)
+            keyHash.update(fileHash.encode("utf-8"))
+        for param in params:
+            keyHash.update(str(param).encode("utf-8"))
+            #separate params so that e.g. ("ab", "c") and ("a", "bc") result in different keys
+            keyHash.update(b"\0")
+        return keyHash.hexdigest()
+
+    def lookup(self, key):
+        """Restores a cached output to the location it was originally written to.
+
+           :param key: the stage's cache key.
+           :type key: str
+           :return: absolute path to the restored output file, or None if there is no cache entry for key.
+           :rtype: str
+           """
+        entryDir = os.path.join(self.cacheDir, key)
+        if not os.path.isdir(entryDir):
+            return None
+
+        with open(os.path.join(entryDir, self.PATH_FILE), "r") as pathFile:
+            outputPath = pathFile.read()
+        cachedOutput = os.path.join(entryDir, self.OUTPUT_FILE)
+        #outputs that are identical to the stage's input (e.g. when no mapping was necessary) are not stored
+        if os.path.isfile(cachedOutput):
+            benchutils.createDirectory(os.path.dirname(outputPath))
+            shutil.copyfile(cachedOutput, outputPath)
+        elif not os.path.isfile(outputPath):
+            return None
+
+        #mark entry as recently used
+        os.utime(entryDir, None)
+        return outputPath
+
+    def isCached(self, preprocessors):
+        """Checks if the outputs of consecutive stages are all cached, without running the stages or restoring their outputs.
+           Every stage must read the output file of the stage before it, so the keys of later stages are computed from the cached outputs of the earlier ones.
+
+           :param preprocessors: the stages in the order they run.
+           :type preprocessors: :class:`List` of :class:`preprocessing.Preprocessor`
+           :return: true if caching is enabled and :meth:`StageCache.preprocess` would reuse the outputs of all stages.
+           :rtype: bool
+           """
+        if not self.isEnabled():
+            return False
+
+        cachedHashes = {}
+        for preprocessor in preprocessors:
+            entryDir = os.path.join(self.cacheDir, self.computeKey(preprocessor.getCacheInputs(), preprocessor.getCacheParams(), cachedHashes))
+            if not os.path.isdir(entryDir):
+                return False
+            with open(os.path.join(entryDir, self.PATH_FILE), "r") as pathFile:
+                outputPath = pathFile.read()
+            cachedOutput = os.path.join(entryDir, self.OUTPUT_FILE)
+            if os.path.isfile(cachedOutput):
+                cachedHashes[outputPath] = hashFile(cachedOutput)
+            elif outputPath not in cachedHashes and not os.path.isfile(outputPath):
+                return False
+        return True
+
+    def store(self, key, outputPath, storeFile = True):
+        """Stores a stage's output file in the cache and removes old entries if the cache exceeds its size limit.
+
+           :param key: the stage's cache key.
+           :type key: str
+           :param outputPath: absolute path to the output file of the stage.
+           :type outputPath: str
+           :param storeFile: whether to store a copy of the output file or only its path.
+           :type storeFile: bool
+           """
+        #write into a temporary directory first so that no incomplete entries are left behind if storing fails
+        tmpDir = tempfile.mkdtemp(prefix = "tmp_", dir = self.cacheDir)
+        try:
+            with open(os.path.join(tmpDir, self.PATH_FILE), "w") as pathFile:
+                pathFile.write(outputPath)
+            if storeFile:
+                shutil.copyfile(outputPath, os.path.join(tmpDir, self.OUTPUT_FILE))
+            entryDir = os.path.join(self.cacheDir, key)
+            if os.path.isdir(entryDir):
+                shutil.rmtree(entryDir)
+            os.rename(tmpDir, entryDir)
+        except OSError as e:
+            shutil.rmtree(tmpDir, ignore_errors = True)
+            benchutils.logWarning("WARNING: Could not store " + outputPath + " in cache: " + str(e))
+            return
+
+        self.evict()
+
+    def getEntrySize(self, entryDir):
+        """Computes the size of a cache entry.
+
+           :param entryDir: absolute path to the entry's directory.
+           :type entryDir: str
+           :return: size of all files in the entry in bytes.
+           :rtype: int
+           """
+        return sum(os.path.getsize(os.path.join(entryDir, file)) for file in os.listdir(entryDir))
+
+    def evict(self):
+        """Removes the least recently used cache entries until the cache size is within its limit.
+           """
+        entries = []
+        for key in os.listdir(self.cacheDir):
+            entryDir = os.path.join(self.cacheDir, key)
+            if os.path.isdir(entryDir) and not key.startswith("tmp_"):
+                entries.append((os.path.getmtime(entryDir), self.getEntrySize(entryDir), entryDir))
+
+        cacheSize = sum(size for _, size, _ in entries)
+        for _, size, entryDir in sorted(entries):
+            if cacheSize <= self.sizeLimit:
+                break
+            benchutils.logDebug("DEBUG: Remove cache entry " + entryDir)
+            shutil.rmtree(entryDir, ignore_errors = True)
+            cacheSize -= size
+
+    def preprocess(self, preprocessor):
+        """Runs a preprocessor unless its output is already cached.
+           The cache key consists of the preprocessor's input files (see :meth:`preprocessing.Preprocessor.getCacheInputs`) and parameters (see :meth:`preprocessing.Preprocessor.getCacheParams`).
+
+           :param preprocessor: the preprocessor to run.
+           :type preprocessor: :class:`preprocessing.Preprocessor`
+           :return: absolute path to the preprocessed output file.
+           :rtype: str
+           """
+        if not self.isEnabled():
+            return preprocessor.preprocess()
+
+        inputFiles = preprocessor.getCacheInputs()
+        key = self.computeKey(inputFiles, preprocessor.getCacheParams())
+        output = self.lookup(key)
+        if output is not None:
+            benchutils.logInfo("Reuse cached output of " + type(preprocessor).__name__ + ": " + output)
+            return output
+
+        output = preprocessor.preprocess()
+        self.store(key, output, output not in inputFiles)
+        return output
+
+
+class RankingRegistry():
+    """Shares rankings of feature selectors between all selectors of a benchmarking run.
+       Combining selectors (e.g. Postfilter_InfoGain_KEGG and Weighted_InfoGain_KEGG) and the plain traditional selector (InfoGain) compute the same ranking on the same input data set; with the registry, it is only computed once.
+       Rankings are registered under a key consisting of the input data set's content, the selector name, and the selector's parameters (see :meth:`featureselection.FeatureSelector.getParams`).
+       As selectors run in parallel processes, a lock file makes sure that only one process computes a ranking while the others wait for it.
+       Selectors always receive a copy of the registered ranking, so they can modify or rename it.
+       The time log of the selector that computed a ranking is registered along with it. Selectors reusing the ranking add its entries to their own time log, marked with REUSED_PREFIX, with the durations of computing the ranking but the time it was reused; so the runtime history (see :class:`execution.RuntimeHistory`) is independent of which selector happened to compute the ranking first.
+
+       :param registryDir: absolute path to the directory where the rankings are registered. Defaults to rankingRegistry/ in the intermediate directory, which is cleaned up before every run.
+       :type registryDir: str
+       :param pollInterval: seconds to wait between checking if a ranking that is computed by another process is available.
+       :type pollInterval: float
+       """
+    #prefix of the descriptions of time log entries that were taken over from the selector that computed a reused ranking
+    REUSED_PREFIX = "Reused: "
+
+    def __init__(self, registryDir = None, pollInterval = 1.0):
+        if registryDir is None:
+            registryDir = benchutils.getConfigValue("General", "intermediateDir") + "rankingRegistry/"
+        self.registryDir = registryDir
+        self.pollInterval = pollInterval
+        benchutils.createDirectory(registryDir)
+        super().__init__()
+
+    def computeKey(self, selector):
+        """Computes the registry key of a selector.
+
+           :param selector: the selector whose input and parameters were set.
+           :type selector: :class:`featureselection.FeatureSelector`
+           :return: the registry key.
+           :rtype: str
+           """
+        keyHash = hashlib.sha256()
+        keyHash.update(hashFile(selector.input, self.registryDir).encode("utf-8"))
+        params = [selector.getName()] + list(selector.getParams())
+        #rankings in compact precision may differ from those in full precision, so do not share them
+        if benchutils.isCompactPrecision():
+            params.append("float32")
+        for param in params:
+            keyHash.update(str(param).encode("utf-8"))
+            keyHash.update(b"\0")
+        return keyHash.hexdigest()
+
+    def selectFeatures(self, selector):
+        """Runs the selector unless its ranking is already registered, and registers the ranking otherwise.
+           The selector's parameters (input, output, logging directory) must have been set before.
+
+           :param selector: the selector to run.
+           :type selector: :class:`featureselection.FeatureSelector`
+           :return: absolute path to the ranking file in the selector's output directory.
+           :rtype: str
+           """
+        key = self.computeKey(selector)
+        registeredRanking = os.path.join(self.registryDir, key + ".csv")
+        lockFile = os.path.join(self.registryDir, key + ".lock")
+
+        while True:
+            if os.path.isfile(registeredRanking):
+                return self.copyRanking(selector, registeredRanking)
+            if acquireLock(lockFile):
+                break
+            time.sleep(self.pollInterval)
+
+        try:
+            #a process may have registered the ranking between our last check and acquiring the lock
+            if os.path.isfile(registeredRanking):
+                return self.copyRanking(selector, registeredRanking)
+            rankingFile = selector.selectFeatures()
+            if os.path.isfile(rankingFile):
+                #register the time log first, so that it is available as soon as the ranking is
+                tmpFile = self.getTimeLogPath(registeredRanking) + "." + str(os.getpid())
+                benchutils.flushTimeLog(selector.getTimeLogs(), tmpFile)
+                os.rename(tmpFile, self.getTimeLogPath(registeredRanking))
+                tmpFile = registeredRanking + "." + str(os.getpid())
+                shutil.copyfile(rankingFile, tmpFile)
+                os.rename(tmpFile, registeredRanking)
+            return rankingFile
+        finally:
+            os.remove(lockFile)
+
+    def getTimeLogPath(self, registeredRanking):
+        """Gets the location of the time log that is registered along with a ranking.
+
+           :param registeredRanking: absolute path to the registered ranking.
+           :type registeredRanking: str
+           :return: absolute path to the registered time log.
+           :rtype: str
+           """
+        return os.path.splitext(registeredRanking)[0] + ".timelog"
+
+    def copyRanking(self, selector, registeredRanking):
+        """Copies a registered ranking to the selector's output directory, as if the selector had computed it.
+           The selector's time log gets an entry for copying the ranking and the entries of the registered time log of the selector that computed it, marked as reused (see :class:`RankingRegistry`).
+
+           :param selector: the selector whose ranking was registered.
+           :type selector: :class:`featureselection.FeatureSelector`
+           :param registeredRanking: absolute path to the registered ranking.
+           :type registeredRanking: str
+           :return: absolute path to the copied ranking.
+           :rtype: str
+           """
+        start = time.time()
+        outputFile = selector.output + selector.getName() + ".csv"
+        shutil.copyfile(registeredRanking, outputFile)
+        end = time.time()
+        benchutils.logInfo("Reuse registered ranking of " + selector.getName() + " for " + selector.input)
+        timeLogs = benchutils.logRuntime(selector.getTimeLogs(), start, end, "Reusing Registered Ranking")
+        timeLogFile = self.getTimeLogPath(registeredRanking)
+        if os.path.isfile(timeLogFile):
+            registeredLogs = pd.read_csv(timeLogFile, sep = "\t")
+            #keep how long computing the ranking took, but not when it was computed (by another selector)
+            reusedLogs = pd.DataFrame({"Description": self.REUSED_PREFIX + registeredLogs["Description"].astype(str),
+                                       "Start": start, "End": end, "Duration": registeredLogs["Duration"]},
+                                      columns = ["Description", "Start", "End", "Duration"])
+            timeLogs = pd.concat([timeLogs, reusedLogs], ignore_index = True)
+        selector.setTimeLogs(timeLogs)
+        if selector.enableLogFlush:
+            benchutils.flushTimeLog(selector.getTimeLogs(), selector.loggingDir + selector.getName() + ".csv")
+        return outputFile
+
+
+class FilteredViewRegistry():
+    """Shares data sets that are filtered to the genes retrieved from a knowledge base between all selectors of a benchmarking run.
+       Prefilter selectors using the same knowledge base (e.g. Prefilter_InfoGain_KEGG and Prefilter_ReliefF_KEGG) filter the input data set to the same genes; with the registry, the filtered data set (the view) is only read and written once.
+       Only the shared genes are read from the input data set (see :func:`datastore.loadDataset`), and views are stored in the binary format as well if binaryFormat is enabled in the config.
+       Views are registered under a key consisting of the input data set's content and the genes to keep; as for the :class:`RankingRegistry`, a lock file makes sure that only one process writes a view while the others wait for it.
+
+       :param registryDir: absolute path to the directory where the views are registered. Defaults to filteredViews/ in the intermediate directory, which is cleaned up before every run.
+       :type registryDir: str
+       :param pollInterval: seconds to wait between checking if a view that is written by another process is available.
+       :type pollInterval: float
+       """
+    def __init__(self, registryDir = None, pollInterval = 1.0):
+        if registryDir is None:
+            registryDir = benchutils.getConfigValue("General", "intermediateDir") + "filteredViews/"
+        self.registryDir = registryDir
+        self.pollInterval = pollInterval
+        benchutils.createDirectory(registryDir)
+        super().__init__()
+
+    def computeKey(self, dataFile, genes):
+        """Computes the registry key of a view.
+
+           :param dataFile: absolute path to the data set to filter.
+           :type dataFile: str
+           :param genes: the genes to keep, in the order of the data set.
+           :type genes: :class:`List` of str
+           :return: the registry key.
+           :rtype: str
+           """
+        keyHash = hashlib.sha256()
+        keyHash.update(hashFile(dataFile, self.registryDir).encode("utf-8"))
+        for gene in genes:
+            keyHash.update(str(gene).encode("utf-8"))
+            keyHash.update(b"\0")
+        return keyHash.hexdigest()
+
+    def getView(self, dataFile, genes):
+        """Gets a data set filtered to the given genes, writing it unless it is already registered.
+           The view contains the sample IDs and class labels of the data set, and all given genes that are contained in the data set (in the order of the data set), so gene lists that only differ in genes missing in the data set share the same view.
+
+           :param dataFile: absolute path to the data set to filter.
+           :type dataFile: str
+           :param genes: the genes to keep.
+           :type genes: :class:`List` of str
+           :return: absolute path to the view's CSV file. Selectors must not modify it.
+           :rtype: str
+           """
+        wanted = set(genes)
+        sharedGenes = [gene for gene in datastore.loadFeatureNames(dataFile) if gene in wanted]
+        key = self.computeKey(dataFile, sharedGenes)
+        view = os.path.join(self.registryDir, key + ".csv")
+        lockFile = os.path.join(self.registryDir, key + ".lock")
+
+        while True:
+            if os.path.isfile(view):
+                benchutils.logInfo("Reuse filtered view of " + dataFile + " with " + str(len(sharedGenes)) + " genes")
+                return view
+            if acquireLock(lockFile):
+                break
+            time.sleep(self.pollInterval)
+
+        try:
+            #a process may have registered the view between our last check and acquiring the lock
+            if os.path.isfile(view):
+                return view
+            self.writeView(dataFile, sharedGenes, view)
+            return view
+        finally:
+            os.remove(lockFile)
+
+    def writeView(self, dataFile, genes, view):
+        """Filters a data set to the given genes and writes it as view.
+           The view's CSV file is written last (via a temporary file), so that other processes only see complete views.
+
+           :param dataFile: absolute path to the data set to filter.
+           :type dataFile: str
+           :param genes: the genes to keep, all of them contained in the data set.
+           :type genes: :class:`List` of str
+           :param view: absolute path to the view's CSV file.
+           :type view: str
+           """
+        matrix = datastore.loadDataset(dataFile, genes)
+        tmpFile = view + "." + str(os.getpid())
+        #same format as the input data set, i.e. with the sample IDs in the first column
+        matrix.rename_axis(matrix.index.name if matrix.index.name is not None else "Unnamed: 0").reset_index().to_csv(tmpFile, index = False)
+        if benchutils.getConfigBoolean("Preprocessing", "binaryFormat"):
+            #the store must be at least as new as the CSV file to be used
+            datastore.writeStore(view, matrix, benchutils.isCompactPrecision())
+        os.rename(tmpFile, view)
@@ -0,0 +1,182 @@
+import os, shutil, tempfile
+import numpy as np
+import pandas as pd
+import benchutils
+
+#binary stores are directories next to the CSV file they were created from, e.g. ready/data.store/ for ready/data.csv
+STORE_SUFFIX = ".store"
+#feature values as typed matrix (samples x features) in column-major order, so that the values of a feature are stored contiguously
+VALUES_FILE = "values.npy"
+#sample IDs and (for labeled data sets) their class labels
+SAMPLES_FILE = "samples.csv"
+#feature names in the column order of the values matrix
+FEATURES_FILE = "features.csv"
+LABEL_COLUMN = "classLabel"
+#type of feature values in compact precision (see the config's precision parameter)
+COMPACT_TYPE = np.float32
+
+
+def getStorePath(dataFile):
+    """Gets the location of the binary store of a data set.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :return: absolute path to the store directory.
+       :rtype: str
+       """
+    return os.path.splitext(dataFile)[0] + STORE_SUFFIX + "/"
+
+def isStoreAvailable(dataFile):
+    """Checks if a data set has a binary store that is up to date, i.e. that was written after the data set's CSV file.
+       Stores of CSV files that were overwritten afterwards (e.g. by restoring them from the :class:`caching.StageCache`) are ignored.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :return: true if the store can be read instead of the CSV file.
+       :rtype: bool
+       """
+    storePath = getStorePath(dataFile)
+    storeFiles = [storePath + file for file in [VALUES_FILE, SAMPLES_FILE, FEATURES_FILE]]
+    if not all(os.path.isfile(file) for file in storeFiles):
+        return False
+    return not os.path.isfile(dataFile) or os.path.getmtime(storeFiles[0]) >= os.path.getmtime(dataFile)
+
+def writeStore(dataFile, data = None, compact = False):
+    """Writes the binary store of a data set next to its CSV file, which stays available for R and Java code.
+       Only data sets whose features are all numeric can be stored.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :param data: the data set as read by :func:`loadDataset` (sample IDs as index, class labels in the first column if labeled), None to read it from dataFile.
+       :type data: :class:`pandas.DataFrame`
+       :param compact: whether to store the feature values as float32 instead of their original type.
+       :type compact: bool
+       :return: absolute path to the store directory, or None if the data set could not be stored.
+       :rtype: str
+       """
+    if data is None:
+        data = pd.read_csv(dataFile, index_col = 0)
+    labeled = len(data.columns) > 0 and data.columns[0] == LABEL_COLUMN
+    features = data.iloc[:, 1:] if labeled else data
+    dtypes = list(features.dtypes)
+    if not all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in dtypes):
+        benchutils.logWarning("WARNING: " + dataFile + " contains non-numeric features, keep it as CSV only.")
+        return None
+
+    storePath = getStorePath(dataFile)
+    #write into a temporary directory first so that readers never see an incomplete store
+    tmpDir = tempfile.mkdtemp(prefix = "tmp_", dir = os.path.dirname(os.path.normpath(storePath)))
+    try:
+        if compact:
+            valuesType = COMPACT_TYPE
+        else:
+            valuesType = np.result_type(*dtypes) if dtypes else np.float64
+        np.save(os.path.join(tmpDir, VALUES_FILE), np.asfortranarray(features.to_numpy(dtype = valuesType)))
+        samples = data.iloc[:, :1] if labeled else pd.DataFrame(index = data.index)
+        samples.to_csv(os.path.join(tmpDir, SAMPLES_FILE))
+        pd.DataFrame({"feature": [str(feature) for feature in features.columns]}).to_csv(os.path.join(tmpDir, FEATURES_FILE), index = False)
+        if os.path.isdir(storePath):
+            shutil.rmtree(storePath)
+        os.rename(tmpDir, storePath)
+    except OSError as e:
+        shutil.rmtree(tmpDir, ignore_errors = True)
+        benchutils.logWarning("WARNING: Could not write binary store of " + dataFile + ": " + str(e))
+        return None
+    return storePath
+
+def loadFeatureNames(dataFile):
+    """Loads the names of all features of a data set without loading its values.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :return: feature names (without the class label column) in the order of the data set.
+       :rtype: :class:`List` of str
+       """
+    if isStoreAvailable(dataFile):
+        return list(pd.read_csv(getStorePath(dataFile) + FEATURES_FILE, dtype = str, keep_default_na = False)["feature"])
+    columns = list(pd.read_csv(dataFile, index_col = 0, nrows = 0).columns)
+    return [column for column in columns if column != LABEL_COLUMN]
+
+def loadDataset(dataFile, features = None, sampleColumn = False, attach = False, compact = False):
+    """Loads a data set, from its binary store if it is up to date and from its CSV file otherwise.
+       The result is the same as reading the CSV file with the first column as index: sample IDs as index, the class labels (if labeled) in the first column, and all features in the following columns.
+       If features are given, only these features are loaded (in the order of the data set); unknown feature names are ignored.
+       With attach, the feature values of the whole data set are not loaded, but memory-mapped read-only from the store: all processes attaching to the same store share a single copy of the values in memory (the OS page cache), so parallel feature selectors do not hold one copy each.
+       Attached values cannot be modified in place; operations creating new values (e.g. scaling) work as usual.
+       In compact precision, feature values are held as float32 and class labels as categorical codes, which halves the memory of the data set.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :param features: names of the features to load, None to load all features.
+       :type features: :class:`List` of str
+       :param sampleColumn: whether to return the sample IDs as first column instead of the index, as when reading the CSV file without index.
+       :type sampleColumn: bool
+       :param attach: whether to memory-map the feature values instead of loading them (only if the data set has an up-to-date store and no features are given).
+       :type attach: bool
+       :param compact: whether to load feature values as float32 and class labels as categorical codes.
+       :type compact: bool
+       :return: the data set.
+       :rtype: :class:`pandas.DataFrame`
+       """
+    data = readDataset(dataFile, features, attach)
+    if compact:
+        data = toCompactPrecision(data)
+    if sampleColumn:
+        #name an unnamed sample ID column like pandas does when reading the file without index
+        data = data.rename_axis(data.index.name if data.index.name is not None else "Unnamed: 0").reset_index()
+    return data
+
+def toCompactPrecision(data):
+    """Converts the feature values of a data set to float32 and its class labels to categorical codes.
+       Values that are float32 already (e.g. loaded from a compact store) are not copied.
+
+       :param data: the data set with class labels (if labeled) in the first column.
+       :type data: :class:`pandas.DataFrame`
+       :return: the converted data set.
+       :rtype: :class:`pandas.DataFrame`
+       """
+    labeled = len(data.columns) > 0 and data.columns[0] == LABEL_COLUMN
+    features = data.iloc[:, 1:] if labeled else data
+    if any(dtype != COMPACT_TYPE for dtype in features.dtypes):
+        features = features.astype(COMPACT_TYPE)
+    if not labeled:
+        return features
+    features.insert(0, LABEL_COLUMN, data[LABEL_COLUMN].astype("category"))
+    return features
+
+def readDataset(dataFile, features, attach = False):
+    """Reads a data set with the sample IDs as index (see :func:`loadDataset`).
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :param features: names of the features to load, None to load all features.
+       :type features: :class:`List` of str
+       :param attach: whether to memory-map the feature values of the whole data set from its store.
+       :type attach: bool
+       :return: the data set.
+       :rtype: :class:`pandas.DataFrame`
+       """
+    if not isStoreAvailable(dataFile):
+        if features is None:
+            return pd.read_csv(dataFile, index_col = 0)
+        #parse only the index, label, and requested columns
+        header = list(pd.read_csv(dataFile, index_col = 0, nrows = 0).columns)
+        wanted = set(features) | {LABEL_COLUMN}
+        return pd.read_csv(dataFile, index_col = 0, usecols = [0] + [i + 1 for i, column in enumerate(header) if column in wanted])
+
+    storePath = getStorePath(dataFile)
+    samples = pd.read_csv(storePath + SAMPLES_FILE, index_col = 0)
+    featureNames = loadFeatureNames(dataFile)
+    if features is None:
+        values = np.load(storePath + VALUES_FILE, mmap_mode = "r" if attach else None)
+    else:
+        wanted = set(features)
+        positions = [i for i, feature in enumerate(featureNames) if feature in wanted]
+        #map the file and copy only the requested columns, which are contiguous in column-major order
+        values = np.load(storePath + VALUES_FILE, mmap_mode = "r")[:, positions]
+        featureNames = [featureNames[i] for i in positions]
+    #wrap the values without copying them, which keeps attached values memory-mapped
+    data = pd.DataFrame(values, index = samples.index, columns = featureNames, copy = False)
+    if LABEL_COLUMN in samples.columns:
+        data.insert(0, LABEL_COLUMN, samples[LABEL_COLUMN])
+    return data
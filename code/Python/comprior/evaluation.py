@@ -1,6 +1,6 @@
 from abc import abstractmethod
-import time, os, math, random
-import knowledgebases, benchutils
+import time, os, math, random, shutil, tempfile
+import knowledgebases, benchutils, datastore, rankingstore, genestatistics
 import pandas as pd
 import numpy as np
 import matplotlib as matplots
@@ -40,21 +40,15 @@ class AttributeRemover():
 
         #dictionary: topK genes per method
         rankings = {}
-        for file in os.listdir(self.rankingsDir):
-            if os.path.isfile(os.path.join(self.rankingsDir, file)):
-                selectionMethod = file.split(".")[0] #get method name from filename without ending
-                ranking = benchutils.loadRanking(self.rankingsDir + file)
-
-                # geneRankings has the format attributeName, score
-                # we need the feature name column
-                featureNameCol = ranking.columns[0]
-                # feature names
-                featureNames = ranking[featureNameCol]
-
+        repository = rankingstore.RankingRepository(self.rankingsDir)
+        try:
+            for selectionMethod in repository.listMethods():
                 # take feature names of top k features
                 #if topK is larger than the actual size (=number of features), the whole list is returned without
                 #throwing an error
-                rankings[selectionMethod] = featureNames[:self.topK]
+                rankings[selectionMethod] = repository.getTopK(selectionMethod, self.topK)
+        finally:
+            repository.close()
 
         return rankings
 
@@ -85,6 +79,67 @@ class AttributeRemover():
             outputFilename = methodDir + "top" + str(i) + "features_" + method + ".csv"
             reducedSet.to_csv(outputFilename, index=False, sep="\t")
 
+    def loadTopKRanking(self, method):
+        """Loads the top k features of a single method's ranking.
+
+           :param method: selection method whose ranking to load.
+           :type method: str
+           :return: ranked list of the (column) names of the top k features.
+           :rtype: :class:`pandas.Series`
+           """
+        repository = rankingstore.RankingRepository(self.rankingsDir)
+        try:
+            return repository.getTopK(method, self.topK)
+        finally:
+            repository.close()
+
+    def findDataset(self, method):
+        """Finds the input data set that matches a method's ranking.
+           Feature extraction methods write their mapped data set as <original prefix>_<method>.csv into the data directory, all other methods use the original data set, which always has the shortest file name.
+
+           :param method: selection method for which to find the data set.
+           :type method: str
+           :return: file name of the matching data set.
+           :rtype: str
+           """
+        datafiles = self.listDatasets()
+        for dataset in datafiles:
+            if dataset.endswith("_" + method + ".csv"):
+                return dataset
+        return min(datafiles, key = len)
+
+    def listDatasets(self):
+        """Lists the CSV files of all data sets in the data directory, leaving out their binary stores (see :mod:`datastore`).
+
+           :return: file names of the data sets.
+           :rtype: :class:`List` of str
+           """
+        return [file for file in os.listdir(self.dataDir) if file.endswith(".csv") and os.path.isfile(os.path.join(self.dataDir, file))]
+
+    def loadDataset(self, dataset, features = None):
+        """Loads a data set of the data directory with the sample IDs as first column, as needed for writing the reduced data sets.
+
+           :param dataset: file name of the data set.
+           :type dataset: str
+           :param features: names of the features to load, None to load all features.
+           :type features: :class:`List` of str
+           :return: the data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        return datastore.loadDataset(self.dataDir + "/" + dataset, features, sampleColumn = True, compact = benchutils.isCompactPrecision())
+
+    def removeUnusedAttributesForMethod(self, method):
+        """Creates reduced files with only the top x features for a single method.
+           Allows to prepare the classification of a method as soon as its ranking is available.
+           Only the top k features of the method's ranking are loaded from the data set.
+
+           :param method: selection method whose ranking to use.
+           :type method: str
+           """
+        ranking = self.loadTopKRanking(method)
+        data = self.loadDataset(self.findDataset(method), list(ranking))
+        self.removeAttributesFromDataset(method, ranking, data)
+
     def removeUnusedAttributes(self):
         """For every method and its corresponding ranking, create reduced files with only the top x features.
            """
@@ -92,13 +147,13 @@ class AttributeRemover():
         geneRankings = self.loadTopKRankings()
 
         methods = list(geneRankings.keys())
-        datafiles = os.listdir(self.dataDir)
+        datafiles = self.listDatasets()
         #sort input files by name length: the longer files having had a feature mapping first, the original file with only the prefix to be last
         datafiles.sort(key = len, reverse = True)
 
         for dataset in datafiles:
 
-            data = pd.read_csv(self.dataDir + "/" + dataset)
+            data = self.loadDataset(dataset)
             #match the method in the dataset name to the corresponding ranking
             #check if any of the available methods is a substring of the filename
             method_matches = [method for method in methods if method in dataset]
@@ -175,24 +230,58 @@ class Evaluator:
            """
         rankings = {}
 
-        for file in os.listdir(inputDir):
-            if os.path.isfile(os.path.join(inputDir, file)):
-                selectionMethod = file.split(".")[0]  # get method name from filename without ending
-                ranking = benchutils.loadRanking(inputDir + file)
-                genesColumn = ranking.columns[0]
-                genes = ranking[genesColumn]
-                # 0 is code number for using all items
-                if maxRank == 0:
-                    maxRank = len(ranking) - 1
-
-                # add 1 for header column
-                if keepOrder:
-                    rankings[selectionMethod] = genes[:maxRank + 1]
-                else:
-                    rankings[selectionMethod] = set(genes[:maxRank + 1])
+        repository = rankingstore.RankingRepository(inputDir)
+        try:
+            for selectionMethod in repository.listMethods():
+                rankings[selectionMethod] = self.queryRanking(repository, selectionMethod, maxRank, keepOrder)
+        finally:
+            repository.close()
 
         return rankings
 
+    def loadRanking(self, inputDir, method, maxRank, keepOrder):
+        """Loads the ranking of a single method from a specified input directory.
+           See :meth:`Evaluator.loadRankings` for the meaning of maxRank and keepOrder.
+
+           :param inputDir: absolute path to directory where all rankings are located.
+           :type inputDir: str
+           :param method: selection method whose ranking to load.
+           :type method: str
+           :param maxRank: maximum number of features to have in ranking.
+           :type maxRank: int
+           :param keepOrder: whether the order of the features in the ranking is important or not.
+           :type keepOrder: bool
+           :return: the ranking, either as ordered list or set (depending on keepOrder attribute)
+           :rtype: :class:`pandas.Series` or set
+           """
+        repository = rankingstore.RankingRepository(inputDir)
+        try:
+            return self.queryRanking(repository, method, maxRank, keepOrder)
+        finally:
+            repository.close()
+
+    def queryRanking(self, repository, method, maxRank, keepOrder):
+        """Queries the top features of a single method's ranking from a ranking repository.
+           See :meth:`Evaluator.loadRankings` for the meaning of maxRank and keepOrder.
+
+           :param repository: repository of the directory where all rankings are located.
+           :type repository: :class:`rankingstore.RankingRepository`
+           :param method: selection method whose ranking to load.
+           :type method: str
+           :param maxRank: maximum number of features to have in ranking.
+           :type maxRank: int
+           :param keepOrder: whether the order of the features in the ranking is important or not.
+           :type keepOrder: bool
+           :return: the ranking, either as ordered list or set (depending on keepOrder attribute)
+           :rtype: :class:`pandas.Series` or set
+           """
+        # 0 is code number for using all items
+        # add 1 for header column
+        genes = repository.getTopK(method, None if maxRank == 0 else maxRank + 1)
+        if keepOrder:
+            return genes
+        return set(genes)
+
     def computeKendallsW(self, rankings):
         """Computes Kendall's W from two rankings.
            Note: measure does not make much sense if the two rankings are highly disjunct, which can happen especially for traditional approaches.
@@ -308,25 +397,54 @@ class ClassificationEvaluator(Evaluator):
         matplots.pyplot.savefig(outputDir + metric + ".pdf")
         matplots.pyplot.clf()
 
-    def evaluate(self):
-        """Triggers classification and evaluation in Java and creates corresponding plots for every metric that was selected in the config.
-           """
-
-        # reduce data set for crossEvaluation to selected genes
-        attributeRemover = AttributeRemover(self.input, self.rankingsDir, self.evalConfig["topKmax"], self.intermediateDir)
-        attributeRemover.removeUnusedAttributes()
+    def runClassification(self, reducedDatasetDir):
+        """Triggers classification and evaluation in Java for every method subdirectory in reducedDatasetDir.
 
+           :param reducedDatasetDir: absolute path to the directory containing one subdirectory of reduced data sets per method.
+           :type reducedDatasetDir: str
+           """
         classifiers = self.classificationConfig["classifiers"].replace(" ", ",")
         metrics =self.classificationConfig["metrics"].replace(" ", ",")
-        params = [self.intermediateDir,self.output, str(self.evalConfig["topKmin"]), str(self.evalConfig["topKmax"]), str(self.evalConfig["kfold"]) ]
+        params = [reducedDatasetDir,self.output, str(self.evalConfig["topKmin"]), str(self.evalConfig["topKmax"]), str(self.evalConfig["kfold"]) ]
         params.append(classifiers)
         params.append(metrics)
-        benchutils.logInfo("INFO: Running classification (" + str(self.evalConfig["kfold"]) +"-fold cross-validation) for " + str(self.evalConfig["topKmin"]) + " to " + str(self.evalConfig["topKmax"]) + "features with classifiers " + classifiers + " for " + self.intermediateDir)
+        benchutils.logInfo("INFO: Running classification (" + str(self.evalConfig["kfold"]) +"-fold cross-validation) for " + str(self.evalConfig["topKmin"]) + " to " + str(self.evalConfig["topKmax"]) + "features with classifiers " + classifiers + " for " + reducedDatasetDir)
         benchutils.runJavaCommand(self.javaConfig, "/WEKA_Evaluator.jar", params)
 
-        for metric in metrics.split(","):
+    def drawPlots(self):
+        """Creates the line plots for every metric that was selected in the config, using the classification results of all methods.
+           """
+        for metric in self.classificationConfig["metrics"].split():
             self.drawLinePlot(self.output, self.output, self.evalConfig["topKmax"], metric)
 
+    def evaluateMethod(self, method):
+        """Reduces the input data to the top k features of a single method and runs the classification for it.
+           The Java evaluator processes every subdirectory of its input directory, so it is pointed to a temporary directory that only links to this method's reduced data sets.
+
+           :param method: selection method to evaluate.
+           :type method: str
+           """
+        attributeRemover = AttributeRemover(self.input, self.rankingsDir, self.evalConfig["topKmax"], self.intermediateDir)
+        attributeRemover.removeUnusedAttributesForMethod(method)
+
+        stagingDir = tempfile.mkdtemp(prefix = "classification_", dir = benchutils.getConfigValue("General", "intermediateDir"))
+        os.symlink(os.path.abspath(self.intermediateDir + method), os.path.join(stagingDir, method))
+        try:
+            self.runClassification(stagingDir + "/")
+        finally:
+            shutil.rmtree(stagingDir)
+
+    def evaluate(self):
+        """Triggers classification and evaluation in Java and creates corresponding plots for every metric that was selected in the config.
+           """
+
+        # reduce data set for crossEvaluation to selected genes
+        attributeRemover = AttributeRemover(self.input, self.rankingsDir, self.evalConfig["topKmax"], self.intermediateDir)
+        attributeRemover.removeUnusedAttributes()
+
+        self.runClassification(self.intermediateDir)
+        self.drawPlots()
+
 class RankingsEvaluator(Evaluator):
     """Evaluates the rankings themselves by generating overlaps and comparing fold change differences.
 
@@ -420,24 +538,30 @@ class RankingsEvaluator(Evaluator):
            :rtype: :class:`numpy.array`
            """
         finalRankMatrix = []
-        rankings = self.loadRankings(inputDir, topK, True)
-
-        # first, fill matrix column with all genes that occur in the rankings
-        matrix_column = set()
-        for method in rankings.keys():
-            matrix_column = matrix_column.union(set(rankings[method]))
-        matrix_column = list(matrix_column)
-
-        #second, fill matrix approach by approach
-        for method in rankings.keys():
-            #initialize list with default 0 values (0 = not part of actual ranking)
-            ranks = [len(matrix_column)] * len(matrix_column)
-            count = 0
-            for gene in rankings[method]:
-                count += 1
-                matrix_index = matrix_column.index(gene)
-                ranks[matrix_index] = count
-            finalRankMatrix.append(ranks)
+        repository = rankingstore.RankingRepository(inputDir)
+        try:
+            rankings = {}
+            for method in repository.listMethods():
+                rankings[method] = self.queryRanking(repository, method, topK, True)
+
+            # first, fill matrix column with all genes that occur in the rankings
+            matrix_column = set()
+            for method in rankings.keys():
+                matrix_column = matrix_column.union(set(rankings[method]))
+            matrix_column = list(matrix_column)
+
+            #second, fill matrix approach by approach with the ranks looked up in the repository
+            for method in rankings.keys():
+                #genes that are not part of the actual ranking get the last rank
+                ranks = [len(matrix_column)] * len(matrix_column)
+                geneRanks = repository.getRanks(method, matrix_column)
+                for matrix_index, gene in enumerate(matrix_column):
+                    rank = geneRanks.get(gene)
+                    if rank is not None and rank <= len(rankings[method]):
+                        ranks[matrix_index] = rank
+                finalRankMatrix.append(ranks)
+        finally:
+            repository.close()
         return np.array(finalRankMatrix)
 
 
@@ -532,7 +656,6 @@ class RankingsEvaluator(Evaluator):
            Writes fold changes to file and creates corresponding box plots.
            """
         rankings = self.loadRankings(self.input, int(self.evalConfig["topKmax"]), False)
-        dataset = pd.read_csv(self.dataset)
 
         #collect all top k ranked genes
         rankedGenes = set()
@@ -543,15 +666,25 @@ class RankingsEvaluator(Evaluator):
         #compute the average fold change for every feature
         medianFoldChanges = {}
         averageFoldChanges = {}
-        for gene in rankedGenes:
-            try:
-                avgFoldChange = sum(dataset[gene])/len(dataset[gene])
-                medianFoldChange = np.median(dataset[gene])
-                medianFoldChanges[gene] = medianFoldChange
-                averageFoldChanges[gene] = avgFoldChange
-            except:
-                #we have extracted features for which no average fold change can be computed
-                continue
+        statistics = genestatistics.loadStatistics(self.dataset)
+        if statistics is not None:
+            #the statistics computed during preprocessing contain mean and median of every gene of the data set already
+            for gene in rankedGenes:
+                if str(gene) in statistics.index:
+                    averageFoldChanges[gene] = statistics.at[str(gene), "mean"]
+                    medianFoldChanges[gene] = statistics.at[str(gene), "median"]
+        else:
+            #only load the ranked genes from the data set
+            dataset = datastore.loadDataset(self.dataset, rankedGenes)
+            for gene in rankedGenes:
+                try:
+                    avgFoldChange = sum(dataset[gene])/len(dataset[gene])
+                    medianFoldChange = np.median(dataset[gene])
+                    medianFoldChanges[gene] = medianFoldChange
+                    averageFoldChanges[gene] = avgFoldChange
+                except:
+                    #we have extracted features for which no average fold change can be computed
+                    continue
 
         #create boxplots for all methods for average and median fold change
         methodsAvg = {}
@@ -787,17 +920,35 @@ class AnnotationEvaluator(Evaluator):
            Depending on what was specified in the config file, annotate and/or enrich feature rankings and compute overlaps or percentages.
            Overlaps then can show a) if feature rankings represent the same underlying processes via annotation (maybe although having selected different features), or b) if the underlying processes are equally strongly represented by checking the enrichment (maybe altough having seleced different features).
            """
-        geneLists = self.loadRankings(self.input, int(self.evalConfig["topKmax"]), False)
-        outputPath = self.output + "top" + self.evalConfig["topKmax"] + "_"
+        for approach in self.loadRankings(self.input, int(self.evalConfig["topKmax"]), False).keys():
+            self.annotateMethod(approach)
+
+        self.evaluateOverlaps()
+
+    def annotateMethod(self, approach):
+        """Annotates and/or enriches the top k features of a single method's ranking, depending on what was specified in the config file.
+
+           :param approach: selection method whose ranking to annotate.
+           :type approach: str
+           """
+        geneList = self.loadRanking(self.input, approach, int(self.evalConfig["topKmax"]), False)
+        outputFile = self.output + "top" + self.evalConfig["topKmax"] + "_" + approach
 
         enrichr = knowledgebases.Enrichr()
 
         #if there is any measure mentioned related to annotation
         if "annotation" in self.metrics:
-            # for every top k gene ranking, do enrichment analysis
-            for approach, geneList in geneLists.items():
-                outputFile = outputPath + approach
-                enrichr.annotateGenes(geneList, outputFile)
+            enrichr.annotateGenes(geneList, outputFile)
+
+        if "enrichment_overlap" in self.metrics:
+            if (len(geneList) > 0):
+                enrichr.enrichGeneset(geneList, outputFile)
+
+    def evaluateOverlaps(self):
+        """Computes overlaps and annotation percentages across all methods, once every method was annotated via :meth:`AnnotationEvaluator.annotateMethod`.
+           """
+        geneLists = self.loadRankings(self.input, int(self.evalConfig["topKmax"]), False)
+        outputPath = self.output + "top" + self.evalConfig["topKmax"] + "_"
 
         if "annotation_overlap" in self.metrics:
             # compute overlap of annotated genes
@@ -807,12 +958,6 @@ class AnnotationEvaluator(Evaluator):
             self.countAnnotationPercentages(geneLists, outputPath)
 
         if "enrichment_overlap" in self.metrics:
-            # for every top k gene ranking, do enrichment analysis
-            for approach, geneList in geneLists.items():
-                if (len(geneList) > 0):
-                    outputFile = outputPath + approach
-                    enrichr.enrichGeneset(geneList, outputFile)
-
             # compute overlap of annotated terms
             self.computeOverlap(self.output, "_enrichedTerms")
 
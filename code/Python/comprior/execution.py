@@ -0,0 +1,1073 @@
+import multiprocessing, traceback, os, glob, sys, resource, time, signal
+import pandas as pd
+from multiprocessing.connection import wait
+import benchutils
+import featureselection
+import caching
+
+
+#relative runtime costs of selectors and the keywords they are composed of (see featureselection.FeatureSelectorFactory)
+#used to order selectors that were never run before
+SELECTOR_COSTS = {
+    "Random": 1,
+    "Variance": 2,
+    "ANOVA": 2,
+    "KBonly": 2,
+    "Prefilter": 5,
+    "Postfilter": 5,
+    "Extension": 5,
+    "Weighted": 5,
+    "VB-FS": 10,
+    "InfoGain": 10,
+    "Lasso": 20,
+    "LassoPenalty": 50,
+    "NetworkActivity": 50,
+    "RandomForest": 50,
+    "ReliefF": 100,
+    "mRMR": 100,
+    "CorgsNetworkActivity": 200,
+    "SVMpRFE": 200,
+    "-RFE": 200
+}
+#cost of querying a knowledge base
+KNOWLEDGEBASE_COST = 5
+#cost of keywords that are not listed in SELECTOR_COSTS
+DEFAULT_COST = 10
+
+#seconds a task process may continue after reaching its CPU time limit before the OS kills it
+CPU_GRACE = 5
+#file listing the selectors of a run that were cancelled because of a time limit
+TIMEOUT_FILE = "resourceLogs/timeouts.csv"
+
+#memory model of selectors that were never run before: multiple of the data set size in memory and fixed overhead in MB
+#R and java selectors hold their own copies of the data set in addition to the python process
+SELECTOR_MEMORY = {
+    "Random": (0, 50),
+    "VB-FS": (5, 200),
+    "mRMR": (5, 200),
+    "InfoGain": (6, 500),
+    "ReliefF": (6, 500),
+    "SVMpRFE": (6, 500),
+    "RandomForest": (6, 100),
+    "-RFE": (4, 100),
+    "LassoPenalty": (5, 200),
+    "CorgsNetworkActivity": (5, 100),
+}
+#memory model of keywords that are not listed in SELECTOR_MEMORY
+DEFAULT_MEMORY = (3, 100)
+
+def getSelectorCost(method):
+    """Estimates the relative runtime cost of a selector from the keywords in its name.
+       The cost of a combined selector, e.g. Weighted_InfoGain_KEGG, is the sum of the costs of its keywords.
+
+       :param method: name of the selection method as listed in the config file.
+       :type method: str
+       :return: relative runtime cost.
+       :rtype: int
+       """
+    parts = method.split("_")
+    #the last keyword of selectors with knowledge base is the knowledge base
+    cost = KNOWLEDGEBASE_COST if len(parts) > 1 else 0
+    selectorParts = parts[:-1] if len(parts) > 1 else parts
+    for part in selectorParts:
+        if part.endswith("-RFE"):
+            part = "-RFE"
+        cost += SELECTOR_COSTS.get(part, DEFAULT_COST)
+    return cost
+
+def getSelectorMemory(method, shape):
+    """Estimates the peak memory of a selector from the size of the data set and the keywords in its name.
+       Combined selectors are estimated by their most memory consuming keyword, as they run their parts one after the other.
+
+       :param method: name of the selection method as listed in the config file.
+       :type method: str
+       :param shape: number of samples and features of the input data set.
+       :type shape: tuple(int, int)
+       :return: estimated peak memory in MB.
+       :rtype: float
+       """
+    datasetSize = shape[0] * shape[1] * 8 / (1024 * 1024)
+    estimates = []
+    for part in method.split("_"):
+        if part.endswith("-RFE"):
+            part = "-RFE"
+        factor, overhead = SELECTOR_MEMORY.get(part, DEFAULT_MEMORY)
+        estimates.append(factor * datasetSize + overhead)
+    return max(estimates)
+
+def getSelectorLimits(method):
+    """Gets the wall-clock and CPU time limits of a selector from the config section Gene Selection - Limits.
+       Limits can be set for every keyword a selector name is composed of (including the knowledge base, e.g. DisGeNET.wallTime); a combined selector gets the largest limit of its keywords.
+       Selectors without any limit for their keywords get the default limits.
+
+       :param method: name of the selection method as listed in the config file.
+       :type method: str
+       :return: wall-clock and CPU time limit in seconds; 0 means no limit.
+       :rtype: tuple(float, float)
+       """
+    limitConfig = benchutils.getConfig("Gene Selection - Limits")
+    limits = []
+    for limitType in ["wallTime", "cpuTime"]:
+        keywordLimits = []
+        for part in method.split("_"):
+            keywords = [part, "-RFE"] if part.endswith("-RFE") else [part]
+            for keyword in keywords:
+                value = limitConfig.get(keyword + "." + limitType)
+                if value is not None and value.strip() != "":
+                    keywordLimits.append(float(value))
+        if keywordLimits:
+            limits.append(max(keywordLimits))
+        else:
+            limits.append(float(limitConfig.get(limitType, "0")))
+    return tuple(limits)
+
+def writeTimeouts(outputRootPath, timeouts):
+    """Appends the selectors that were cancelled because of a time limit to the run's timeout file (resourceLogs/timeouts.csv).
+
+       :param outputRootPath: absolute path to the output directory of the current run.
+       :type outputRootPath: str
+       :param timeouts: description of the exceeded limit for every cancelled selector.
+       :type timeouts: dict of str
+       """
+    if not timeouts:
+        return
+    benchutils.logWarning("WARNING: " + str(len(timeouts)) + " selectors were cancelled because of their time limits: " + ", ".join(timeouts.keys()))
+    timeoutFile = os.path.join(outputRootPath, TIMEOUT_FILE)
+    benchutils.createDirectory(os.path.dirname(timeoutFile))
+    rows = pd.DataFrame([[method, limit] for method, limit in timeouts.items()], columns = ["method", "limit"])
+    rows.to_csv(timeoutFile, mode = "a", header = not os.path.isfile(timeoutFile), index = False, sep = "\t")
+
+def estimateMakespan(runtimes, numCores):
+    """Estimates how long it takes to run tasks with the given runtimes on numCores cores, if the longest tasks are started first (as done by :class:`StageScheduler` with runtimes as priorities).
+
+       :param runtimes: estimated runtimes of all tasks.
+       :type runtimes: list of float
+       :param numCores: number of tasks running in parallel.
+       :type numCores: int
+       :return: estimated time until all tasks are finished.
+       :rtype: float
+       """
+    cores = [0.0] * max(1, numCores)
+    for runtime in sorted(runtimes, reverse = True):
+        #the next task starts on the core that becomes free first
+        cores[cores.index(min(cores))] += runtime
+    return max(cores)
+
+def getPeakMemory(startMemory = 0):
+    """Gets the peak memory a task process needed: the growth of its own peak memory since the task started plus the peak memory of its largest terminated child process, e.g. an R script or JVM.
+       A forked process starts with the peak memory of its parent, which is not needed by the task, so it is subtracted.
+       The peak memory of a child process is reported by the operating system including the memory it was started with (i.e., a copy of the task process), so it is rather overestimated.
+
+       :param startMemory: peak memory of the process when the task started, as returned by :func:`getProcessMemory`.
+       :type startMemory: int
+       :return: peak memory in MB.
+       :rtype: float
+       """
+    peak = max(0, getProcessMemory() - startMemory) + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    #ru_maxrss is given in bytes on macOS and in KB on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def getProcessMemory():
+    """Gets the peak memory of the current process so far, without its child processes.
+
+       :return: peak memory in the unit of the platform's ru_maxrss (bytes on macOS, KB on Linux).
+       :rtype: int
+       """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def initializeProcess(configPaths, outputRootPath):
+    """Makes sure that a freshly started process has access to the config and the logger.
+       Processes that were forked from the pipeline process inherit both, processes that were spawned (e.g. on macOS) have to load them again.
+
+       :param configPaths: absolute path(s) to the config files that were used by the pipeline process.
+       :type configPaths: str or list of str
+       :param outputRootPath: absolute path to the output directory of the current run (where the log file is located).
+       :type outputRootPath: str
+       """
+    if benchutils.config is None:
+        benchutils.loadConfig(configPaths)
+        benchutils.createLogger(outputRootPath)
+
+def limitCpuTime(cpuTime):
+    """Limits the CPU time of the current process and all processes it starts afterwards.
+       When the limit is reached, the OS sends SIGXCPU, which terminates the process; if it keeps running, it is killed CPU_GRACE seconds later.
+
+       :param cpuTime: CPU time limit in seconds.
+       :type cpuTime: float
+       """
+    _, hardLimit = resource.getrlimit(resource.RLIMIT_CPU)
+    softLimit = max(1, int(cpuTime))
+    newHardLimit = softLimit + CPU_GRACE
+    if hardLimit != resource.RLIM_INFINITY:
+        softLimit = min(softLimit, hardLimit)
+        newHardLimit = min(newHardLimit, hardLimit)
+    resource.setrlimit(resource.RLIMIT_CPU, (softLimit, newHardLimit))
+
+def killProcessGroup(process):
+    """Kills a task process together with all processes it started, e.g. R scripts or JVMs.
+       Task processes lead their own process group (see :func:`runTaskProcess`), which their children inherit.
+
+       :param process: the task process.
+       :type process: :class:`multiprocessing.Process`
+       """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        #the group does not exist (anymore) or the process did not start its own group yet
+        if process.exitcode is None:
+            process.terminate()
+
+def runTaskProcess(connection, configPaths, outputRootPath, function, args, cpuTime = 0):
+    """Entry point of a task process.
+       Runs the given function and sends its return value back to the parent process, together with the peak memory the task needed (see :func:`getPeakMemory`).
+       Any error, including exits (e.g. triggered by the feature selector factory), is sent back as a formatted traceback.
+       The process starts a new process group, so that it can be cancelled together with all processes it starts (see :func:`killProcessGroup`).
+
+       :param connection: sending end of the pipe to the parent process.
+       :type connection: :class:`multiprocessing.connection.Connection`
+       :param configPaths: absolute path(s) to the config files that were used by the pipeline process.
+       :type configPaths: str or list of str
+       :param outputRootPath: absolute path to the output directory of the current run.
+       :type outputRootPath: str
+       :param function: the function to execute.
+       :type function: callable
+       :param args: arguments for the function.
+       :type args: tuple
+       :param cpuTime: CPU time limit in seconds, applying to the process and to every process it starts individually. 0 means no limit.
+       :type cpuTime: float
+       """
+    #memory the process inherited from its parent when it was forked
+    startMemory = getProcessMemory()
+    try:
+        os.setpgid(0, 0)
+        if cpuTime > 0:
+            limitCpuTime(cpuTime)
+        initializeProcess(configPaths, outputRootPath)
+        result = function(*args)
+        connection.send((result, None, getPeakMemory(startMemory)))
+    except BaseException:
+        #also catch SystemExit, as e.g. the factories exit if a selector or knowledge base is not available
+        connection.send((None, traceback.format_exc(), getPeakMemory(startMemory)))
+    finally:
+        connection.close()
+
+def runSelector(method, datasetLocation, outputDir, loggingDir):
+    """Creates the feature selector for the given method name and runs it.
+
+       :param method: name of the selection method as listed in the config file.
+       :type method: str
+       :param datasetLocation: absolute path to the input data set (from which features should be selected).
+       :type datasetLocation: str
+       :param outputDir: absolute path to the selector's output directory (where ranking will be written to).
+       :type outputDir: str
+       :param loggingDir: absolute path to the directory where the time logs are written to.
+       :type loggingDir: str
+       :return: absolute path to the ranking file and the selector's time logs.
+       :rtype: tuple(str, :class:`pandas.DataFrame`)
+       """
+    selectorFactory = featureselection.FeatureSelectorFactory()
+    selector = selectorFactory.createFeatureSelector(method)
+    selector.setParams(datasetLocation, outputDir, loggingDir)
+    if "_" in method:
+        rankingFile = selector.selectFeatures()
+    else:
+        #traditional selectors might also be used by combining selectors, so share their rankings
+        rankingFile = caching.RankingRegistry().selectFeatures(selector)
+    return rankingFile, selector.getTimeLogs()
+
+
+class Task():
+    """A unit of work for the :class:`StageScheduler`.
+
+       :param name: unique name of the task.
+       :type name: str
+       :param function: the function to execute; must be picklable, i.e. a module-level function or a method of a picklable object.
+       :type function: callable
+       :param args: arguments for the function.
+       :type args: tuple
+       :param dependencies: names of tasks that must have finished successfully before this task can start. If any of them fails, this task is skipped.
+       :type dependencies: list of str
+       :param waitFor: names of tasks that must have finished (no matter if successfully or not) before this task can start.
+       :type waitFor: list of str
+       :param priority: tasks with higher priority are started first when several tasks are ready, e.g. the estimated runtime to start long tasks first.
+       :type priority: float
+       :param memory: estimated peak memory of the task in MB.
+       :type memory: float
+       :param inputs: file patterns of all files the task reads, needed to run it on a remote worker (see :class:`workqueue.Coordinator`).
+       :type inputs: list of str
+       :param outputs: file patterns of all files the task writes. Only tasks declaring their outputs can be run on a remote worker.
+       :type outputs: list of str
+       :param wallTime: wall-clock time limit in seconds, after which the task is cancelled. 0 means no limit.
+       :type wallTime: float
+       :param cpuTime: CPU time limit in seconds, after which the task is cancelled. 0 means no limit.
+       :type cpuTime: float
+       """
+    def __init__(self, name, function, args, dependencies, waitFor, priority = 0, memory = 0, inputs = (), outputs = (), wallTime = 0, cpuTime = 0):
+        self.name = name
+        self.function = function
+        self.args = args
+        self.dependencies = list(dependencies)
+        self.waitFor = list(waitFor)
+        self.priority = priority
+        self.memory = memory
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.wallTime = wallTime
+        self.cpuTime = cpuTime
+        super().__init__()
+
+
+class StageScheduler():
+    """Runs tasks in parallel processes as soon as the tasks they depend on are finished.
+       At most numCores tasks are running at the same time, so the overall runtime is bounded by the longest chain of dependent tasks rather than by the sum of all tasks.
+       Failing tasks are logged and recorded; tasks depending on them are skipped, all other tasks continue.
+       The names of all successfully finished tasks are appended to a journal file, which allows to resume an interrupted run (see :meth:`StageScheduler.run`).
+       If a memory budget is given, tasks are only started if their estimated memory fits into what is left of the budget; a task exceeding the whole budget is run alone.
+       If a coordinator is given, tasks that declare their input and output files are also sent to idle remote workers; numCores and the memory budget only apply to the local processes.
+       Tasks exceeding their wall-clock or CPU time limit are cancelled together with all processes they started and recorded as failed and timed out.
+
+       :param numCores: maximum number of tasks to run in parallel.
+       :type numCores: int
+       :param outputRootPath: absolute path to the output directory of the current run.
+       :type outputRootPath: str
+       :param journal: absolute path to the journal file, or None to not keep a journal.
+       :type journal: str
+       :param memoryBudget: maximum estimated memory in MB of all running tasks together. 0 means no limit.
+       :type memoryBudget: float
+       :param coordinator: coordinator of remote workers, or None to run all tasks locally.
+       :type coordinator: :class:`workqueue.Coordinator`
+       :param results: return value for every successfully finished task.
+       :type results: dict
+       :param failures: error message for every failed task.
+       :type failures: dict of str
+       :param skipped: names of tasks that were skipped because a dependency failed.
+       :type skipped: list of str
+       :param completed: names of tasks that were not run because they had already been completed by a former run.
+       :type completed: list of str
+       :param peakMemory: measured peak memory in MB for every task that was run.
+       :type peakMemory: dict
+       :param runtimes: runtime in seconds for every task that was run.
+       :type runtimes: dict
+       :param timeouts: description of the exceeded limit for every task that was cancelled because of a time limit.
+       :type timeouts: dict of str
+       """
+    def __init__(self, numCores, outputRootPath, journal = None, memoryBudget = 0, coordinator = None):
+        self.numCores = max(1, numCores)
+        self.outputRootPath = outputRootPath
+        self.journal = journal
+        self.memoryBudget = memoryBudget
+        self.coordinator = coordinator
+        self.peakMemory = {}
+        self.runtimes = {}
+        self.startTimes = {}
+        self.tasks = []
+        self.results = {}
+        self.failures = {}
+        self.skipped = []
+        self.completed = []
+        self.timeouts = {}
+        super().__init__()
+
+    def addTask(self, name, function, args = (), dependencies = (), waitFor = (), priority = 0, memory = 0, inputs = (), outputs = (), wallTime = 0, cpuTime = 0):
+        """Adds a task to the scheduler.
+           Once their dependencies are fulfilled, tasks are started by descending priority, and tasks of the same priority in the order they were added.
+
+           :param name: unique name of the task.
+           :type name: str
+           :param function: the function to execute.
+           :type function: callable
+           :param args: arguments for the function.
+           :type args: tuple
+           :param dependencies: names of tasks that must have finished successfully before this task can start.
+           :type dependencies: list of str
+           :param waitFor: names of tasks that must have finished (successfully or not) before this task can start.
+           :type waitFor: list of str
+           :param priority: tasks with higher priority are started first.
+           :type priority: float
+           :param memory: estimated peak memory of the task in MB.
+           :type memory: float
+           :param inputs: file patterns of all files the task reads.
+           :type inputs: list of str
+           :param outputs: file patterns of all files the task writes; if given, the task may run on a remote worker.
+           :type outputs: list of str
+           :param wallTime: wall-clock time limit in seconds. 0 means no limit.
+           :type wallTime: float
+           :param cpuTime: CPU time limit in seconds, applying to the task process and to every process it starts individually. 0 means no limit.
+           :type cpuTime: float
+           """
+        self.tasks.append(Task(name, function, args, dependencies, waitFor, priority, memory, inputs, outputs, wallTime, cpuTime))
+
+    def isFinished(self, name):
+        """Checks if a task has finished, no matter if successfully, failed, or skipped.
+
+           :param name: task name.
+           :type name: str
+           :return: true if the task has finished.
+           :rtype: bool
+           """
+        return name in self.results or name in self.failures or name in self.skipped or name in self.completed
+
+    def readJournal(self):
+        """Reads the names of all tasks that finished successfully according to the journal file.
+
+           :return: names of the finished tasks.
+           :rtype: set of str
+           """
+        if self.journal is None or not os.path.isfile(self.journal):
+            return set()
+        with open(self.journal, "r") as journalFile:
+            return set(line.strip() for line in journalFile if line.strip() != "")
+
+    def writeJournal(self, name):
+        """Appends a successfully finished task to the journal file.
+
+           :param name: task name.
+           :type name: str
+           """
+        if self.journal is not None:
+            with open(self.journal, "a") as journalFile:
+                journalFile.write(name + "\n")
+
+    def findCompletedTasks(self, isComplete):
+        """Removes all tasks that were already completed by a former run from the list of pending tasks.
+           A task counts as completed if isComplete confirms it and all tasks it depends on or waits for are completed as well, so that tasks building on rerun tasks are rerun, too.
+
+           :param isComplete: function receiving a task name and the names of the tasks in the journal, returning true if the task does not need to run again.
+           :type isComplete: callable
+           """
+        journaled = self.readJournal()
+        changed = True
+        while changed:
+            changed = False
+            for task in self.tasks:
+                if task.name in self.completed:
+                    continue
+                if all(dep in self.completed for dep in task.dependencies + task.waitFor) and isComplete(task.name, journaled):
+                    self.completed.append(task.name)
+                    changed = True
+        if self.completed:
+            benchutils.logInfo("Resume run: " + str(len(self.completed)) + " of " + str(len(self.tasks)) + " tasks were already completed.")
+
+    def startProcess(self, task):
+        """Starts a new process that runs the given task.
+
+           :param task: the task to run.
+           :type task: :class:`Task`
+           :return: the started process and the receiving end of its result pipe.
+           :rtype: tuple(:class:`multiprocessing.Process`, :class:`multiprocessing.connection.Connection`)
+           """
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=runTaskProcess, name=task.name,
+                                          args=(sender, benchutils.configPaths, self.outputRootPath, task.function, task.args, task.cpuTime))
+        process.start()
+        #close the parent's copy of the sending end so that we notice if the child dies without sending anything
+        sender.close()
+        benchutils.logDebug("DEBUG: Started process " + str(process.pid) + " for task " + task.name)
+        return process, receiver
+
+    def collectResult(self, task, process, receiver):
+        """Receives the result of a finished task process and stores it.
+           If the process died without sending a result (e.g. because it was killed by the OS or cancelled because of a time limit), the exit code is recorded as failure.
+           Processes that were started by the task process and are still alive are killed.
+
+           :param task: the task that was run by the process.
+           :type task: :class:`Task`
+           :param process: the task process.
+           :type process: :class:`multiprocessing.Process`
+           :param receiver: receiving end of the process' result pipe.
+           :type receiver: :class:`multiprocessing.connection.Connection`
+           """
+        try:
+            result, error, self.peakMemory[task.name] = receiver.recv()
+            #the task finished just before it was cancelled
+            self.timeouts.pop(task.name, None)
+        except EOFError:
+            process.join()
+            #R scripts or JVMs of the task may still be running, e.g. after the task process reached its CPU time limit
+            killProcessGroup(process)
+            result = None
+            if process.exitcode == -signal.SIGXCPU:
+                self.timeouts[task.name] = "CPU time limit of " + str(task.cpuTime) + " s"
+            if task.name in self.timeouts:
+                error = "Task was cancelled after exceeding its " + self.timeouts[task.name] + "."
+            else:
+                error = "Process terminated unexpectedly with exit code " + str(process.exitcode) + "."
+        receiver.close()
+        process.join()
+        self.storeResult(task, result, error)
+
+    def collectRemoteResult(self, task, connection, pending):
+        """Receives the result of a task that ran on a remote worker and stores it.
+           If the worker disconnected before sending the result, the task is put back to the pending tasks to run again.
+
+           :param task: the task that was run by the worker.
+           :type task: :class:`Task`
+           :param connection: connection to the worker.
+           :type connection: :class:`multiprocessing.connection.Connection`
+           :param pending: tasks that have not been started yet.
+           :type pending: list of :class:`Task`
+           """
+        remoteResult = self.coordinator.collectResult(connection)
+        if remoteResult is None:
+            benchutils.logWarning("WARNING: Lost connection to the worker running task " + task.name + ", run it again.")
+            pending.append(task)
+            return
+        result, error, self.peakMemory[task.name], timeout = remoteResult
+        if timeout is not None:
+            self.timeouts[task.name] = timeout
+        self.storeResult(task, result, error)
+
+    def storeResult(self, task, result, error):
+        """Stores the result of a finished task and records it in the journal, or records the error if the task failed.
+
+           :param task: the finished task.
+           :type task: :class:`Task`
+           :param result: return value of the task.
+           :type result: object
+           :param error: formatted traceback if the task failed, None otherwise.
+           :type error: str
+           """
+        self.runtimes[task.name] = time.time() - self.startTimes.pop(task.name)
+        if error is None:
+            self.results[task.name] = result
+            self.writeJournal(task.name)
+        else:
+            self.failures[task.name] = error
+            benchutils.logError("ERROR: Task " + task.name + " failed:\n" + error)
+
+    def fitsMemoryBudget(self, task, running):
+        """Checks if a task can be started without exceeding the memory budget.
+           If no other task is running, a task is always admitted, even if its estimate exceeds the whole budget.
+
+           :param task: the task to start.
+           :type task: :class:`Task`
+           :param running: the tasks currently running in local processes.
+           :type running: list of :class:`Task`
+           :return: true if the task can be started.
+           :rtype: bool
+           """
+        if self.memoryBudget <= 0 or not running:
+            return True
+        usedMemory = sum(runningTask.memory for runningTask in running)
+        return usedMemory + task.memory <= self.memoryBudget
+
+    def cancelExpiredTasks(self, running):
+        """Kills all local task processes (including the processes they started) that exceeded their wall-clock time limit.
+           The cancelled tasks are collected like tasks that died, as their result pipes are closed by killing them.
+
+           :param running: task and process for every receiving end of a running task's result pipe; remote tasks have no process.
+           :type running: dict
+           """
+        now = time.time()
+        for task, process in running.values():
+            if process is None or task.wallTime <= 0 or task.name in self.timeouts:
+                continue
+            if now - self.startTimes[task.name] > task.wallTime:
+                self.timeouts[task.name] = "wall-clock time limit of " + str(task.wallTime) + " s"
+                benchutils.logWarning("WARNING: Cancel task " + task.name + " after exceeding its " + self.timeouts[task.name] + ".")
+                killProcessGroup(process)
+
+    def getWaitTimeout(self, running):
+        """Computes how long to wait for running tasks before the scheduler has to act again, i.e. to cancel a task reaching its wall-clock time limit or to check for new remote workers.
+
+           :param running: task and process for every receiving end of a running task's result pipe; remote tasks have no process.
+           :type running: dict
+           :return: timeout in seconds, or None to wait until a task finishes.
+           :rtype: float
+           """
+        timeouts = []
+        if self.coordinator is not None:
+            timeouts.append(self.coordinator.POLL_INTERVAL)
+        now = time.time()
+        for task, process in running.values():
+            if process is not None and task.wallTime > 0 and task.name not in self.timeouts:
+                timeouts.append(max(0, self.startTimes[task.name] + task.wallTime - now))
+        return min(timeouts) if timeouts else None
+
+    def killRunningTasks(self, running):
+        """Kills all local task processes, including the processes they started.
+
+           :param running: task and process for every receiving end of a running task's result pipe; remote tasks have no process.
+           :type running: dict
+           """
+        for task, process in running.values():
+            if process is not None:
+                benchutils.logDebug("DEBUG: Kill process " + str(process.pid) + " of task " + task.name)
+                killProcessGroup(process)
+
+    def skipUnreachableTasks(self, pending):
+        """Removes all tasks from pending whose dependencies failed or were skipped themselves.
+
+           :param pending: tasks that have not been started yet.
+           :type pending: list of :class:`Task`
+           """
+        changed = True
+        while changed:
+            changed = False
+            for task in list(pending):
+                if any((dep in self.failures) or (dep in self.skipped) for dep in task.dependencies):
+                    pending.remove(task)
+                    self.skipped.append(task.name)
+                    benchutils.logWarning("WARNING: Skip task " + task.name + " because one of its dependencies did not finish successfully.")
+                    changed = True
+
+    def run(self, isComplete = None):
+        """Runs all tasks, keeping at most numCores local task processes alive at the same time.
+
+           :param isComplete: if given, resume a former run and only run tasks that were not completed before (see :meth:`StageScheduler.findCompletedTasks`).
+           :type isComplete: callable
+           :return: return value for every successfully finished task.
+           :rtype: dict
+           """
+        names = [task.name for task in self.tasks]
+        for task in self.tasks:
+            for dep in task.dependencies + task.waitFor:
+                if dep not in names:
+                    raise ValueError("Task " + task.name + " depends on unknown task " + dep + ".")
+
+        if isComplete is not None:
+            self.findCompletedTasks(isComplete)
+
+        pending = [task for task in self.tasks if task.name not in self.completed]
+        running = {}
+
+        #do not leave task processes (and their R scripts or JVMs) behind if the run is interrupted
+        try:
+            while pending or running:
+                self.skipUnreachableTasks(pending)
+
+                #fill up free slots with tasks whose dependencies are all finished, highest priority first
+                #(sorting is stable, so tasks of the same priority keep their order)
+                for task in sorted(pending, key = lambda task: -task.priority):
+                    if not all(self.isFinished(dep) for dep in task.dependencies + task.waitFor):
+                        continue
+                    if self.coordinator is not None and task.outputs and self.coordinator.hasIdleWorker():
+                        connection = self.coordinator.startTask(task, self.outputRootPath)
+                        if connection is not None:
+                            self.startTimes[task.name] = time.time()
+                            pending.remove(task)
+                            #remote tasks have no local process
+                            running[connection] = (task, None)
+                            continue
+                    localTasks = [runningTask for runningTask, process in running.values() if process is not None]
+                    if len(localTasks) < self.numCores and self.fitsMemoryBudget(task, localTasks):
+                        pending.remove(task)
+                        process, receiver = self.startProcess(task)
+                        self.startTimes[task.name] = time.time()
+                        running[receiver] = (task, process)
+
+                if not running:
+                    if pending:
+                        raise ValueError("Cyclic task dependencies between " + ", ".join(task.name for task in pending) + ".")
+                    break
+
+                #a receiver becomes ready when its process sent a result or died (or its worker sent a result or disconnected)
+                #stop waiting regularly to cancel tasks exceeding their time limit and, with remote workers, to start tasks on workers that connected in the meantime
+                for receiver in wait(list(running.keys()), self.getWaitTimeout(running)):
+                    task, process = running.pop(receiver)
+                    if process is None:
+                        self.collectRemoteResult(task, receiver, pending)
+                    else:
+                        self.collectResult(task, process, receiver)
+                self.cancelExpiredTasks(running)
+        except BaseException:
+            self.killRunningTasks(running)
+            raise
+
+        if self.failures:
+            benchutils.logWarning("WARNING: " + str(len(self.failures)) + " of " + str(len(self.tasks)) + " tasks failed: " + ", ".join(self.failures.keys()))
+
+        return self.results
+
+
+class RuntimeHistory():
+    """Estimates the runtimes of selectors from the time logs of former runs in the results directory.
+       Every run stores the time logs of its selectors in timeLogs/ and the shape of its input data set in datasetShape.csv.
+       Time logs of selectors that were cancelled because of a time limit (see :func:`writeTimeouts`) are incomplete and therefore ignored.
+       Historical runtimes are scaled linearly by the size of the data set (samples * features) of the current run.
+       Selectors without history are estimated with their relative cost (see :func:`getSelectorCost`), calibrated by the selectors that have a history.
+
+       :param resultsDir: absolute path to the directory containing the output directories of all runs.
+       :type resultsDir: str
+       :param history: for every selector, a list of its former runtimes in seconds together with the data set shape of the run (or None if unknown).
+       :type history: dict
+       """
+    SHAPE_FILE = "datasetShape.csv"
+
+    def __init__(self, resultsDir):
+        self.resultsDir = resultsDir
+        self.history = self.loadHistory()
+        super().__init__()
+
+    @staticmethod
+    def loadDatasetShape(runDir):
+        """Loads the shape of the input data set of a run.
+
+           :param runDir: absolute path to the output directory of the run.
+           :type runDir: str
+           :return: number of samples and features, or None if the run did not record its data set shape.
+           :rtype: tuple(int, int)
+           """
+        try:
+            shape = pd.read_csv(os.path.join(runDir, RuntimeHistory.SHAPE_FILE), sep = "\t")
+            return int(shape["samples"][0]), int(shape["features"][0])
+        except Exception:
+            return None
+
+    def loadHistory(self):
+        """Collects the runtimes of all selectors from the time logs of all runs.
+           The runtime of a selector is the time between its first logged start and its last logged end, plus the time it took to compute a ranking it reused from another selector (see :class:`caching.RankingRegistry`), i.e. the longest reused entry, which spans the whole computation.
+
+           :return: for every selector, a list of its former runtimes in seconds together with the data set shape of the run.
+           :rtype: dict
+           """
+        history = {}
+        for runDir in glob.glob(os.path.join(self.resultsDir, "*", "")):
+            shape = None
+            try:
+                cancelled = set(pd.read_csv(os.path.join(runDir, TIMEOUT_FILE), sep = "\t")["method"])
+            except Exception:
+                cancelled = set()
+            for timeLogFile in glob.glob(os.path.join(runDir, "timeLogs", "*.csv")):
+                try:
+                    timeLogs = pd.read_csv(timeLogFile, sep = "\t")
+                    reused = timeLogs["Description"].astype(str).str.startswith(caching.RankingRegistry.REUSED_PREFIX)
+                    duration = timeLogs.loc[~reused, "End"].max() - timeLogs.loc[~reused, "Start"].min()
+                    if reused.any():
+                        duration = duration + timeLogs.loc[reused, "Duration"].max()
+                except Exception:
+                    continue
+                if pd.isnull(duration):
+                    continue
+                if shape is None:
+                    shape = self.loadDatasetShape(runDir)
+                method = os.path.splitext(os.path.basename(timeLogFile))[0]
+                if method in cancelled:
+                    continue
+                history.setdefault(method, []).append((float(duration), shape))
+        return history
+
+    def estimateFromHistory(self, method, shape):
+        """Estimates the runtime of a selector as the average of its former runtimes, scaled to the given data set shape.
+
+           :param method: name of the selection method.
+           :type method: str
+           :param shape: number of samples and features of the current input data set.
+           :type shape: tuple(int, int)
+           :return: estimated runtime in seconds, or None if the selector has no history.
+           :rtype: float
+           """
+        if method not in self.history:
+            return None
+        estimates = []
+        for duration, formerShape in self.history[method]:
+            if formerShape is not None and shape is not None and formerShape[0] * formerShape[1] > 0:
+                duration = duration * (shape[0] * shape[1]) / (formerShape[0] * formerShape[1])
+            estimates.append(duration)
+        return sum(estimates) / len(estimates)
+
+    def estimateRuntimes(self, methods, shape):
+        """Estimates the runtimes of all given selectors, either from their history or from their relative cost.
+
+           :param methods: names of the selection methods.
+           :type methods: list of str
+           :param shape: number of samples and features of the current input data set.
+           :type shape: tuple(int, int)
+           :return: estimated runtime for every method (in seconds, if any method has a history).
+           :rtype: dict
+           """
+        estimates = {}
+        for method in methods:
+            estimate = self.estimateFromHistory(method, shape)
+            if estimate is not None:
+                estimates[method] = estimate
+
+        #seconds per cost unit, derived from methods that have a history
+        calibrations = [estimate / getSelectorCost(method) for method, estimate in estimates.items()]
+        secondsPerCost = sum(calibrations) / len(calibrations) if calibrations else 1.0
+
+        for method in methods:
+            if method not in estimates:
+                estimates[method] = getSelectorCost(method) * secondsPerCost
+        return estimates
+
+
+class MemoryHistory():
+    """Estimates the peak memory of selectors from the peak memory that was measured in former runs in the results directory.
+       Every run stores the measured peak memory of its selectors together with the data set shape in resourceLogs/peakMemory.csv (see :meth:`MemoryHistory.writePeakMemory`).
+       The data-dependent part of historical peaks (i.e., the peak minus the selector's fixed overhead) is scaled linearly by the size of the data set (samples * features) of the current run, using the largest scaled peak.
+       Selectors without history are estimated with their memory model (see :func:`getSelectorMemory`).
+
+       :param resultsDir: absolute path to the directory containing the output directories of all runs.
+       :type resultsDir: str
+       :param history: for every selector, a list of its former peak memory in MB together with the data set shape of the run.
+       :type history: dict
+       """
+    MEMORY_FILE = "resourceLogs/peakMemory.csv"
+
+    def __init__(self, resultsDir):
+        self.resultsDir = resultsDir
+        self.history = self.loadHistory()
+        super().__init__()
+
+    def loadHistory(self):
+        """Collects the peak memory of all selectors from all runs.
+
+           :return: for every selector, a list of its former peak memory in MB together with the data set shape of the run.
+           :rtype: dict
+           """
+        history = {}
+        for memoryFile in glob.glob(os.path.join(self.resultsDir, "*", self.MEMORY_FILE)):
+            try:
+                peaks = pd.read_csv(memoryFile, sep = "\t")
+            except Exception:
+                continue
+            for _, row in peaks.iterrows():
+                history.setdefault(row["method"], []).append((float(row["peakMemory"]), (int(row["samples"]), int(row["features"]))))
+        return history
+
+    def estimateMemory(self, methods, shape):
+        """Estimates the peak memory of all given selectors, either from their history or from their memory model.
+
+           :param methods: names of the selection methods.
+           :type methods: list of str
+           :param shape: number of samples and features of the current input data set.
+           :type shape: tuple(int, int)
+           :return: estimated peak memory in MB for every method.
+           :rtype: dict
+           """
+        estimates = {}
+        for method in methods:
+            estimates[method] = getSelectorMemory(method, shape)
+            if method in self.history:
+                #fixed overhead (e.g. of the interpreter or JVM) does not grow with the data set
+                overhead = getSelectorMemory(method, (0, 0))
+                scaledPeaks = []
+                for peak, formerShape in self.history[method]:
+                    if formerShape[0] * formerShape[1] > 0:
+                        peak = overhead + max(0, peak - overhead) * (shape[0] * shape[1]) / (formerShape[0] * formerShape[1])
+                    scaledPeaks.append(peak)
+                estimates[method] = max(scaledPeaks)
+        return estimates
+
+    @staticmethod
+    def writePeakMemory(outputRootPath, peakMemory, shape):
+        """Appends the measured peak memory of selectors to the run's peak memory file.
+
+           :param outputRootPath: absolute path to the output directory of the current run.
+           :type outputRootPath: str
+           :param peakMemory: measured peak memory in MB for every selector.
+           :type peakMemory: dict
+           :param shape: number of samples and features of the input data set.
+           :type shape: tuple(int, int)
+           """
+        if not peakMemory:
+            return
+        memoryFile = os.path.join(outputRootPath, MemoryHistory.MEMORY_FILE)
+        benchutils.createDirectory(os.path.dirname(memoryFile))
+        peaks = pd.DataFrame([[method, peak, shape[0], shape[1]] for method, peak in peakMemory.items()],
+                             columns = ["method", "peakMemory", "samples", "features"])
+        peaks.to_csv(memoryFile, mode = "a", header = not os.path.isfile(memoryFile), index = False, sep = "\t")
+
+
+class TaskHistory():
+    """Estimates the runtime and peak memory of tasks from the tasks that were run in former runs in the results directory.
+       Every run stores the runtime and peak memory of all its tasks in resourceLogs/taskRuntimes.csv, together with the number of classifiers a classification task trained (see :meth:`TaskHistory.writeTaskRuntimes`).
+       Classification runtimes are estimated by the average time per trained classifier, the runtime and memory of other stages (e.g. preprocessing and annotation) from the former runs of their tasks (see :meth:`TaskHistory.estimateStage`).
+
+       :param resultsDir: absolute path to the directory containing the output directories of all runs.
+       :type resultsDir: str
+       :param history: runtime in seconds, peak memory in MB, and number of trained classifiers of all tasks of all runs, together with the data set shape of the run.
+       :type history: :class:`pandas.DataFrame`
+       """
+    RUNTIME_FILE = "resourceLogs/taskRuntimes.csv"
+    COLUMNS = ["task", "runtime", "classifierFits", "peakMemory", "samples", "features"]
+
+    def __init__(self, resultsDir):
+        self.resultsDir = resultsDir
+        self.history = self.loadHistory()
+        super().__init__()
+
+    def loadHistory(self):
+        """Collects the task runtimes of all runs.
+           Runs that did not record the peak memory of their tasks or their data set shape have missing values instead.
+
+           :return: runtime in seconds, peak memory in MB, and number of trained classifiers of all tasks, as well as the number of samples and features of the run's data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        runtimes = []
+        for runtimeFile in glob.glob(os.path.join(self.resultsDir, "*", self.RUNTIME_FILE)):
+            try:
+                runRuntimes = pd.read_csv(runtimeFile, sep = "\t")
+            except Exception:
+                continue
+            shape = RuntimeHistory.loadDatasetShape(runtimeFile[:-len(self.RUNTIME_FILE)])
+            runRuntimes["samples"], runRuntimes["features"] = shape if shape is not None else (float("nan"), float("nan"))
+            runtimes.append(runRuntimes)
+        if not runtimes:
+            return pd.DataFrame(columns = self.COLUMNS)
+        return pd.concat(runtimes, ignore_index = True).reindex(columns = self.COLUMNS)
+
+    def estimateSecondsPerFit(self):
+        """Estimates the time it takes to train and evaluate a single classifier.
+
+           :return: average runtime in seconds per trained classifier of all former classification tasks, or None if there are none.
+           :rtype: float
+           """
+        classifications = self.history[self.history["classifierFits"] > 0]
+        if classifications.empty:
+            return None
+        return float(classifications["runtime"].sum()) / float(classifications["classifierFits"].sum())
+
+    def estimateTasks(self, tasks, shape = None):
+        """Estimates the runtime and peak memory of tasks from the former runs of the tasks with the same name.
+           Tasks of sweep points are matched without the point's prefix (e.g. annotate_<method> for <point>/annotate_<method>).
+           If a shape is given, runtimes and the data-dependent part of peak memory (i.e., beyond the default overhead, see :data:`DEFAULT_MEMORY`) are scaled linearly by the size of the data set, as done by :class:`RuntimeHistory` and :class:`MemoryHistory`.
+
+           :param tasks: names of the tasks.
+           :type tasks: list of str
+           :param shape: number of samples and features of the current input data set, None to not scale former runtimes and memory.
+           :type shape: tuple(int, int)
+           :return: average runtime in seconds and largest peak memory in MB of every task that has a history (tasks without a history of their peak memory are missing in the second dict).
+           :rtype: tuple(dict, dict)
+           """
+        history = self.history.assign(name = self.history["task"].astype(str).str.split("/").str[-1])
+        _, overhead = DEFAULT_MEMORY
+        runtimes = {}
+        memory = {}
+        for task in tasks:
+            taskHistory = history[history["name"] == task]
+            if taskHistory.empty:
+                continue
+            scale = pd.Series(1.0, index = taskHistory.index)
+            if shape is not None:
+                formerSize = taskHistory["samples"] * taskHistory["features"]
+                scale = (shape[0] * shape[1] / formerSize.where(formerSize > 0)).fillna(1.0)
+            runtimes[task] = float((taskHistory["runtime"] * scale).mean())
+            peaks = overhead + (taskHistory["peakMemory"] - overhead).clip(lower = 0) * scale
+            if peaks.notna().any():
+                memory[task] = float(peaks.max())
+        return runtimes, memory
+
+    def estimateStage(self, tasks, numCores, shape = None):
+        """Estimates the runtime and peak memory of a stage whose tasks run in parallel (see :meth:`TaskHistory.estimateTasks`).
+           Tasks without a history are estimated with the average of the tasks that have one.
+
+           :param tasks: names of the tasks of the stage (each name once per run of the task, e.g. once per sweep point).
+           :type tasks: list of str
+           :param numCores: maximum number of tasks running at the same time.
+           :type numCores: int
+           :param shape: number of samples and features of the current input data set, None to not scale former runtimes and memory.
+           :type shape: tuple(int, int)
+           :return: estimated runtime in seconds and peak memory in MB of the stage, each None if no task has a history.
+           :rtype: tuple(float, float)
+           """
+        runtimes, memory = self.estimateTasks(set(tasks), shape)
+        stageRuntime = None
+        if runtimes:
+            averageRuntime = sum(runtimes.values()) / len(runtimes)
+            stageRuntime = estimateMakespan([runtimes.get(task, averageRuntime) for task in tasks], numCores)
+        stageMemory = None
+        if memory:
+            averageMemory = sum(memory.values()) / len(memory)
+            #the numCores tasks with the largest peaks may run at the same time
+            stageMemory = sum(sorted((memory.get(task, averageMemory) for task in tasks), reverse = True)[:max(1, numCores)])
+        return stageRuntime, stageMemory
+
+    @staticmethod
+    def writeTaskRuntimes(outputRootPath, runtimes, classifierFits, peakMemory = None):
+        """Appends the measured runtimes and peak memory of tasks to the run's task runtime file.
+
+           :param outputRootPath: absolute path to the output directory of the current run.
+           :type outputRootPath: str
+           :param runtimes: measured runtime in seconds for every task.
+           :type runtimes: dict
+           :param classifierFits: number of classifiers trained by every classification task; tasks not contained train none.
+           :type classifierFits: dict
+           :param peakMemory: measured peak memory in MB for every task; tasks not contained are written without peak memory.
+           :type peakMemory: dict
+           """
+        if not runtimes:
+            return
+        peakMemory = peakMemory or {}
+        runtimeFile = os.path.join(outputRootPath, TaskHistory.RUNTIME_FILE)
+        benchutils.createDirectory(os.path.dirname(runtimeFile))
+        rows = pd.DataFrame([[name, runtime, classifierFits.get(name, 0), peakMemory.get(name)] for name, runtime in runtimes.items()],
+                            columns = ["task", "runtime", "classifierFits", "peakMemory"])
+        if os.path.isfile(runtimeFile):
+            #files of former versions do not contain the peak memory yet
+            rows = rows.reindex(columns = pd.read_csv(runtimeFile, sep = "\t", nrows = 0).columns)
+        rows.to_csv(runtimeFile, mode = "a", header = not os.path.isfile(runtimeFile), index = False, sep = "\t")
+
+
+class SelectorExecutor():
+    """Runs feature selectors in parallel, with every selector being executed in its own process.
+       At most numCores selectors are running at the same time; as soon as one selector finishes, the next one is started.
+       Selectors are started by descending estimated runtime (see :class:`RuntimeHistory`), as long as their estimated memory fits into the memory budget (see :class:`MemoryHistory`).
+       Rankings files and time logs are collected from the selector processes, failing selectors are recorded together with their error message instead of stopping the whole run.
+       Selectors exceeding their time limits (see :func:`getSelectorLimits`) are cancelled and recorded as failed and timed out.
+
+       :param numCores: maximum number of selectors to run in parallel.
+       :type numCores: int
+       :param datasetLocation: absolute path to the input data set (from which features should be selected).
+       :type datasetLocation: str
+       :param outputDir: absolute path to the directory where rankings will be written to.
+       :type outputDir: str
+       :param loggingDir: absolute path to the directory where the time logs are written to.
+       :type loggingDir: str
+       :param outputRootPath: absolute path to the output directory of the current run.
+       :type outputRootPath: str
+       :param memoryBudget: maximum estimated memory in MB of all running selectors together. 0 means no limit.
+       :type memoryBudget: float
+       :param rankings: absolute path to the ranking file for every successfully finished method.
+       :type rankings: dict
+       :param timeLogs: time logs for every successfully finished method.
+       :type timeLogs: dict of :class:`pandas.DataFrame`
+       :param failures: error message for every method that failed.
+       :type failures: dict of str
+       :param timeouts: description of the exceeded limit for every method that was cancelled because of a time limit.
+       :type timeouts: dict of str
+       """
+    def __init__(self, numCores, datasetLocation, outputDir, loggingDir, outputRootPath, memoryBudget = 0):
+        self.numCores = numCores
+        self.memoryBudget = memoryBudget
+        self.datasetLocation = datasetLocation
+        self.outputDir = outputDir
+        self.loggingDir = loggingDir
+        self.outputRootPath = outputRootPath
+        self.rankings = {}
+        self.timeLogs = {}
+        self.failures = {}
+        self.timeouts = {}
+        super().__init__()
+
+    def run(self, methods):
+        """Runs the selectors for all given methods, keeping at most numCores selector processes alive at the same time.
+
+           :param methods: names of the selection methods as listed in the config file.
+           :type methods: list of str
+           :return: absolute path to the ranking file for every successfully finished method.
+           :rtype: dict
+           """
+        #start the longest running selectors first so that they do not delay the end of the selection phase
+        shape = benchutils.getDatasetShape(self.datasetLocation)
+        resultsDir = benchutils.getConfigValue("General", "resultsDir")
+        runtimes = RuntimeHistory(resultsDir).estimateRuntimes(methods, shape)
+        memory = MemoryHistory(resultsDir).estimateMemory(methods, shape)
+        scheduler = StageScheduler(self.numCores, self.outputRootPath, memoryBudget = self.memoryBudget)
+        for method in methods:
+            wallTime, cpuTime = getSelectorLimits(method)
+            scheduler.addTask(method, runSelector, (method, self.datasetLocation, self.outputDir, self.loggingDir),
+                              priority = runtimes[method], memory = memory[method], wallTime = wallTime, cpuTime = cpuTime)
+        scheduler.run()
+        MemoryHistory.writePeakMemory(self.outputRootPath, scheduler.peakMemory, shape)
+        writeTimeouts(self.outputRootPath, scheduler.timeouts)
+
+        for method, result in scheduler.results.items():
+            self.rankings[method], self.timeLogs[method] = result
+        self.failures = scheduler.failures
+        self.timeouts = scheduler.timeouts
+
+        return self.rankings
@@ -5,6 +5,9 @@ import os
 import numpy as np
 import benchutils as utils
 import knowledgebases
+import caching
+import datastore
+import genestatistics
 from sklearn.feature_selection import SelectKBest, f_classif
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
@@ -241,6 +244,15 @@ class FeatureSelector:
            """
         return self.name
 
+    def getParams(self):
+        """Gets all parameters that influence the selector's ranking apart from its name and input data.
+           Used to identify rankings that can be shared between selectors (see :class:`caching.RankingRegistry`); override this method if a selector has own parameters.
+
+           :return: list of parameter values.
+           :rtype: list of str
+           """
+        return []
+
     def getData(self):
         """Gets the labeled dataset from which to select features.
 
@@ -248,7 +260,9 @@ class FeatureSelector:
            :rtype: :class:`pandas.DataFrame`
            """
         if self.dataset is None:
-            self.dataset = pd.read_csv(self.input, index_col=0)
+            #parallel selectors share the memory-mapped values of the data set instead of loading their own copy
+            self.dataset = datastore.loadDataset(self.input, attach = utils.getConfigBoolean("Preprocessing", "memoryMapping"),
+                                                 compact = utils.isCompactPrecision())
         return self.dataset
 
     def getUnlabeledData(self):
@@ -258,6 +272,9 @@ class FeatureSelector:
            :rtype: :class:`pandas.DataFrame`
            """
         dataset = self.getData()
+        if dataset.columns[0] == "classLabel":
+            #slicing keeps (memory-mapped) values shared instead of copying them
+            return dataset.iloc[:, 1:]
         return dataset.loc[:, dataset.columns != "classLabel"]
 
     def getFeatures(self):
@@ -268,6 +285,29 @@ class FeatureSelector:
            """
         return self.getData().columns[1:]
 
+    def getStatistics(self, features = None):
+        """Gets the statistics of the dataset's features that were computed during preprocessing (see :mod:`genestatistics`), so that they do not need to be computed from the dataset again.
+
+           :param features: names of the features whose statistics to get (in this order), None for all features.
+           :type features: list of str
+           :return: statistics with feature names as index, None if the dataset has no (up-to-date) statistics for all features.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        return genestatistics.loadStatistics(self.input, features)
+
+    def getAnova(self, features):
+        """Gets the ANOVA F-test of the given features and the class labels from the statistics computed during preprocessing.
+
+           :param features: names of the features.
+           :type features: list of str
+           :return: F-value and p-value of every feature, None if they have to be computed from the dataset (see :func:`genestatistics.computeAnova`).
+           :rtype: tuple(:class:`pandas.Series`, :class:`pandas.Series`)
+           """
+        statistics = self.getStatistics(features)
+        if statistics is None:
+            return None
+        return genestatistics.computeAnova(statistics)
+
     def getUniqueLabels(self):
         """Gets the unique class labels available in the dataset.
 
@@ -446,7 +486,7 @@ class RSelector(FeatureSelector,metaclass=abc.ABCMeta):
 
         utils.logInfo("######################## " + self.getName() + " finished ########################")
 
-        return filename
+        return outputFile
 
 class JavaSelector(FeatureSelector):
     """Selector class for invoking R code for feature selection.
@@ -582,6 +622,18 @@ class CombiningSelector(PriorKnowledgeSelector):
            """
         return self.name + "_" + self.tradSelector.getName() + "_" +  self.knowledgebase.getName()
 
+    def selectTraditionalFeatures(self, intermediateDir):
+        """Runs the (traditional) selector on the unmodified input data set.
+           If the same ranking was already computed by another selector of this run, e.g. by the plain traditional selector or another combining selector, that ranking is reused (see :class:`caching.RankingRegistry`).
+
+           :param intermediateDir: absolute path to output directory for (traditional) selector (where to write the statistical rankings).
+           :type intermediateDir: str
+           :return: absolute path to the ranking file of the (traditional) selector.
+           :rtype: str
+           """
+        self.tradSelector.setParams(self.input, intermediateDir, self.loggingDir)
+        return caching.RankingRegistry().selectFeatures(self.tradSelector)
+
     def getExternalGenes(self):
         """Gets all genes related to the provided search terms from the knowledge base.
 
@@ -688,7 +740,7 @@ class NetworkSelector(PriorKnowledgeSelector):
         pathwayNames = pathwayRanking["attributeName"]
 
         start = time.time()
-        mapped_data = self.featureMapper.mapFeatures(self.getData(), pathways)
+        mapped_data = self.featureMapper.mapFeatures(self.getData(), pathways, self.getStatistics())
         fileprefix = os.path.splitext(self.input)[0]
         mapped_filepath = self.writeMappedFile(mapped_data, fileprefix)
         end = time.time()
@@ -703,8 +755,8 @@ class NetworkSelector(PriorKnowledgeSelector):
             crossValidationFile = utils.getConfigValue("Evaluation", "crossEvaluationData")
             crossValFilename = os.path.basename(crossValidationFile)
             crossValFilepath = crossValidationPath + crossValFilename
-            crossValData = pd.read_csv(crossValFilepath, index_col=0)
-            mapped_crossValData = self.featureMapper.mapFeatures(crossValData, pathways)
+            crossValData = datastore.loadDataset(crossValFilepath, compact = utils.isCompactPrecision())
+            mapped_crossValData = self.featureMapper.mapFeatures(crossValData, pathways, genestatistics.loadStatistics(crossValFilepath))
             crossvalFileprefix = os.path.splitext(crossValFilepath)[0]
             crossval_mapped_filepath = self.writeMappedFile(mapped_crossValData, crossvalFileprefix)
 
@@ -769,20 +821,45 @@ class AnovaSelector(PythonSelector):
     def __init__(self):
         super().__init__("ANOVA")
 
+    def prepareOutput(self, outputFile, data, selector):
+        """Transforms the selector output to a valid ranking and stores it into the specified file.
+           We need to override this method because the F-values may have been computed from the statistics of the data set instead of by a scikit-learn selector.
+
+           :param outputFile: absolute path of the file to which to write the ranking.
+           :type outputFile: str
+           :param data: input dataset.
+           :type data: :class:`pandas.DataFrame`
+           :param selector: selector object from scikit-learn, or the F-values of all features if they were computed from the statistics.
+           """
+        start = time.time()
+        ranking = pd.DataFrame()
+        ranking["attributeName"] = data.columns
+        ranking["score"] = selector if isinstance(selector, np.ndarray) else selector.scores_
+        ranking = ranking.sort_values(by='score', ascending=False)
+        self.writeRankingToFile(ranking, outputFile)
+
+        end = time.time()
+        self.timeLogs = utils.logRuntime(self.timeLogs, start, end, "Output Preparation")
+
     def runSelector(self, data, labels):
         """Runs the ANOVA feature selector of scikit-learn.
+           If the class-wise statistics computed during preprocessing are available, the F-values are computed from them instead of scanning the data set again.
            Is invoked by :meth:`PythonSelector.selectFeatures`.
 
            :param data: dataframe containing the unlabeled dataset.
            :type data: :class:`pandas.DataFrame`
            :param labels: numerically encoded class labels.
            :type labels: list of int
-           :return: sklearn/mlxtend selector that ran the selection (containing coefficients etc.).
+           :return: sklearn selector that ran the selection (containing coefficients etc.), or the F-values of all features if they were computed from the statistics.
            """
         start = time.time()
-        #setting k to "all" returns all features
-        selector = SelectKBest(f_classif, k="all")
-        selector.fit_transform(data, labels)
+        anova = self.getAnova(data.columns)
+        if anova is None:
+            #setting k to "all" returns all features
+            selector = SelectKBest(f_classif, k="all")
+            selector.fit_transform(data, labels)
+        else:
+            selector = anova[0].to_numpy()
 
         end = time.time()
         self.timeLogs = utils.logRuntime(self.timeLogs, start, end, "ANOVA")
@@ -796,18 +873,18 @@ class Variance2Selector(PythonSelector):
 
     def prepareOutput(self, outputFile, data, selector):
         """Transforms the selector output to a valid ranking and stores it into the specified file.
-           We need to override this method because variance selector has no attribute scores but variances.
+           We need to override this method because variance selector has no attribute scores but variances, which may also have been taken from the statistics of the data set.
 
            :param outputFile: absolute path of the file to which to write the ranking.
            :type outputFile: str
            :param data: input dataset.
            :type data: :class:`pandas.DataFrame`
-           :param selector: selector object from scikit-learn.
+           :param selector: selector object from scikit-learn, or the variances of all features if they were taken from the statistics.
            """
         start = time.time()
         ranking = pd.DataFrame()
         ranking["attributeName"] = data.columns
-        ranking["score"] = selector.variances_
+        ranking["score"] = selector if isinstance(selector, np.ndarray) else selector.variances_
         ranking = ranking.sort_values(by='score', ascending=False)
         self.writeRankingToFile(ranking, outputFile)
 
@@ -822,11 +899,16 @@ class Variance2Selector(PythonSelector):
            :type data: :class:`pandas.DataFrame`
            :param labels: numerically encoded class labels.
            :type labels: list of int
-           :return: sklearn/mlxtend selector that ran the selection (containing coefficients etc.).
+           :return: sklearn selector that ran the selection (containing coefficients etc.), or the variances of all features if they were taken from the statistics.
            """
         start = time.time()
-        selector = VarianceThreshold()
-        selector.fit_transform(data)
+        #reuse the variances computed during preprocessing instead of scanning the data set again
+        statistics = self.getStatistics(data.columns)
+        if statistics is None:
+            selector = VarianceThreshold()
+            selector.fit_transform(data)
+        else:
+            selector = statistics["variance"].to_numpy()
 
         end = time.time()
         self.timeLogs = utils.logRuntime(self.timeLogs, start, end, "Variance_p")
@@ -1030,8 +1112,7 @@ class KBweightedSelector(CombiningSelector):
            :rtype: :class:`pandas.DataFrame`
            """
         start = time.time()
-        self.tradSelector.setParams(self.input, intermediateDir, self.loggingDir)
-        statsRankings = self.tradSelector.selectFeatures()
+        statsRankings = self.selectTraditionalFeatures(intermediateDir)
         #load data frame from file
         statisticalRankings = pd.read_csv(statsRankings, index_col = 0, sep = "\t", engine = "python")
         self.timeLogs = pd.concat([self.timeLogs, self.tradSelector.getTimeLogs()])
@@ -1212,6 +1293,13 @@ class WrapperSelector(PythonSelector):
         self.classifier = self.createClassifier()
         self.selector = self.createSelector()
 
+    def getParams(self):
+        """Gets the number of features to select, which determines where the elimination stops.
+
+           :return: list containing the number of features to select.
+           :rtype: list of str
+           """
+        return [utils.getConfigValue("Gene Selection - General", "selectKgenes")]
 
     def createClassifier(self):
         """Creates a classifier instance (from scikit-learn) to be used during the selection process.
@@ -1477,16 +1565,8 @@ class PreFilterSelector(CombiningSelector):
             return outputFilename
 
         #filter input by externalGenes, keep classLabel and sampleID
-        matrix = pd.read_csv(self.input)
-        finalCols = matrix.columns.to_list()[0:2]
-        # filter externalGenes by genes available in the rankings
-        dataGenes = set(matrix.columns.to_list())
-        sharedGenes = list(dataGenes & set(externalGenes))
-        finalCols.extend(sharedGenes)
-        filteredMatrix =  matrix[finalCols]
-        #write to file and set this as new input
-        filtered_input = intermediateOutput + self.getName() + ".csv"
-        filteredMatrix.to_csv(filtered_input, index = False)
+        #prefilter selectors using the same knowledge base share the filtered data set, which only contains the genes available in the input
+        filtered_input = caching.FilteredViewRegistry().getView(self.input, externalGenes)
         self.tradSelector.setParams(filtered_input, intermediateOutput, self.loggingDir)
         rankingFile = self.tradSelector.selectFeatures()
         self.timeLogs = pd.concat([self.timeLogs, self.tradSelector.getTimeLogs()])
@@ -1526,8 +1606,7 @@ class PostFilterSelector(CombiningSelector):
         utils.createDirectory(intermediateOutput)
 
         outputFile = self.output + self.getName() + ".csv"
-        self.tradSelector.setParams(self.input, intermediateOutput, self.loggingDir)
-        rankingFile = self.tradSelector.selectFeatures()
+        rankingFile = self.selectTraditionalFeatures(intermediateOutput)
         self.timeLogs = pd.concat([self.timeLogs, self.tradSelector.getTimeLogs()])
         ranking = utils.loadRanking(rankingFile)
 
@@ -1576,8 +1655,7 @@ class ExtensionSelector(CombiningSelector):
         utils.createDirectory(intermediateOutput)
 
         outputFile = self.output + self.getName() + ".csv"
-        self.tradSelector.setParams(self.input, intermediateOutput, self.loggingDir)
-        rankingFile = self.tradSelector.selectFeatures()
+        rankingFile = self.selectTraditionalFeatures(intermediateOutput)
         self.timeLogs = pd.concat([self.timeLogs, self.tradSelector.getTimeLogs()])
 
         trad_ranking = utils.loadRanking(rankingFile)
@@ -1684,10 +1762,14 @@ class NetworkActivitySelector(NetworkSelector):
         le = preprocessing.LabelEncoder()
         numeric_labels = le.fit_transform(labels)
 
-        #run ANOVA (if we have just 2 classes, ANOVA is equivalent to the t-test)
-        selector = SelectKBest(f_classif, k="all")
-        selector.fit_transform(dataset, numeric_labels)
-        pvals = pd.Series(selector.pvalues_, index = dataset.columns)
+        #run ANOVA (if we have just 2 classes, ANOVA is equivalent to the t-test), unless it can be computed from the statistics of preprocessing
+        anova = self.getAnova(dataset.columns)
+        if anova is None:
+            selector = SelectKBest(f_classif, k="all")
+            selector.fit_transform(dataset, numeric_labels)
+            pvals = pd.Series(selector.pvalues_, index = dataset.columns)
+        else:
+            pvals = pd.Series(anova[1].to_numpy(), index = dataset.columns)
 
         #for every pathway, get the average score from its member genes
         pathway_scores = {}
@@ -1729,7 +1811,7 @@ class FeatureMapper():
         super().__init__()
 
     @abc.abstractmethod
-    def mapFeatures(self, original_data, pathways):
+    def mapFeatures(self, original_data, pathways, statistics = None):
         """Abstract method.
            Implement this method when inheriting from this class.
            Carries out the actual feature mapping.
@@ -1738,6 +1820,8 @@ class FeatureMapper():
            :type original_data: :class:`pandas.DataFrame`
            :param pathways: dict of pathway names as keys and corresponding pathway :class:`pypath.Network` objects as values
            :type pathways: dict
+           :param statistics: statistics of the original data set's features computed during preprocessing (see :mod:`genestatistics`), None if not available.
+           :type statistics: :class:`pandas.DataFrame`
            :returns: the transformed data set with new feature values
            :rtype: :class:`pandas.DataFrame`
            """
@@ -1864,7 +1948,7 @@ class CORGSActivityMapper(FeatureMapper):
         return activityVector
 
 
-    def mapFeatures(self, original_data, pathways):
+    def mapFeatures(self, original_data, pathways, statistics = None):
         """Carries out the actual feature mapping.
            Follows the strategy described by Lee et al.: "Inferring Pathway Activity toward Precise Disease Classification"
            Identifies CORGS genes for every pathway: uses random search to find the minimal set of genes for which the pathway activity score is maximal.
@@ -1876,6 +1960,8 @@ class CORGSActivityMapper(FeatureMapper):
            :type original_data: :class:`pandas.DataFrame`
            :param pathways: dict of pathway names as keys and corresponding pathway :class:`pypath.Network` objects as values
            :type pathways: dict
+           :param statistics: statistics of the original data set's features computed during preprocessing (see :mod:`genestatistics`), None if not available.
+           :type statistics: :class:`pandas.DataFrame`
            :returns: the transformed data set with new feature values
            :rtype: :class:`pandas.DataFrame`
            """
@@ -1925,6 +2011,8 @@ class CORGSActivityMapper(FeatureMapper):
         # create final dataframe with pathways as features
         pathwaydata = pd.DataFrame.from_dict(data=pathways_scores)
         pathwaydata = pathwaydata.set_index("Unnamed: 0")
+        if utils.isCompactPrecision():
+            pathwaydata = pathwaydata.astype(datastore.COMPACT_TYPE)
         # add class labels to dataset
         mappedData = classLabels.merge(pathwaydata, right_index = True, left_index = True)
 
@@ -1961,21 +2049,26 @@ class PathwayActivityMapper(FeatureMapper):
             entries = correlations.loc[gene, containedNeighbors]
             return entries.mean()
 
-    def computeGeneVariances(self, data):
+    def computeGeneVariances(self, data, statistics = None):
         """Computes the variances for every gene across all samples.
 
            :param data: data set with expression values.
            :type data: :class:`pandas.DataFrame`
+           :param statistics: statistics of the data set's genes computed during preprocessing, which contain the variances already; None to compute them.
+           :type statistics: :class:`pandas.DataFrame`
            :returns: variance for every gene.
            :rtype: :class:`pandas.Series`
            """
+        genes = [str(gene) for gene in data.columns]
+        if statistics is not None and pd.Index(genes).isin(statistics.index).all():
+            return statistics.loc[genes, "variance"].to_numpy()
         selector = VarianceThreshold()
         selector.fit_transform(data)
         return selector.variances_
 
 
 
-    def mapFeatures(self, original_data, pathways):
+    def mapFeatures(self, original_data, pathways, statistics = None):
         """Executes the actual feature mapping procedure.
            A feature value  is the average of (for every gene in a pathway): (expression level weighted by gene variance and neighbor correlation score)
 
@@ -1983,6 +2076,8 @@ class PathwayActivityMapper(FeatureMapper):
            :type original_data: :class:`pandas.DataFrame`
            :param pathways: dict of pathway names as keys and corresponding pathway :class:`pypath.Network` objects as values
            :type pathways: dict
+           :param statistics: statistics of the original data set's features computed during preprocessing (see :mod:`genestatistics`), None if not available.
+           :type statistics: :class:`pandas.DataFrame`
            :returns: the transformed data set with new feature values
            :rtype: :class:`pandas.DataFrame`
            """
@@ -1992,7 +2087,7 @@ class PathwayActivityMapper(FeatureMapper):
         genes = self.getFeatures(original_data)
         samples = self.getSamples(original_data)
 
-        variances = self.computeGeneVariances(unlabeledData)
+        variances = self.computeGeneVariances(unlabeledData, statistics)
         vars = pd.Series(variances, genes)
         # compute correlation scores for genes
         correlations = unlabeledData.corr(method="pearson")
@@ -2040,6 +2135,8 @@ class PathwayActivityMapper(FeatureMapper):
         # create final dataframe with pathways as features
         pathwaydata = pd.DataFrame.from_dict(data=pathways_scores)
         pathwaydata = pathwaydata.set_index("Unnamed: 0")
+        if utils.isCompactPrecision():
+            pathwaydata = pathwaydata.astype(datastore.COMPACT_TYPE)
 
         #add class labels to dataset
         mappedData = classLabels.merge(pathwaydata, left_index = True, right_index = True)
@@ -0,0 +1,181 @@
+import os, warnings
+import numpy as np
+import pandas as pd
+from scipy import special
+import benchutils
+import datastore
+
+#statistics are stored next to the CSV file they were computed from, e.g. ready/data.stats for ready/data.csv (without .csv ending, so that they are not mistaken for a data set)
+STATS_SUFFIX = ".stats"
+FEATURE_COLUMN = "feature"
+#statistics over all samples of a feature; missing counts the samples without value (NaN), the others leave them out
+SUMMARY_COLUMNS = ["missing", "mean", "variance", "median"]
+#statistics over the samples of every class, stored as <statistic>_<class label>
+CLASS_STATISTICS = ["count", "sum", "sumSquares"]
+#number of features whose values are copied out of the data set at a time
+BLOCK_SIZE = 1000
+
+
+def getStatisticsPath(dataFile):
+    """Gets the location of the statistics file of a data set.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :return: absolute path to the statistics file.
+       :rtype: str
+       """
+    return os.path.splitext(dataFile)[0] + STATS_SUFFIX
+
+def isStatisticsAvailable(dataFile):
+    """Checks if a data set has a statistics file that is up to date, i.e. that was written after the data set's CSV file.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :return: true if the statistics can be read instead of computing them from the data set.
+       :rtype: bool
+       """
+    statsFile = getStatisticsPath(dataFile)
+    if not os.path.isfile(statsFile):
+        return False
+    return not os.path.isfile(dataFile) or os.path.getmtime(statsFile) >= os.path.getmtime(dataFile)
+
+def computeStatistics(data, compact = False):
+    """Computes the statistics of every feature of a data set: the number of missing values, mean, variance (as computed by scikit-learn's VarianceThreshold), and median over all samples, and (if labeled) the count, sum, and sum of squares of the values of every class.
+       The values are processed in blocks of features, so that memory-mapped data sets are not loaded as a whole.
+
+       :param data: the data set as read by :func:`datastore.loadDataset` (class labels in the first column if labeled).
+       :type data: :class:`pandas.DataFrame`
+       :param compact: whether to compute the statistics from the values in compact precision (float32), as feature selectors see them in that precision.
+       :type compact: bool
+       :return: the statistics with one row per feature.
+       :rtype: :class:`pandas.DataFrame`
+       """
+    labeled = len(data.columns) > 0 and data.columns[0] == datastore.LABEL_COLUMN
+    features = data.iloc[:, 1:] if labeled else data
+    labels = data[datastore.LABEL_COLUMN].astype(str).to_numpy() if labeled else None
+    classes = sorted(set(labels)) if labeled else []
+
+    blocks = []
+    with warnings.catch_warnings():
+        #features without any value have no mean, variance, and median
+        warnings.simplefilter("ignore", category = RuntimeWarning)
+        for start in range(0, features.shape[1], BLOCK_SIZE):
+            block = features.iloc[:, start:start + BLOCK_SIZE]
+            if compact:
+                values = block.to_numpy(dtype = datastore.COMPACT_TYPE).astype(np.float64)
+            else:
+                values = block.to_numpy(dtype = np.float64)
+            variance = np.nanvar(values, axis = 0)
+            if values.shape[0] > 0:
+                #constant features have a variance of 0, even if rounding errors say otherwise (as in VarianceThreshold)
+                variance[np.ptp(values, axis = 0) == 0] = 0
+            statistics = {"missing": np.isnan(values).sum(axis = 0), "mean": np.nanmean(values, axis = 0),
+                          "variance": variance, "median": np.nanmedian(values, axis = 0)}
+            for label in classes:
+                classValues = values[labels == label]
+                statistics["count_" + label] = (~np.isnan(classValues)).sum(axis = 0)
+                statistics["sum_" + label] = np.nansum(classValues, axis = 0)
+                statistics["sumSquares_" + label] = np.nansum(classValues ** 2, axis = 0)
+            blocks.append(pd.DataFrame(statistics, index = pd.Index([str(feature) for feature in block.columns], name = FEATURE_COLUMN)))
+
+    if not blocks:
+        columns = SUMMARY_COLUMNS + [statistic + "_" + label for label in classes for statistic in CLASS_STATISTICS]
+        return pd.DataFrame(columns = columns, index = pd.Index([], name = FEATURE_COLUMN))
+    return pd.concat(blocks)
+
+def writeStatistics(dataFile, data = None, compact = False):
+    """Computes the statistics of a data set (see :func:`computeStatistics`) and writes them next to its CSV file.
+       Only data sets whose features are all numeric have statistics.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :param data: the data set as read by :func:`datastore.loadDataset`, None to load it from dataFile (memory-mapped if it has a binary store).
+       :type data: :class:`pandas.DataFrame`
+       :param compact: whether to compute the statistics from the values in compact precision (float32).
+       :type compact: bool
+       :return: absolute path to the statistics file, or None if no statistics could be computed.
+       :rtype: str
+       """
+    if data is None:
+        data = datastore.loadDataset(dataFile, attach = True)
+    labeled = len(data.columns) > 0 and data.columns[0] == datastore.LABEL_COLUMN
+    features = data.iloc[:, 1:] if labeled else data
+    if not all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in features.dtypes):
+        benchutils.logWarning("WARNING: " + dataFile + " contains non-numeric features, compute no statistics.")
+        return None
+
+    statsFile = getStatisticsPath(dataFile)
+    #write into a temporary file first so that readers never see incomplete statistics
+    tmpFile = statsFile + "." + str(os.getpid()) + ".tmp"
+    try:
+        computeStatistics(data, compact).to_csv(tmpFile)
+        os.rename(tmpFile, statsFile)
+    except OSError as e:
+        if os.path.isfile(tmpFile):
+            os.remove(tmpFile)
+        benchutils.logWarning("WARNING: Could not write statistics of " + dataFile + ": " + str(e))
+        return None
+    return statsFile
+
+def loadStatistics(dataFile, features = None):
+    """Loads the statistics of a data set, if they are up to date.
+
+       :param dataFile: absolute path to the data set's CSV file.
+       :type dataFile: str
+       :param features: names of the features whose statistics to load (in this order), None to load the statistics of all features.
+       :type features: :class:`List` of str
+       :return: the statistics with feature names as index, or None if the data set has no up-to-date statistics or they do not cover all given features.
+       :rtype: :class:`pandas.DataFrame`
+       """
+    if not isStatisticsAvailable(dataFile):
+        return None
+    statsFile = getStatisticsPath(dataFile)
+    #feature names are kept as they are (e.g. "NA" or leading zeros), only empty statistics are missing values
+    header = list(pd.read_csv(statsFile, nrows = 0).columns)
+    statistics = pd.read_csv(statsFile, index_col = 0, dtype = {FEATURE_COLUMN: str}, keep_default_na = False,
+                             na_values = {column: [""] for column in header[1:]})
+    if features is None:
+        return statistics
+    features = [str(feature) for feature in features]
+    if not pd.Index(features).isin(statistics.index).all():
+        return None
+    return statistics.loc[features]
+
+def getClasses(statistics):
+    """Gets the class labels that have statistics.
+
+       :param statistics: statistics as loaded by :func:`loadStatistics`.
+       :type statistics: :class:`pandas.DataFrame`
+       :return: class labels, empty for unlabeled data sets.
+       :rtype: :class:`List` of str
+       """
+    return [column[len("count_"):] for column in statistics.columns if column.startswith("count_")]
+
+def computeAnova(statistics):
+    """Computes the ANOVA F-test of every feature and the class labels from the per-class statistics, like scikit-learn's f_classif does from the data set.
+
+       :param statistics: statistics as loaded by :func:`loadStatistics`.
+       :type statistics: :class:`pandas.DataFrame`
+       :return: F-value and p-value of every feature, or None if the data set is not labeled or has missing values (which f_classif does not accept).
+       :rtype: tuple(:class:`pandas.Series`, :class:`pandas.Series`)
+       """
+    classes = getClasses(statistics)
+    if not classes or statistics["missing"].any():
+        return None
+    counts = np.array([statistics["count_" + label].to_numpy(dtype = np.float64) for label in classes])
+    sums = np.array([statistics["sum_" + label].to_numpy(dtype = np.float64) for label in classes])
+    sumSquares = np.array([statistics["sumSquares_" + label].to_numpy(dtype = np.float64) for label in classes])
+
+    numSamples = counts.sum(axis = 0)
+    squareOfSums = sums.sum(axis = 0) ** 2
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        totalSquares = sumSquares.sum(axis = 0) - squareOfSums / numSamples
+        betweenSquares = (sums ** 2 / counts).sum(axis = 0) - squareOfSums / numSamples
+        withinSquares = totalSquares - betweenSquares
+        degreesBetween = len(classes) - 1
+        degreesWithin = numSamples - len(classes)
+        fValues = (betweenSquares / float(degreesBetween)) / (withinSquares / degreesWithin)
+    #the F-value of constant features is undefined (0/0), which rounding errors of the sums of squares would hide
+    fValues[statistics["variance"].to_numpy() == 0] = np.nan
+    pValues = special.fdtrc(degreesBetween, degreesWithin, fValues)
+    return pd.Series(fValues, index = statistics.index), pd.Series(pValues, index = statistics.index)
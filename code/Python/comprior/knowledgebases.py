@@ -6,6 +6,7 @@ from ontoma import OnToma
 import benchutils as util
 import logging
 import time, requests, json
+import os, pickle, hashlib
 from datetime import datetime
 from lxml.html import fromstring
 
@@ -586,6 +587,22 @@ class KnowledgeBaseFactory():#singleton class
     class __KnowledgeBaseFactory():
         def createKnowledgeBase(self, knowledgebase):
             """Creates knowledge base based on a given name.
+               Query results of the knowledge base are cached in the config's General-->queryCacheDir (see :class:`QueryCachingKnowledgeBase`).
+
+               :param knowledgebase: name of the knowledge base to be created.
+               :type knowledgebase: str
+               :return: knowledge base object.
+               :rtype: :class:`KnowledgeBase` or inheriting classes
+               """
+            kb = self.createKnowledgeBaseInstance(knowledgebase)
+            queryCacheDir = util.config["General"].get("queryCacheDir", "")
+            if queryCacheDir:
+                return QueryCachingKnowledgeBase(kb, queryCacheDir)
+            return kb
+
+        def createKnowledgeBaseInstance(self, knowledgebase):
+            """Creates the actual knowledge base object based on a given name.
+               Register new knowledge base implementations here.
 
                :param knowledgebase: name of the knowledge base to be created.
                :type knowledgebase: str
@@ -709,6 +726,78 @@ class KnowledgeBase:
         return self.hasGeneInformation
 
 
+class QueryCachingKnowledgeBase():
+    """Wraps a knowledge base and caches the results of its queries on disk.
+       Knowledge bases are created in every selector process, and several selectors (and in batch mode several data sets) query the same knowledge base with the same search terms.
+       With the cache, every query is only sent once; all other attributes and methods are taken from the wrapped knowledge base.
+       Results that cannot be stored (e.g. because they are not picklable) are not cached.
+
+       :param knowledgebase: the knowledge base whose queries to cache.
+       :type knowledgebase: :class:`KnowledgeBase` or inheriting classes
+       :param cacheDir: absolute path to the directory where query results are stored.
+       :type cacheDir: str
+       """
+    def __init__(self, knowledgebase, cacheDir):
+        self.knowledgebase = knowledgebase
+        self.cacheDir = cacheDir
+        util.createDirectory(cacheDir)
+        super().__init__()
+
+    def __getattr__(self, name):
+        #avoid endless recursion if the wrapped knowledge base is not set (yet), e.g. during unpickling
+        if name == "knowledgebase":
+            raise AttributeError(name)
+        return getattr(self.knowledgebase, name)
+
+    def query(self, queryName, labels):
+        """Returns the cached result of a query, or sends the query to the knowledge base and caches the result.
+
+           :param queryName: name of the knowledge base method to call, e.g. getRelevantGenes.
+           :type queryName: str
+           :param labels: list of labels, e.g. disease names, to query for.
+           :type labels: list of str
+           :return: the query result.
+           """
+        key = hashlib.sha256("\0".join([self.knowledgebase.getName(), queryName] + sorted(str(label) for label in labels)).encode("utf-8")).hexdigest()
+        cacheFile = os.path.join(self.cacheDir, key + ".pkl")
+        if os.path.isfile(cacheFile):
+            try:
+                with open(cacheFile, "rb") as f:
+                    result = pickle.load(f)
+                util.logDebug("DEBUG: Reuse cached " + queryName + " result of " + self.knowledgebase.getName())
+                return result
+            except Exception:
+                pass
+
+        result = getattr(self.knowledgebase, queryName)(labels)
+        #write into a temporary file first so that parallel processes never read incomplete results
+        tmpFile = cacheFile + "." + str(os.getpid())
+        try:
+            with open(tmpFile, "wb") as f:
+                pickle.dump(result, f)
+            os.rename(tmpFile, cacheFile)
+        except Exception as e:
+            util.logDebug("DEBUG: Could not cache " + queryName + " result of " + self.knowledgebase.getName() + ": " + str(e))
+            if os.path.isfile(tmpFile):
+                os.remove(tmpFile)
+        return result
+
+    def getRelevantGenes(self, labels):
+        """Get all genes that are associated to a list of labels from the cache or the knowledge base (see :meth:`KnowledgeBase.getRelevantGenes`).
+           """
+        return self.query("getRelevantGenes", labels)
+
+    def getGeneScores(self, labels):
+        """Get all genes and their association scores from the cache or the knowledge base (see :meth:`KnowledgeBase.getGeneScores`).
+           """
+        return self.query("getGeneScores", labels)
+
+    def getRelevantPathways(self, labels):
+        """Get all pathways related to a set of labels from the cache or the knowledge base (see :meth:`KnowledgeBase.getRelevantPathways`).
+           """
+        return self.query("getRelevantPathways", labels)
+
+
 class Enrichr(KnowledgeBase):
     """Special knowledge base not intended to be used by feature selection approaches.
        Instead, it is used for evaluation purposes to annotate and enrich rankings.
@@ -1,11 +1,14 @@
 import os
-import random, logging
-import multiprocessing
+import random, logging, traceback, copy, itertools, shutil, tempfile
 from matplotlib import colors as mcolors
 import benchutils
 import preprocessing
-import featureselection
 import evaluation
+import execution
+import caching
+import workqueue
+import datastore
+import genestatistics
 import argparse
 import pandas as pd
 #reset the enabled levels of loggers of other packages ERROR
@@ -17,26 +20,42 @@ logging.getLogger("sklearn").setLevel(logging.ERROR)
 
 
 MARKERS = [".", "o", "v", "^", "<", ">", "1", "s", "p", "P", "*", "h", "+", "x", "d", "D"]
+#evaluation parameters that can be swept without recomputing the rankings
+SWEEP_PARAMETERS = {"Evaluation": ["topKmin", "topKmax", "kfold"], "Classification": ["classifiers", "metrics"]}
+SWEEP_DIR = "sweep/"
 
 class Pipeline():
     """Class that executes the complete benchmarking pipeline.
 
        :param outputRootPath: absolute path to the overall output directory (will be extended by own folders by every :class:`evaluation.Evaluator`).
        :type outputRootPath: str
+       :param resume: whether an interrupted run is resumed.
+       :type resume: bool
        """
-    def __init__(self, userConfig):
-        self.outputRootPath = self.prepareExecution(userConfig)
+    def __init__(self, userConfig, resumeDir = None, keepCaches = False, dryRun = False):
+        self.resume = resumeDir is not None
+        self.outputRootPath = self.prepareExecution(userConfig, resumeDir, keepCaches, dryRun)
 
         super().__init__()
 
-    def prepareExecution(self, userConfig):
+    def prepareExecution(self, userConfig, resumeDir = None, keepCaches = False, dryRun = False):
         """Prepares the pipeline execution by loading the configuration file, clearing intermediate directories, and creating output directories.
 
            :param userConfig: absolute path to an additional user configuration file (config.ini will always be used by default) to overwrite default configuration.
            :type userConfig: str
+           :param resumeDir: absolute path to the output directory of an interrupted run that should be resumed, None to start a new run.
+           :type resumeDir: str
+           :param keepCaches: whether to keep knowledge base query results and identifier mappings of the former run (see :func:`runBatch`).
+           :type keepCaches: bool
+           :param dryRun: only load the configuration, without touching any directories (see :meth:`Pipeline.planExecution`).
+           :type dryRun: bool
+           :return: absolute path to the output directory of this run, None for a dry run.
+           :rtype: str
            """
         self.loadConfig(userConfig)
-        outputRootPath = self.prepareDirectories()
+        if dryRun:
+            return None
+        outputRootPath = self.prepareDirectories(resumeDir, keepCaches)
         benchutils.createLogger(outputRootPath)  # always put this after config loading as logger requires config parameter
 
         return outputRootPath
@@ -63,116 +82,98 @@ class Pipeline():
             output = self.outputRootPath + benchutils.getConfigValue("Evaluation", "preanalysis")
 
             #get all knowledgebases that are used by selected approaches
-            methods = []
-            methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "combining_methods").split(" "))
-            methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "modifying_methods").split(" "))
-            methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "network_methods").split(" "))
-            # remove empty values in case a methods list was empty
-            methods = [value for value in methods if value != ""]
-
-            knowledgebases =[method.split("_")[-1] for method in methods]
-
-            #get all searchterms from config and classlabels
-            alternativeTerms = benchutils.getConfigValue("Dataset", "alternativeSearchTerms").split(" ")
-            altTerms = []
-            for term in alternativeTerms:
-                if len(term) > 1:
-                    altTerms.append(term.replace("_", " "))
+            knowledgebases =[method.split("_")[-1] for method in self.getKnowledgeBaseMethods()]
+
             #only read in the first column with the class labels
             classLabels = pd.read_csv(labeledInputDataPath, usecols=[1], squeeze = True)
             searchTerms = list(classLabels.unique())
-            searchTerms.extend(altTerms)
+            searchTerms.extend(self.getAlternativeSearchTerms())
 
 
             dataEvaluator = evaluation.KnowledgeBaseEvaluator(output, knowledgebases, searchTerms)
             dataEvaluator.evaluate()
 
-    def runFeatureSelector(self, selector, datasetLocation, outputDir, loggingDir):
-        """Runs a given feature selector.
+    def getKnowledgeBaseMethods(self):
+        """Collects all feature selection methods from the config file that use a knowledge base.
 
-           :param selector: Any feature selector that inherits from :class:`featureselection.FeatureSelector`.
-           :type selector: :class:`featureselection.FeatureSelector`
-           :param datasetLocation: absolute path to the input data set (from which features should be selected).
-           :type datasetLocation: str
-           :param outputDir: absolute path to the selector's output directory (where ranking will be written to).
-           :type outputDir: str
+           :return: names of all combining, modifying, and network methods.
+           :rtype: :class:`List` of str
            """
-        selector.setParams(datasetLocation, outputDir, loggingDir)
-        selector.selectFeatures()
+        methods = []
+        methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "combining_methods").split(" "))
+        methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "modifying_methods").split(" "))
+        methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "network_methods").split(" "))
+        # remove empty values in case a methods list was empty
+        return [value for value in methods if value != ""]
 
-    def selectFeatures(self, datasetLocation):
-        """Creates and runs all feature selectors that are listed in the config file.
-           Applies parallelization by running as much feature selectors in parallel as stated in the config's General-->numCores attribute.
+    def getAlternativeSearchTerms(self):
+        """Collects the alternative search terms for knowledge bases from the config file.
 
-           :param datasetLocation: absolute path to the input data set (from which features should be selected).
-           :type datasetLocation: str
-           :param outputRootPath: absolute path to the selector's output directory (where ranking will be written to).
-           :type outputRootPath: str
-           :return: absolute path to directory that contains generated feature rankings.
-           :rtype: str
+           :return: alternative search terms (with spaces instead of underscores).
+           :rtype: :class:`List` of str
            """
-        outputDir = self.outputRootPath + benchutils.getConfigValue("Gene Selection - General", "outputDirectory")
-        # create directory for time logging files
-        loggingDir = self.outputRootPath + "timeLogs/"
-        benchutils.createDirectory(loggingDir)
+        altTerms = []
+        for term in benchutils.getConfigValue("Dataset", "alternativeSearchTerms").split(" "):
+            if len(term) > 1:
+                altTerms.append(term.replace("_", " "))
+        return altTerms
 
+    def getSelectionMethods(self):
+        """Collects all feature selection methods that are listed in the config file.
+
+           :return: names of all selection methods.
+           :rtype: :class:`List` of str
+           """
         methods = []
         methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "traditional_methods").split(" "))
         methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "combining_methods").split(" "))
         methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "modifying_methods").split(" "))
         methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "network_methods").split(" "))
         # remove empty values in case a methods list was empty
-        methods = [value for value in methods if value != ""]
+        return [value for value in methods if value != ""]
 
-        selectorFactory = featureselection.FeatureSelectorFactory()
+    def getNumCores(self):
+        """Reads the number of processes to run in parallel from the config's General-->numCores attribute.
 
+           :return: number of cores to use.
+           :rtype: int
+           """
         try:
-            numCores = int(benchutils.getConfigValue("General", "numCores"))
+            return int(benchutils.getConfigValue("General", "numCores"))
         except:
             benchutils.logError("ERROR: numCores must be an integeger value. Exit program.")
             exit()
 
-        rounds = int(len(methods) / numCores)
-        #walk through every method and create a gene selector
-        #parallelize, but only run at max as much threads as cpus in parallel, also to avoid running out of space
-        for j in range(rounds):
-            # create threadpool
-            threads = [None] * numCores
-            for i in range(numCores):
-                selector = selectorFactory.createFeatureSelector(methods[(j * numCores) + i])
-                self.runFeatureSelector(selector, datasetLocation, outputDir, loggingDir)
-                #spawn new process for actual gene selection
-                #util.logDebug("spawn process number " + str((j * numCores) + i) + ": " + methods[(j * numCores) + i])
-                #p = multiprocessing.Process(target=self.runFeatureSelector, args=(selector, datasetLocation, outputDir, loggingDir))
-                #threads[i] = p
-                #p.start()
-
-                # wait for all threads to finish
-            #for thr in threads:
-                #util.logDebug("join thread...")
-                #thr.join()
-                ##util.logDebug("... finished")
-
-        #if there are remaining threads, start them
-        remaining_threads = len(methods) - (rounds * numCores)
-        #util.logDebug("remaining threads: " + str(remaining_threads))
-        if remaining_threads > 0:
-            # create threadpool
-            threads = [None] * remaining_threads
-            for i in range(1, remaining_threads + 1):
-                selector = selectorFactory.createFeatureSelector(methods[len(methods) - i])
-                #util.logDebug("spawn process number " + str(len(methods) - i) + ": " + methods[len(methods) - i])
-                self.runFeatureSelector(selector, datasetLocation, outputDir, loggingDir)
-                #spawn new process for actual gene selection
-                #p = multiprocessing.Process(target=self.runFeatureSelector, args=(selector, datasetLocation, outputDir, loggingDir))
-                #threads[i-1] = p
-                #p.start()
-
-                # wait for all threads to finish
-            #for thr in threads:
-                #util.logDebug("join thread...")
-                #thr.join()
-                #util.logDebug("... finished")
+    def getMemoryBudget(self):
+        """Reads the memory budget for all parallel processes from the config's General-->memoryBudget attribute.
+
+           :return: memory budget in MB, 0 if unlimited.
+           :rtype: int
+           """
+        try:
+            return int(benchutils.getConfigValue("General", "memoryBudget"))
+        except ValueError:
+            benchutils.logError("ERROR: memoryBudget must be an integer value. Exit program.")
+            exit()
+
+    def selectFeatures(self, datasetLocation):
+        """Creates and runs all feature selectors that are listed in the config file.
+           Applies parallelization by running as much feature selectors in parallel as stated in the config's General-->numCores attribute.
+           Every selector runs in its own process (see :class:`execution.SelectorExecutor`); selectors that fail are logged and skipped.
+
+           :param datasetLocation: absolute path to the input data set (from which features should be selected).
+           :type datasetLocation: str
+           :return: absolute path to directory that contains generated feature rankings.
+           :rtype: str
+           """
+        outputDir = self.outputRootPath + benchutils.getConfigValue("Gene Selection - General", "outputDirectory")
+        # create directory for time logging files
+        loggingDir = self.outputRootPath + "timeLogs/"
+        benchutils.createDirectory(loggingDir)
+
+        #run at max as much selectors in parallel as cores are available, also to avoid running out of space
+        executor = execution.SelectorExecutor(self.getNumCores(), datasetLocation, outputDir, loggingDir, self.outputRootPath, self.getMemoryBudget())
+        executor.run(self.getSelectionMethods())
 
         return outputDir
 
@@ -222,89 +223,532 @@ class Pipeline():
 
         return markers
 
-    def evaluateBiomarkers(self, inputDir, dataset, rankingsDir):
-        """Covers the evaluation phase.
-           Processes input data to only contain the top k selected features per feature selection approach via the :class:`evaluation.AttributeRemover`.
-           Runs all selected evaluation strategies that cover assessment of rankings (:class:`evaluation.RankingsEvaluator`), annotations(:class:`evaluation.AnnotationEvaluator`), and classification performance (:class:`evaluation.ClassificationEvaluator`).
-           If selected, also conducts cross-validation across data sets with :class:`evaluation.CrossEvaluator`.
+    def evaluateRankings(self, dataset, rankingsDir, methodColors):
+        """Runs the :class:`evaluation.RankingsEvaluator` on all rankings that were created.
 
-           :param inputDir: absolute path to the directory where input data sets are located (for :class:`evaluation.AttributeRemover`).
-           :type inputDir: str
-           :param dataset: absolute file path to the input data set (from which features should be selected).
+           :param dataset: absolute file path to the mapped input data set.
            :type dataset: str
            :param rankingsDir: absolute path to the directory that contains all rankings.
            :type rankingsDir: str
+           :param methodColors: color for every method.
+           :type methodColors: dict
            """
+        rankingsEvaluator = evaluation.RankingsEvaluator(rankingsDir, dataset,
+                                                         self.outputRootPath + benchutils.getConfigValue("Rankings", "metricsDir"), methodColors)
+        rankingsEvaluator.evaluate()
 
-        methods = []
-        methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "traditional_methods").split(" "))
-        methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "combining_methods").split(" "))
-        methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "modifying_methods").split(" "))
-        methods.extend(benchutils.getConfigValue("Gene Selection - Methods", "network_methods").split(" "))
-        # remove empty values in case a methods list was empty
-        methods = [value for value in methods if value != ""]
+    def createAnnotationEvaluator(self, rankingsDir, methodColors):
+        """Creates the :class:`evaluation.AnnotationEvaluator` that is shared by the per-method annotation and the overlap computation.
 
-        methodColors = self.assignColors(methods)
-        methodMarkers = self.assignMarkers(methods)
+           :param rankingsDir: absolute path to the directory that contains all rankings.
+           :type rankingsDir: str
+           :param methodColors: color for every method.
+           :type methodColors: dict
+           :return: the annotation evaluator.
+           :rtype: :class:`evaluation.AnnotationEvaluator`
+           """
+        return evaluation.AnnotationEvaluator(rankingsDir, self.outputRootPath + benchutils.getConfigValue("Rankings", "annotationsDir"), methodColors)
 
-        #################################
-        ### RANKINGS EVALUATION ###
-        #################################
+    def annotateRanking(self, method, rankingsDir, methodColors):
+        """Annotates the ranking of a single method via :meth:`evaluation.AnnotationEvaluator.annotateMethod`.
 
-        rankingsEvaluator = evaluation.RankingsEvaluator(rankingsDir, dataset,
-                                                         self.outputRootPath + benchutils.getConfigValue("Rankings", "metricsDir"), methodColors)
-        rankingsEvaluator.evaluate()
+           :param method: selection method whose ranking to annotate.
+           :type method: str
+           :param rankingsDir: absolute path to the directory that contains all rankings.
+           :type rankingsDir: str
+           :param methodColors: color for every method.
+           :type methodColors: dict
+           """
+        self.createAnnotationEvaluator(rankingsDir, methodColors).annotateMethod(method)
 
-        annotationEvaluator = evaluation.AnnotationEvaluator(rankingsDir, self.outputRootPath + benchutils.getConfigValue("Rankings",
-                                                                                                            "annotationsDir"), methodColors)
-        annotationEvaluator.evaluate()
-
-        #################################
-        ### CLASSIFICATION EVALUATION ###
-        #################################
-        #attributeRemover = evaluation.AttributeRemover(inputDir,
-        #                                               self.outputRootPath + benchutils.getConfigValue(
-        #                                                   "Gene Selection - General",
-        #                                                   "outputDirectory"),
-        #                                               benchutils.getConfigValue("Evaluation", "topKmax"),
-        #                                               self.outputRootPath + benchutils.getConfigValue("Evaluation",
-        #                                                                                              "reducedDataset"))
-        #attributeRemover.removeUnusedAttributes()
+    def evaluateAnnotations(self, rankingsDir, methodColors):
+        """Computes annotation overlaps across all methods via :meth:`evaluation.AnnotationEvaluator.evaluateOverlaps`.
 
-        if benchutils.getConfigBoolean("Evaluation", "enableClassification"):
+           :param rankingsDir: absolute path to the directory that contains all rankings.
+           :type rankingsDir: str
+           :param methodColors: color for every method.
+           :type methodColors: dict
+           """
+        self.createAnnotationEvaluator(rankingsDir, methodColors).evaluateOverlaps()
+
+    def createClassificationEvaluator(self, crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers):
+        """Creates the :class:`evaluation.ClassificationEvaluator` for either the input data set or the cross-validation data set.
+
+           :param crossEvaluation: whether to evaluate on the cross-validation data set instead of the input data set.
+           :type crossEvaluation: bool
+           :param inputDir: absolute path to the directory where the input data sets are located.
+           :type inputDir: str
+           :param rankingsDir: absolute path to the directory that contains all rankings.
+           :type rankingsDir: str
+           :param methodColors: color for every method.
+           :type methodColors: dict
+           :param methodMarkers: marker for every method.
+           :type methodMarkers: dict
+           :return: the classification evaluator.
+           :rtype: :class:`evaluation.ClassificationEvaluator`
+           """
+        if crossEvaluation:
+            datasetDir = benchutils.getConfigValue("General", "crossVal_preprocessing") + "ready/"
+            outputDir = self.outputRootPath + benchutils.getConfigValue("Classification", "crossEvaluationDir")
+            reducedDatasetDir = outputDir + "/reducedData/"
+            metricsDir = outputDir + "/classification/"
+        else:
             datasetDir = inputDir
-            rankingsDir = self.outputRootPath + benchutils.getConfigValue("Gene Selection - General","outputDirectory")
             reducedDatasetDir = self.outputRootPath + benchutils.getConfigValue("Evaluation", "reducedDataset")
             metricsDir = self.outputRootPath + benchutils.getConfigValue("Classification", "metricsDir")
-            classificationEvaluator = evaluation.ClassificationEvaluator(datasetDir, rankingsDir, reducedDatasetDir, metricsDir, methodColors, methodMarkers)
 
-            #classificationEvaluator = evaluation.ClassificationEvaluator(
-            #    self.outputRootPath + benchutils.getConfigValue("Evaluation", "reducedDataset"),
-            #    self.outputRootPath + benchutils.getConfigValue("Classification", "metricsDir"), methodColors)
-            classificationEvaluator.evaluate()
+        return evaluation.ClassificationEvaluator(datasetDir, rankingsDir, reducedDatasetDir, metricsDir, methodColors, methodMarkers)
 
-        ##########################################
-        ### CROSS-VALIDATION ON SECOND DATASET ###
-        ##########################################
+    def classifyRanking(self, method, crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers):
+        """Runs the classification for a single method via :meth:`evaluation.ClassificationEvaluator.evaluateMethod`.
+           See :meth:`Pipeline.createClassificationEvaluator` for the remaining parameters.
+
+           :param method: selection method whose ranking to evaluate.
+           :type method: str
+           """
+        self.createClassificationEvaluator(crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers).evaluateMethod(method)
+
+    def drawClassificationPlots(self, crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers):
+        """Creates the classification plots across all methods via :meth:`evaluation.ClassificationEvaluator.drawPlots`.
+           See :meth:`Pipeline.createClassificationEvaluator` for the parameters.
+           """
+        self.createClassificationEvaluator(crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers).drawPlots()
+
+    def scheduleStages(self, datasetLocation, mappedLocation, sweepPoints = None, coordinator = None):
+        """Creates a :class:`execution.StageScheduler` containing all stages that follow the preprocessing.
+           Data set and knowledge base evaluations do not depend on feature selection and overlap with it.
+           Every feature selector is a task on its own, and the per-method annotation and classification evaluation start as soon as the method's ranking is available.
+           Feature selectors are started by descending estimated runtime (see :class:`execution.RuntimeHistory`), so that long running selectors do not start last.
+           Evaluations across all methods (ranking metrics, annotation overlaps, classification plots) wait until all tasks they aggregate have finished, whether successfully or not.
+           In a parameter sweep, all evaluation tasks are added once per sweep point and evaluate the same rankings.
+
+           :param datasetLocation: absolute path to the analysis-ready input data set.
+           :type datasetLocation: str
+           :param mappedLocation: absolute path to the mapped input data set.
+           :type mappedLocation: str
+           :param sweepPoints: name and config values of every sweep point (see :meth:`Pipeline.getSweepPoints`), None or empty for a run without sweep.
+           :type sweepPoints: :class:`List` of tuple(str, :class:`List` of tuple(str, str, str))
+           :param coordinator: coordinator of remote workers that feature selection and classification tasks are distributed to, None to run all tasks locally.
+           :type coordinator: :class:`workqueue.Coordinator`
+           :return: the scheduler containing all tasks.
+           :rtype: :class:`execution.StageScheduler`
+           """
+        inputDir = os.path.dirname(datasetLocation)
+        rankingsDir = self.outputRootPath + benchutils.getConfigValue("Gene Selection - General", "outputDirectory")
+        # create directory for time logging files
+        loggingDir = self.outputRootPath + "timeLogs/"
+        benchutils.createDirectory(loggingDir)
+
+        methods = self.getSelectionMethods()
+        methodColors = self.assignColors(methods)
+        methodMarkers = self.assignMarkers(methods)
+
+        scheduler = execution.StageScheduler(self.getNumCores(), self.outputRootPath, self.outputRootPath + "completedTasks.txt", self.getMemoryBudget(), coordinator)
+        scheduler.addTask("evaluateInputData", self.evaluateInputData, (datasetLocation,))
+        scheduler.addTask("evaluateKnowledgeBases", self.evaluateKnowledgeBases, (datasetLocation,))
+
+        #record the data set shape so that later runs can scale this run's runtimes, and start the longest running selectors first
+        shape = benchutils.getDatasetShape(datasetLocation)
+        pd.DataFrame([shape], columns = ["samples", "features"]).to_csv(self.outputRootPath + execution.RuntimeHistory.SHAPE_FILE, index = False, sep = "\t")
+        runtimes = execution.RuntimeHistory(benchutils.getConfigValue("General", "resultsDir")).estimateRuntimes(methods, shape)
+        #only run as many selectors in parallel as fit into the memory budget
+        memory = execution.MemoryHistory(benchutils.getConfigValue("General", "resultsDir")).estimateMemory(methods, shape)
+
+        #input data sets that selectors read, and files they write (for running them on remote workers)
+        selectionInputs = [datasetLocation]
         if benchutils.getConfigBoolean("Evaluation", "enableCrossEvaluation"):
-            crossValFileDir = benchutils.getConfigValue("General", "crossVal_preprocessing") + "ready/"
-            outputDir = self.outputRootPath + benchutils.getConfigValue("Classification", "crossEvaluationDir")
-            reducedDatasetDir = outputDir + "/reducedData/"
-            resultsDir = outputDir + "/classification/"
+            selectionInputs.append(benchutils.getConfigValue("General", "crossVal_preprocessing") + "ready/" + os.path.basename(benchutils.getConfigValue("Evaluation", "crossEvaluationData")))
+
+        for method in methods:
+            # feature extraction methods additionally write their mapped data sets next to the input data sets
+            selectionOutputs = [rankingsDir + method + ".csv", loggingDir + method + ".csv"]
+            selectionOutputs.extend(os.path.splitext(input)[0] + "_" + method + ".csv" for input in selectionInputs)
+            # cancel hanging selectors so that the remaining ones can still be evaluated
+            wallTime, cpuTime = execution.getSelectorLimits(method)
+            scheduler.addTask("select_" + method, execution.runSelector, (method, datasetLocation, rankingsDir, loggingDir),
+                              priority = runtimes[method], memory = memory[method], inputs = selectionInputs, outputs = selectionOutputs,
+                              wallTime = wallTime, cpuTime = cpuTime)
+
+        if sweepPoints:
+            #rankings do not depend on the swept evaluation parameters, so they are computed once and evaluated for every point
+            for sweepPoint in sweepPoints:
+                self.addEvaluationTasks(scheduler, methods, inputDir, rankingsDir, mappedLocation, methodColors, methodMarkers, sweepPoint)
+        else:
+            self.addEvaluationTasks(scheduler, methods, inputDir, rankingsDir, mappedLocation, methodColors, methodMarkers)
+
+        return scheduler
+
+    def addEvaluationTasks(self, scheduler, methods, inputDir, rankingsDir, mappedLocation, methodColors, methodMarkers, sweepPoint = None):
+        """Adds the per-method and across-method evaluation tasks to the scheduler (see :meth:`Pipeline.scheduleStages`).
+           For a point of a parameter sweep, the tasks are named <point name>/<task name>, write their results to the point's own output directory, and use the point's config values.
+
+           :param scheduler: the scheduler that already contains the feature selection tasks.
+           :type scheduler: :class:`execution.StageScheduler`
+           :param methods: names of all selection methods.
+           :type methods: :class:`List` of str
+           :param inputDir: absolute path to the directory where the analysis-ready input data set is located.
+           :type inputDir: str
+           :param rankingsDir: absolute path to the directory that contains all rankings.
+           :type rankingsDir: str
+           :param mappedLocation: absolute path to the mapped input data set.
+           :type mappedLocation: str
+           :param methodColors: color for every method.
+           :type methodColors: dict
+           :param methodMarkers: marker for every method.
+           :type methodMarkers: dict
+           :param sweepPoint: name and config values of the sweep point to evaluate (see :meth:`Pipeline.getSweepPoints`), None for a run without sweep.
+           :type sweepPoint: tuple(str, :class:`List` of tuple(str, str, str))
+           """
+        if sweepPoint is None:
+            pipeline = self
+            prefix = ""
+        else:
+            pipeline = self.createSweepPipeline(sweepPoint[0])
+            prefix = sweepPoint[0] + "/"
+
+        annotationTasks = []
+        for method in methods:
+            annotationTasks.append(prefix + "annotate_" + method)
+            self.addSweepTask(scheduler, sweepPoint, "annotate_" + method, pipeline.annotateRanking, (method, rankingsDir, methodColors),
+                              dependencies = ["select_" + method])
+
+        classificationTypes = []
+        if benchutils.getConfigBoolean("Evaluation", "enableClassification"):
+            classificationTypes.append(("classify_", False))
+        if benchutils.getConfigBoolean("Evaluation", "enableCrossEvaluation"):
+            classificationTypes.append(("crossClassify_", True))
+
+        metrics = self.getSweepValue(sweepPoint, "Classification", "metrics")
+
+        for taskType, crossEvaluation in classificationTypes:
+            classificationEvaluator = pipeline.createClassificationEvaluator(crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers)
+            for method in methods:
+                #the classification reads all data sets of its input directory and the method's ranking, and writes reduced data sets and one file per metric
+                inputs = [os.path.join(classificationEvaluator.input, "*"), rankingsDir + method + ".csv"]
+                outputs = [classificationEvaluator.intermediateDir + method + "/*"]
+                outputs.extend(classificationEvaluator.output + method + "_" + metric + ".csv" for metric in metrics.split())
+                self.addSweepTask(scheduler, sweepPoint, taskType + method, pipeline.classifyRanking,
+                                  (method, crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers),
+                                  dependencies = ["select_" + method], inputs = inputs, outputs = outputs)
+
+        # evaluations across all methods
+        self.addSweepTask(scheduler, sweepPoint, "evaluateRankings", pipeline.evaluateRankings, (mappedLocation, rankingsDir, methodColors),
+                          waitFor = ["select_" + method for method in methods])
+        self.addSweepTask(scheduler, sweepPoint, "evaluateAnnotations", pipeline.evaluateAnnotations, (rankingsDir, methodColors),
+                          waitFor = annotationTasks)
+        for taskType, crossEvaluation in classificationTypes:
+            self.addSweepTask(scheduler, sweepPoint, taskType + "plots", pipeline.drawClassificationPlots,
+                              (crossEvaluation, inputDir, rankingsDir, methodColors, methodMarkers),
+                              waitFor = [prefix + taskType + method for method in methods])
+
+
+    def addSweepTask(self, scheduler, sweepPoint, name, function, args, dependencies = (), waitFor = (), inputs = (), outputs = ()):
+        """Adds an evaluation task to the scheduler.
+           Tasks of a sweep point are prefixed with the point's name and run with the point's config values (see :func:`runSweepTask`), dependencies on feature selection tasks are shared by all points.
+
+           :param scheduler: the scheduler to add the task to.
+           :type scheduler: :class:`execution.StageScheduler`
+           :param sweepPoint: name and config values of the sweep point, None for a run without sweep.
+           :type sweepPoint: tuple(str, :class:`List` of tuple(str, str, str))
+           :param name: task name without the point's prefix.
+           :type name: str
+           See :meth:`execution.StageScheduler.addTask` for the remaining parameters.
+           """
+        if sweepPoint is None:
+            scheduler.addTask(name, function, args, dependencies = dependencies, waitFor = waitFor, inputs = inputs, outputs = outputs)
+        else:
+            pointName, overrides = sweepPoint
+            scheduler.addTask(pointName + "/" + name, runSweepTask, (overrides, function, args), dependencies = dependencies, waitFor = waitFor,
+                              inputs = inputs, outputs = outputs)
+
+    def findSweepParameter(self, option):
+        """Finds the config parameter that is referenced by an option of the config's Sweep section.
 
-            robustnessEvaluator = evaluation.ClassificationEvaluator(crossValFileDir, rankingsDir, reducedDatasetDir, resultsDir, methodColors, methodMarkers)
-            robustnessEvaluator.evaluate()
+           :param option: option name in the format <category>.<parameter>, e.g. Evaluation.topKmax (case-insensitive).
+           :type option: str
+           :return: category and name of the config parameter.
+           :rtype: tuple(str, str)
+           """
+        for category, identifiers in SWEEP_PARAMETERS.items():
+            for identifier in identifiers:
+                if option.lower() == (category + "." + identifier).lower():
+                    return category, identifier
+        supported = [category + "." + identifier for category, identifiers in SWEEP_PARAMETERS.items() for identifier in identifiers]
+        raise Exception("Sweep parameter " + option + " is not supported, only " + ", ".join(supported) + " can be swept. Stop here.")
+
+    def getSweepPoints(self):
+        """Expands the parameter grid of the config's Sweep section.
+           Every option lists the values for one evaluation parameter, separated by |, e.g. Evaluation.topKmax = 10 | 20 | 50. Every combination of values is a sweep point.
+
+           :return: name and config values (category, parameter, value) of every sweep point, an empty list if no parameters are swept.
+           :rtype: :class:`List` of tuple(str, :class:`List` of tuple(str, str, str))
+           """
+        grid = []
+        for option, values in benchutils.getConfig("Sweep").items():
+            category, identifier = self.findSweepParameter(option)
+            values = [value.strip() for value in values.split("|") if value.strip() != ""]
+            grid.append([(category, identifier, value) for value in values])
+        if not grid:
+            return []
+
+        selectKgenes = int(benchutils.getConfigValue("Gene Selection - General", "selectKgenes"))
+        sweepPoints = []
+        for combination in itertools.product(*grid):
+            pointName = "_".join(identifier + "-" + value.replace(" ", "+") for _, identifier, value in combination)
+            sweepPoint = (pointName, list(combination))
+            topKmin = int(self.getSweepValue(sweepPoint, "Evaluation", "topKmin"))
+            topKmax = int(self.getSweepValue(sweepPoint, "Evaluation", "topKmax"))
+            if selectKgenes < topKmax or topKmax < topKmin:
+                raise Exception("Sweep values topKmin=" + str(topKmin) + " and topKmax=" + str(topKmax) + " do not fit (topKmin <= topKmax <= selectKgenes). Stop here.")
+            sweepPoints.append(sweepPoint)
+        return sweepPoints
+
+    def getSweepValue(self, sweepPoint, category, identifier):
+        """Gets the value of a config parameter for a sweep point.
+
+           :param sweepPoint: name and config values of the sweep point, None for a run without sweep.
+           :type sweepPoint: tuple(str, :class:`List` of tuple(str, str, str))
+           :param category: the parameter's category name.
+           :type category: str
+           :param identifier: the parameter name.
+           :type identifier: str
+           :return: the sweep point's value if the parameter is swept, the config value otherwise.
+           :rtype: str
+           """
+        if sweepPoint is not None:
+            for pointCategory, pointIdentifier, value in sweepPoint[1]:
+                if (pointCategory, pointIdentifier) == (category, identifier):
+                    return value
+        return benchutils.getConfigValue(category, identifier)
+
+    def countClassifierFits(self, sweepPoint = None):
+        """Counts the reduced data sets and trained classifiers of the classification of a single method.
+           The classification creates one reduced data set for every number of features from topKmin to topKmax, and evaluates every classifier on every reduced data set with k-fold cross-validation.
+
+           :param sweepPoint: name and config values of the sweep point, None for a run without sweep.
+           :type sweepPoint: tuple(str, :class:`List` of tuple(str, str, str))
+           :return: number of reduced data sets and number of classifier fits.
+           :rtype: tuple(int, int)
+           """
+        topKmin = int(self.getSweepValue(sweepPoint, "Evaluation", "topKmin"))
+        topKmax = int(self.getSweepValue(sweepPoint, "Evaluation", "topKmax"))
+        kfold = int(self.getSweepValue(sweepPoint, "Evaluation", "kfold"))
+        classifiers = self.getSweepValue(sweepPoint, "Classification", "classifiers").split()
+        reducedDatasets = max(0, topKmax - topKmin + 1)
+        return reducedDatasets, reducedDatasets * len(classifiers) * kfold
+
+    def createSweepPipeline(self, pointName):
+        """Creates a copy of the pipeline that writes its evaluation results to the output directory of a sweep point, sweep/<point name>/.
+
+           :param pointName: name of the sweep point.
+           :type pointName: str
+           :return: the pipeline copy.
+           :rtype: :class:`Pipeline`
+           """
+        pipeline = copy.copy(self)
+        pipeline.outputRootPath = self.outputRootPath + SWEEP_DIR + pointName + "/"
+        self.createEvaluationDirectories(pipeline.outputRootPath)
+        return pipeline
+
+    def compareSweepPoints(self, sweepPoints):
+        """Collects the classification results of all sweep points into one table, sweep/comparison.csv.
+           For every point, method, and metric, the table contains the average metric value over all numbers of features, the best value, and the number of features it was reached with.
+
+           :param sweepPoints: name and config values of every sweep point (see :meth:`Pipeline.getSweepPoints`).
+           :type sweepPoints: :class:`List` of tuple(str, :class:`List` of tuple(str, str, str))
+           :return: absolute path to the comparison table.
+           :rtype: str
+           """
+        evaluationDirs = [("classification", benchutils.getConfigValue("Classification", "metricsDir")),
+                          ("crossEvaluation", benchutils.getConfigValue("Classification", "crossEvaluationDir") + "classification/")]
+        rows = []
+        for pointName, overrides in sweepPoints:
+            pointValues = {category + "." + identifier: value for category, identifier, value in overrides}
+            for evaluationType, metricsDir in evaluationDirs:
+                metricsDir = self.outputRootPath + SWEEP_DIR + pointName + "/" + metricsDir
+                if not os.path.isdir(metricsDir):
+                    continue
+                for file in sorted(os.listdir(metricsDir)):
+                    if not file.endswith(".csv"):
+                        continue
+                    #metrics files are named <method>_<metric>.csv, method names may contain underscores themselves
+                    method, metric = file[:-len(".csv")].rsplit("_", 1)
+                    results = pd.read_csv(metricsDir + file, sep = "\t")
+                    if results.empty:
+                        continue
+                    best = results["average"].idxmax()
+                    row = {"point": pointName, "evaluation": evaluationType, "method": method, "metric": metric,
+                           "meanAverage": results["average"].mean(), "bestAverage": results["average"][best],
+                           "bestNumFeatures": results["#ofAttributes"][best]}
+                    row.update(pointValues)
+                    rows.append(row)
+
+        parameterColumns = [category + "." + identifier for category, identifier, _ in sweepPoints[0][1]]
+        columns = ["point"] + parameterColumns + ["evaluation", "method", "metric", "meanAverage", "bestAverage", "bestNumFeatures"]
+        comparisonFile = self.outputRootPath + SWEEP_DIR + "comparison.csv"
+        pd.DataFrame(rows, columns = columns).to_csv(comparisonFile, index = False, sep = "\t")
+        return comparisonFile
+
+    def isClassificationComplete(self, method, crossEvaluation):
+        """Checks if the classification of a method has written complete metrics files, i.e. one line for every reduced data set.
+
+           :param method: selection method.
+           :type method: str
+           :param crossEvaluation: whether to check the classification on the cross-validation data set.
+           :type crossEvaluation: bool
+           :return: true if the metrics files for all metrics are complete.
+           :rtype: bool
+           """
+        classificationEvaluator = self.createClassificationEvaluator(crossEvaluation, None, None, {}, {})
+        reducedDir = classificationEvaluator.intermediateDir + method + "/"
+        if not os.path.isdir(reducedDir):
+            return False
+        topKmin = int(benchutils.getConfigValue("Evaluation", "topKmin"))
+        topKmax = int(benchutils.getConfigValue("Evaluation", "topKmax"))
+        numReducedSets = len([k for k in range(topKmin, topKmax + 1) if os.path.isfile(reducedDir + "top" + str(k) + "features_" + method + ".csv")])
+
+        for metric in benchutils.getConfigValue("Classification", "metrics").split():
+            metricsFile = classificationEvaluator.output + method + "_" + metric + ".csv"
+            if not os.path.isfile(metricsFile):
+                return False
+            with open(metricsFile, "r") as f:
+                # subtract header line
+                if sum(1 for line in f) - 1 < numReducedSets:
+                    return False
+        return True
+
+    def isTaskComplete(self, name, journaled):
+        """Checks if a task was already completed by the run that is resumed.
+           Feature selectors are completed if their ranking and time log exist, classifications if their metrics files are complete.
+           All other tasks are completed if they are listed in the run's journal.
+
+           :param name: task name (see :meth:`Pipeline.scheduleStages`).
+           :type name: str
+           :param journaled: names of all tasks in the journal of the resumed run.
+           :type journaled: set of str
+           :return: true if the task does not need to run again.
+           :rtype: bool
+           """
+        if name.startswith("select_"):
+            method = name[len("select_"):]
+            rankingFile = self.outputRootPath + benchutils.getConfigValue("Gene Selection - General", "outputDirectory") + method + ".csv"
+            timeLogFile = self.outputRootPath + "timeLogs/" + method + ".csv"
+            return os.path.isfile(rankingFile) and os.path.isfile(timeLogFile)
+        if name.startswith("classify_") and name != "classify_plots":
+            return self.isClassificationComplete(name[len("classify_"):], False)
+        if name.startswith("crossClassify_") and name != "crossClassify_plots":
+            return self.isClassificationComplete(name[len("crossClassify_"):], True)
+        return name in journaled
 
     def preprocessData(self):
         """Preprocesses the input data set specified in the config file.
+           Results of every preprocessing step are cached (see :class:`caching.StageCache`), so steps with unchanged input and parameters are skipped in subsequent runs.
            Preprocessing consists of a) transposing the data so that features are in the columns (if necessary), b) mapping the features to the right format (if necessary), c) labeling the data with the user-specified metadata attribute, d) filtering features or samples that have too few information (optional, specified via config), and finally e) putting the analysis-ready data set to the right location for further processing.
+           If inMemory is enabled in the config, the steps pass the data set to each other in memory (see :class:`preprocessing.PreprocessingChain`), and only the mapped and the analysis-ready data set are written.
+           If fused is enabled in the config, all steps run in a single pass over the input file (see :class:`preprocessing.FusedPreprocessor`), and only the analysis-ready data set is written.
+           If cross-validation is enabled, the data set for cross-validation is mapped at the same time in a second process, as both data sets are independent until feature selection. Identifier mappings of both data sets are retrieved beforehand in a single query, unless both mapped data sets are cached (see :meth:`Pipeline.prefetchIdentifierMappings`).
 
            :return: A tuple consisting of the absolute path to the analysis-ready data set and the absolute path to the mapped input final_filename and mapped_input
            :rtype: tuple(str,str)
            """
-        #####################
-        ### PREPROCESSING ###
-        #####################
+        #reuse outputs of preprocessing steps whose input and parameters did not change since a former run
+        cache = caching.StageCache(benchutils.getConfigValue("General", "cacheDir"), int(benchutils.getConfigValue("General", "cacheSizeLimit")) * 1024 * 1024)
+
+        #preprocessing runs in task processes, so that its runtime and peak memory are recorded for planning later runs (see Pipeline.planExecution)
+        scheduler = execution.StageScheduler(min(2, self.getNumCores()), self.outputRootPath)
+        scheduler.addTask("preprocessData", self.preprocessInputData, (cache,))
+        if benchutils.getConfigBoolean("Evaluation", "enableCrossEvaluation"):
+            self.prefetchIdentifierMappings(cache)
+            scheduler.addTask("preprocessCrossValidationData", self.preprocessCrossValidationData, (cache,))
+        scheduler.run()
+        if scheduler.failures:
+            raise RuntimeError("Preprocessing failed:\n" + "\n".join(name + ": " + error for name, error in scheduler.failures.items()))
+        execution.TaskHistory.writeTaskRuntimes(self.outputRootPath, scheduler.runtimes, {}, scheduler.peakMemory)
+        return scheduler.results["preprocessData"]
+
+    def prefetchIdentifierMappings(self, cache):
+        """Retrieves the identifier mappings of the input data set and the data set for cross-validation in a single query, before both are preprocessed at the same time.
+           Both data sets are mapped to the same format. If they are also in the same format, identifiers occurring in both data sets are only looked up once, and the two preprocessing processes find the mappings of all identifiers (including the ones that cannot be mapped) in the identifier mapping file, so they do not query them again (see :func:`benchutils.retrieveMappings`).
+           Nothing is retrieved if the mapped versions of both data sets are cached, as preprocessing does not map any identifiers then.
+
+           :param cache: cache for the outputs of the preprocessing steps.
+           :type cache: :class:`caching.StageCache`
+           """
+        currentIDFormat = benchutils.getConfigValue("Dataset", "currentGeneIDFormat")
+        desiredIDFormat = benchutils.getConfigValue("Dataset", "finalGeneIDFormat")
+        if currentIDFormat == desiredIDFormat or currentIDFormat != benchutils.getConfigValue("Evaluation", "crossEvaluationGeneIDFormat"):
+            return
+        if self.isMappingCached(cache):
+            benchutils.logInfo("Mapped data sets are cached, skip retrieving identifier mappings")
+            return
+
+        dataFormatter = preprocessing.DataTransformationPreprocessor(benchutils.getConfigValue("Dataset", "input"), None, None,
+                                                                     benchutils.getConfigValue("Dataset", "dataSeparator"))
+        crossVal_mappingPreprocessor = preprocessing.MappingPreprocessor(benchutils.getConfigValue("Evaluation", "crossEvaluationData"), None,
+                                                                         currentIDFormat, desiredIDFormat, True)
+        features = dataFormatter.readFeatureNames()
+        knownFeatures = set(features)
+        features.extend(feature for feature in crossVal_mappingPreprocessor.readFeatureNames() if feature not in knownFeatures)
+        benchutils.logInfo("Retrieve identifier mappings of " + str(len(features)) + " features of both data sets")
+        benchutils.mapIdentifiers(features, currentIDFormat, desiredIDFormat)
+
+    def isMappingCached(self, cache):
+        """Checks if the outputs of all preprocessing steps up to the mapping are cached, for the input data set and the data set for cross-validation.
+           The steps are created as in :meth:`Pipeline.preprocessInputData` and :meth:`Pipeline.preprocessCrossValidationData`, depending on whether inMemory or fused is enabled in the config.
+
+           :param cache: cache for the outputs of the preprocessing steps.
+           :type cache: :class:`caching.StageCache`
+           :return: true if neither data set needs to be mapped.
+           :rtype: bool
+           """
+        input = benchutils.getConfigValue("Dataset", "input")
+        input_metadata = benchutils.getConfigValue("Dataset", "metadata")
+        intermediate_output = benchutils.getConfigValue("General", "preprocessing") + "preprocessed/"
+        final_filename = benchutils.getConfigValue("General", "preprocessing") + "ready/" + os.path.basename(input)
+        sep = benchutils.getConfigValue("Dataset", "dataSeparator")
+        desiredIDFormat = benchutils.getConfigValue("Dataset", "finalGeneIDFormat")
+        inMemory = benchutils.getConfigBoolean("Preprocessing", "inMemory")
+        fused = benchutils.getConfigBoolean("Preprocessing", "fused")
+        snapshots = benchutils.getConfigBoolean("Preprocessing", "debugSnapshots")
+
+        dataFormatter = preprocessing.DataTransformationPreprocessor(input, input_metadata, intermediate_output, sep)
+        mappingPreprocessor = preprocessing.MappingPreprocessor(dataFormatter.getOutputFile(), intermediate_output,
+                                                                benchutils.getConfigValue("Dataset", "currentGeneIDFormat"), desiredIDFormat, False)
+        if fused:
+            #the fused steps are cached as a whole, including labeling and filtering
+            metadataAnnotator = preprocessing.MetaDataPreprocessor(mappingPreprocessor.getOutputFile(), input_metadata, intermediate_output, sep)
+            filterPreprocessor = preprocessing.FilterPreprocessor(metadataAnnotator.getOutputFile(), input_metadata, intermediate_output)
+            inputStages = [preprocessing.FusedPreprocessor(dataFormatter, mappingPreprocessor, metadataAnnotator, filterPreprocessor, final_filename)]
+        elif inMemory and dataFormatter.isOutOfCore():
+            inputStages = [dataFormatter, preprocessing.PreprocessingChain([mappingPreprocessor], mappingPreprocessor.getOutputFile(), snapshots)]
+        elif inMemory:
+            inputStages = [preprocessing.PreprocessingChain([dataFormatter, mappingPreprocessor], mappingPreprocessor.getOutputFile(), snapshots)]
+        else:
+            inputStages = [dataFormatter, mappingPreprocessor]
+
+        crossValidationFile = benchutils.getConfigValue("Evaluation", "crossEvaluationData")
+        crossVal_mappingPreprocessor = preprocessing.MappingPreprocessor(crossValidationFile, benchutils.getConfigValue("General", "crossVal_preprocessing") + "preprocessed/",
+                                                                         benchutils.getConfigValue("Evaluation", "crossEvaluationGeneIDFormat"), desiredIDFormat, True)
+        if inMemory or fused:
+            crossval_final_filename = benchutils.getConfigValue("General", "crossVal_preprocessing") + "ready/" + os.path.basename(crossValidationFile)
+            crossValStages = [preprocessing.PreprocessingChain([crossVal_mappingPreprocessor], crossval_final_filename, snapshots)]
+        else:
+            crossValStages = [crossVal_mappingPreprocessor]
+
+        return cache.isCached(inputStages) and cache.isCached(crossValStages)
+
+    def preprocessInputData(self, cache):
+        """Preprocesses the input data set (see :meth:`Pipeline.preprocessData`), writing the output of every step unless inMemory or fused is enabled in the config.
+
+           :param cache: cache for the outputs of the preprocessing steps.
+           :type cache: :class:`caching.StageCache`
+           :return: A tuple consisting of the absolute path to the analysis-ready data set and the absolute path to the mapped input
+           :rtype: tuple(str,str)
+           """
+        if benchutils.getConfigBoolean("Preprocessing", "fused"):
+            return self.preprocessDataFused(cache)
+        if benchutils.getConfigBoolean("Preprocessing", "inMemory"):
+            return self.preprocessDataInMemory(cache)
 
         input = benchutils.getConfigValue("Dataset", "input")
         input_metadata = benchutils.getConfigValue("Dataset", "metadata")
@@ -320,40 +764,135 @@ class Pipeline():
         # THIS ONE MUST ALWAYS BE THE FIRST PREPROCESSING STEP because it potentially changes the separators used in the data
         # transpose data matrix if genes are not located in the columns, replace custom separators to the framework-specific ones
         dataFormatter = preprocessing.DataTransformationPreprocessor(input, input_metadata, intermediate_output, sep)
-        transposed_input = dataFormatter.preprocess()
+        transposed_input = cache.preprocess(dataFormatter)
 
         mappingPreprocessor = preprocessing.MappingPreprocessor(transposed_input, intermediate_output, currentIDFormat,
                                                                 desiredIDFormat, False)
-        mapped_input = mappingPreprocessor.preprocess()
+        mapped_input = cache.preprocess(mappingPreprocessor)
 
         # add disease type from metadata to main data set
         metadataAnnotator = preprocessing.MetaDataPreprocessor(mapped_input, input_metadata, intermediate_output, sep)
-        labeled_input = metadataAnnotator.preprocess()
+        labeled_input = cache.preprocess(metadataAnnotator)
 
         filterPreprocessor = preprocessing.FilterPreprocessor(labeled_input, input_metadata, intermediate_output)
-        filtered_input = filterPreprocessor.preprocess()
+        filtered_input = cache.preprocess(filterPreprocessor)
 
         #move last processed file into ready directory with original filename as prefix
         final_filename = final_output + original_filename
         datasetPreprocessor = preprocessing.DataMovePreprocessor(filtered_input, final_filename)
         datasetPreprocessor.preprocess()
 
-        # if cross-validation is enabled, map the dataset for cross-validation correctly and move it to the right directory
-        if (benchutils.getConfigBoolean("Evaluation", "enableCrossEvaluation")):
-            crossValidationFile = benchutils.getConfigValue("Evaluation", "crossEvaluationData")
-            crossValFileName = os.path.basename(crossValidationFile)
-            crossValidationPath = benchutils.getConfigValue("General", "crossVal_preprocessing") + "preprocessed/"
-            crossValIDFormat = benchutils.getConfigValue("Evaluation", "crossEvaluationGeneIDFormat")
-            crossVal_mappingPreprocessor = preprocessing.MappingPreprocessor(crossValidationFile, crossValidationPath,
-                                                                    crossValIDFormat,desiredIDFormat, True)
-            mapped_crossValdata = crossVal_mappingPreprocessor.preprocess()
-            crossval_final_output = benchutils.getConfigValue("General", "crossVal_preprocessing") + "ready/"
-            crossval_final_filename = crossval_final_output + crossValFileName
+        self.writeSidecarFiles([(mapped_input, None), (final_filename, None)])
+
+        return final_filename, mapped_input
+
+    def preprocessDataInMemory(self, cache):
+        """Preprocesses the input data set like :meth:`Pipeline.preprocessData`, but passes the data set from one step to the next in memory.
+           Steps are grouped into two :class:`preprocessing.PreprocessingChain` objects: the first one transposes and maps the data set and writes the mapped data set (which is needed by the rankings evaluation), the second one labels and filters it and writes the analysis-ready data set.
+           Outputs of every step are only written if debugSnapshots is enabled in the config.
+
+           :param cache: cache for the outputs of both chains.
+           :type cache: :class:`caching.StageCache`
+           :return: A tuple consisting of the absolute path to the analysis-ready data set and the absolute path to the mapped input
+           :rtype: tuple(str,str)
+           """
+        input = benchutils.getConfigValue("Dataset", "input")
+        input_metadata = benchutils.getConfigValue("Dataset", "metadata")
+        intermediate_output = benchutils.getConfigValue("General", "preprocessing") + "preprocessed/"
+        final_filename = benchutils.getConfigValue("General", "preprocessing") + "ready/" + os.path.basename(input)
+        sep = benchutils.getConfigValue("Dataset", "dataSeparator")
+        desiredIDFormat = benchutils.getConfigValue("Dataset", "finalGeneIDFormat")
+        snapshots = benchutils.getConfigBoolean("Preprocessing", "debugSnapshots")
+
+        #every step is created with the input file it would read when running on its own, which determines its output file name for snapshots
+        dataFormatter = preprocessing.DataTransformationPreprocessor(input, input_metadata, intermediate_output, sep)
+        mappingPreprocessor = preprocessing.MappingPreprocessor(dataFormatter.getOutputFile(), intermediate_output,
+                                                                benchutils.getConfigValue("Dataset", "currentGeneIDFormat"), desiredIDFormat, False)
+        if dataFormatter.isOutOfCore():
+            #data sets transposed out of core are too large to transpose in memory, so the chain starts from the transposed file
+            cache.preprocess(dataFormatter)
+            mappingChain = preprocessing.PreprocessingChain([mappingPreprocessor], mappingPreprocessor.getOutputFile(), snapshots)
+        else:
+            mappingChain = preprocessing.PreprocessingChain([dataFormatter, mappingPreprocessor], mappingPreprocessor.getOutputFile(), snapshots)
+        mapped_input = cache.preprocess(mappingChain)
+        self.writeSidecarFiles([(mapped_input, mappingChain.result)])
+
+        # add disease type from metadata to main data set and filter it, starting from the mapped data set in memory unless it was cached
+        metadataAnnotator = preprocessing.MetaDataPreprocessor(mapped_input, input_metadata, intermediate_output, sep)
+        filterPreprocessor = preprocessing.FilterPreprocessor(metadataAnnotator.getOutputFile(), input_metadata, intermediate_output)
+        labelingChain = preprocessing.PreprocessingChain([metadataAnnotator, filterPreprocessor], final_filename, snapshots, mappingChain.result)
+        #the mapped data set in memory is modified by labeling, so it must not be reused afterwards
+        mappingChain.result = None
+        cache.preprocess(labelingChain)
+        self.writeSidecarFiles([(final_filename, labelingChain.result)])
+
+        return final_filename, mapped_input
+
+    def preprocessDataFused(self, cache):
+        """Preprocesses the input data set like :meth:`Pipeline.preprocessData`, but runs all steps in a single pass over the input file (see :class:`preprocessing.FusedPreprocessor`).
+           Only the analysis-ready data set is written; it is also used by the rankings evaluation instead of a separate mapped data set.
+
+           :param cache: cache for the output of the fused steps.
+           :type cache: :class:`caching.StageCache`
+           :return: A tuple consisting of the absolute path to the analysis-ready data set, twice (as analysis-ready and mapped data set)
+           :rtype: tuple(str,str)
+           """
+        input = benchutils.getConfigValue("Dataset", "input")
+        input_metadata = benchutils.getConfigValue("Dataset", "metadata")
+        intermediate_output = benchutils.getConfigValue("General", "preprocessing") + "preprocessed/"
+        final_filename = benchutils.getConfigValue("General", "preprocessing") + "ready/" + os.path.basename(input)
+        sep = benchutils.getConfigValue("Dataset", "dataSeparator")
+
+        #every step is created with the input file it would read when running on its own, as for preprocessDataInMemory
+        dataFormatter = preprocessing.DataTransformationPreprocessor(input, input_metadata, intermediate_output, sep)
+        mappingPreprocessor = preprocessing.MappingPreprocessor(dataFormatter.getOutputFile(), intermediate_output,
+                                                                benchutils.getConfigValue("Dataset", "currentGeneIDFormat"),
+                                                                benchutils.getConfigValue("Dataset", "finalGeneIDFormat"), False)
+        metadataAnnotator = preprocessing.MetaDataPreprocessor(mappingPreprocessor.getOutputFile(), input_metadata, intermediate_output, sep)
+        filterPreprocessor = preprocessing.FilterPreprocessor(metadataAnnotator.getOutputFile(), input_metadata, intermediate_output)
+        cache.preprocess(preprocessing.FusedPreprocessor(dataFormatter, mappingPreprocessor, metadataAnnotator, filterPreprocessor, final_filename))
+        self.writeSidecarFiles([(final_filename, None)])
+
+        return final_filename, final_filename
+
+    def preprocessCrossValidationData(self, cache):
+        """Maps the data set for cross-validation and writes it to the right directory.
+           If inMemory or fused is enabled in the config, the data set is mapped in memory, and the mapped data set is only written to the preprocessing directory if debugSnapshots is enabled.
+
+           :param cache: cache for the output of the mapping.
+           :type cache: :class:`caching.StageCache`
+           """
+        crossValidationFile = benchutils.getConfigValue("Evaluation", "crossEvaluationData")
+        crossValidationPath = benchutils.getConfigValue("General", "crossVal_preprocessing") + "preprocessed/"
+        crossval_final_filename = benchutils.getConfigValue("General", "crossVal_preprocessing") + "ready/" + os.path.basename(crossValidationFile)
+        crossVal_mappingPreprocessor = preprocessing.MappingPreprocessor(crossValidationFile, crossValidationPath,
+                                                                benchutils.getConfigValue("Evaluation", "crossEvaluationGeneIDFormat"),
+                                                                benchutils.getConfigValue("Dataset", "finalGeneIDFormat"), True)
+        if not (benchutils.getConfigBoolean("Preprocessing", "inMemory") or benchutils.getConfigBoolean("Preprocessing", "fused")):
+            mapped_crossValdata = cache.preprocess(crossVal_mappingPreprocessor)
             datasetPreprocessor = preprocessing.DataMovePreprocessor(mapped_crossValdata, crossval_final_filename)
             datasetPreprocessor.preprocess()
+            self.writeSidecarFiles([(crossval_final_filename, None)])
+            return
 
+        crossValChain = preprocessing.PreprocessingChain([crossVal_mappingPreprocessor], crossval_final_filename,
+                                                         benchutils.getConfigBoolean("Preprocessing", "debugSnapshots"))
+        cache.preprocess(crossValChain)
+        self.writeSidecarFiles([(crossval_final_filename, crossValChain.result)])
 
-        return final_filename, mapped_input
+    def writeSidecarFiles(self, datasets):
+        """Writes the binary stores of preprocessed data sets (see :mod:`datastore`), if binaryFormat is enabled in the config, and the statistics of their features (see :mod:`genestatistics`), if geneStatistics is enabled.
+           Python code reads data sets from their stores instead of parsing the CSV files, which are kept for R and Java code, and reads per-gene statistics (e.g. variances) instead of computing them again.
+
+           :param datasets: absolute path to the CSV file of every data set, together with the data set if it is still in memory (None to read it from the file).
+           :type datasets: :class:`List` of tuple(str, :class:`pandas.DataFrame`)
+           """
+        for dataFile, data in datasets:
+            if benchutils.getConfigBoolean("Preprocessing", "binaryFormat"):
+                datastore.writeStore(dataFile, data, benchutils.isCompactPrecision())
+            #statistics of data sets that are not in memory are computed from their (memory-mapped) stores written just before
+            if benchutils.getConfigBoolean("Preprocessing", "geneStatistics"):
+                genestatistics.writeStatistics(dataFile, data, benchutils.isCompactPrecision())
 
     def loadConfig(self, userConfig):
         """Loads the config files.
@@ -368,11 +907,16 @@ class Pipeline():
         else:
             benchutils.loadConfig("../../configs/config.ini")
 
-    def prepareDirectories(self):
+    def prepareDirectories(self, resumeDir = None, keepCaches = False):
         """Prepares directory structure for benchmarking run.
            Creates all necessary directories in the output folder.
            Also cleans up intermediate directory so that no old data is accidentially used.
+           When resuming a run, neither the intermediate directory is cleaned up nor a new output folder is created, but the existing one is completed.
 
+           :param resumeDir: absolute path to the output directory of an interrupted run that should be resumed, None to start a new run.
+           :type resumeDir: str
+           :param keepCaches: whether to keep knowledge base query results and identifier mappings when cleaning up the intermediate directory.
+           :type keepCaches: bool
            :return: absolute path to the directory where all results from this run will be stored.
            :rtype: str
            """
@@ -389,20 +933,37 @@ class Pipeline():
         benchutils.createDirectory(benchutils.getConfigValue("General", "crossVal_preprocessing") + "ready/")
         benchutils.createDirectory(benchutils.getConfigValue("General", "externalKbDir"))
         benchutils.createDirectory(benchutils.getConfigValue("General", "intermediateDir") + "identifierMappings/")
+        benchutils.createDirectory(benchutils.getConfigValue("General", "queryCacheDir"))
 
 
-        benchutils.cleanupResults()
-        outputPath = benchutils.getConfigValue("General", "resultsdir") + benchutils.getConfigValue("General", "outputDir_name") + "/"
-        # create root directory for final analysis outputs
-        #rename output folder if it already exists
-        i = 1
-        while os.path.exists(outputPath):
-            dir = benchutils.getConfigValue("General", "outputDir_name").strip("/")
-            outputPath = benchutils.getConfigValue("General", "resultsdir") + dir + str(i)+ "/"
-            i += 1
+        if resumeDir:
+            if not os.path.isdir(resumeDir):
+                raise Exception("Output directory " + resumeDir + " to resume does not exist. Stop here.")
+            outputPath = os.path.join(os.path.abspath(resumeDir), "")
+        else:
+            benchutils.cleanupResults(keepCaches)
+            outputPath = benchutils.getConfigValue("General", "resultsdir") + benchutils.getConfigValue("General", "outputDir_name") + "/"
+            # create root directory for final analysis outputs
+            #rename output folder if it already exists
+            i = 1
+            while os.path.exists(outputPath):
+                dir = benchutils.getConfigValue("General", "outputDir_name").strip("/")
+                outputPath = benchutils.getConfigValue("General", "resultsdir") + dir + str(i)+ "/"
+                i += 1
+
+            benchutils.createDirectory(outputPath)
+
+        self.createEvaluationDirectories(outputPath)
+        benchutils.createDirectory(outputPath + benchutils.getConfigValue("Gene Selection - General", "outputDirectory"))
+
+        return outputPath
 
-        benchutils.createDirectory(outputPath)
+    def createEvaluationDirectories(self, outputPath):
+        """Creates the directories for the evaluation results in an output folder.
 
+           :param outputPath: absolute path to the output folder of a run or of a sweep point.
+           :type outputPath: str
+           """
         # create new directory for ranking and evaluation results
         benchutils.createDirectory(outputPath + benchutils.getConfigValue("Evaluation", "results"))
         benchutils.createDirectory(outputPath + benchutils.getConfigValue("Evaluation", "reducedDataset"))
@@ -432,16 +993,154 @@ class Pipeline():
                 benchutils.createDirectory(
                     outputPath + benchutils.getConfigValue("Prediction", "crossEvaluationDir") + "reducedDataset/")
 
-        benchutils.createDirectory(outputPath + benchutils.getConfigValue("Gene Selection - General", "outputDirectory"))
+    def countSearchTerms(self):
+        """Counts the search terms that selectors query knowledge bases with, i.e. the class labels in the metadata and the alternative search terms.
 
-        return outputPath
-
-    def executePipeline(self):
+           :return: number of search terms.
+           :rtype: int
+           """
+        metadata = pd.read_csv(benchutils.getConfigValue("Dataset", "metadata"), sep = benchutils.getConfigValue("Dataset", "dataSeparator"),
+                               index_col = 0, quotechar = '"')
+        if not benchutils.getConfigBoolean("Dataset", "metadataIDsInColumns"):
+            metadata = metadata.T
+        classLabels = metadata.loc[benchutils.getConfigValue("Dataset", "classLabelName")].dropna().unique()
+        return len(classLabels) + len(self.getAlternativeSearchTerms())
+
+    def planExecution(self):
+        """Estimates the work and resources of a run without running anything, e.g. to request an appropriate cluster slot.
+           Only the header and the number of lines of the input data set are read.
+           Runtime and peak memory of feature selection are estimated from former runs (see :class:`execution.RuntimeHistory` and :class:`execution.MemoryHistory`), runtime and peak memory of preprocessing and annotation from the recorded tasks of former runs, and the runtime of classification from the time per trained classifier in former runs (see :class:`execution.TaskHistory`).
+           Estimates that have no history to be calibrated with are left empty, except for the peak memory of preprocessing, which is estimated from the size of the data set then.
+
+           :return: number of samples and features of the input data set, and a table containing for every stage the number of jobs, knowledge base queries, reduced data sets, and classifier fits, as well as the estimated runtime in seconds and peak memory in MB.
+           :rtype: tuple(tuple(int, int), :class:`pandas.DataFrame`)
+           """
+        shape = benchutils.getInputShape(benchutils.getConfigValue("Dataset", "input"), benchutils.getConfigValue("Dataset", "dataSeparator"),
+                                         benchutils.getConfigBoolean("Dataset", "genesInColumns"))
+        resultsDir = benchutils.getConfigValue("General", "resultsDir")
+        numCores = self.getNumCores()
+        memoryBudget = self.getMemoryBudget()
+        methods = self.getSelectionMethods()
+        knowledgeBaseMethods = self.getKnowledgeBaseMethods()
+        searchTerms = self.countSearchTerms() if knowledgeBaseMethods else 0
+        sweepPoints = self.getSweepPoints() or [None]
+        columns = ["stage", "jobs", "knowledgeBaseQueries", "reducedDatasets", "classifierFits", "estimatedRuntime", "estimatedPeakMemory"]
+        stages = []
+
+        taskHistory = execution.TaskHistory(resultsDir)
+        #both data sets are preprocessed at the same time if cross-evaluation is enabled
+        preprocessingTasks = ["preprocessData"]
+        if benchutils.getConfigBoolean("Evaluation", "enableCrossEvaluation"):
+            preprocessingTasks.append("preprocessCrossValidationData")
+        preprocessingRuntime, preprocessingMemory = taskHistory.estimateStage(preprocessingTasks, min(2, numCores), shape)
+        if preprocessingMemory is None:
+            #preprocessing holds the whole data set in memory
+            factor, overhead = execution.DEFAULT_MEMORY
+            preprocessingMemory = factor * shape[0] * shape[1] * 8 / (1024 * 1024) + overhead
+        stages.append(["preprocessing", 1, 0, 0, 0, preprocessingRuntime, preprocessingMemory])
+
+        runtimeHistory = execution.RuntimeHistory(resultsDir)
+        selectionRuntime = None
+        if any(method in runtimeHistory.history for method in methods):
+            selectionRuntime = execution.estimateMakespan(runtimeHistory.estimateRuntimes(methods, shape).values(), numCores)
+        #at most numCores selectors run at the same time, and only as many as fit into the memory budget
+        selectorMemory = sorted(execution.MemoryHistory(resultsDir).estimateMemory(methods, shape).values(), reverse = True)
+        selectionMemory = sum(selectorMemory[:numCores])
+        if memoryBudget > 0 and selectorMemory:
+            selectionMemory = max(min(selectionMemory, memoryBudget), selectorMemory[0])
+        #every selector using a knowledge base queries it once per search term
+        stages.append(["feature selection", len(methods), len(knowledgeBaseMethods) * searchTerms, 0, 0, selectionRuntime, selectionMemory])
+
+        if benchutils.getConfigBoolean("Evaluation", "evaluateKBcoverage"):
+            knowledgebases = set(method.split("_")[-1] for method in knowledgeBaseMethods)
+            stages.append(["knowledge base coverage", 1, len(knowledgebases) * searchTerms, 0, 0, None, None])
+
+        #every ranking is annotated once per sweep point, which does not depend on the size of the data set
+        annotationRuntime, annotationMemory = taskHistory.estimateStage(["annotate_" + method for method in methods] * len(sweepPoints), numCores)
+        stages.append(["annotation", len(methods) * len(sweepPoints), len(methods) * len(sweepPoints), 0, 0, annotationRuntime, annotationMemory])
+
+        classificationTypes = []
+        if benchutils.getConfigBoolean("Evaluation", "enableClassification"):
+            classificationTypes.append("classification")
+        if benchutils.getConfigBoolean("Evaluation", "enableCrossEvaluation"):
+            classificationTypes.append("cross-evaluation")
+        secondsPerFit = taskHistory.estimateSecondsPerFit()
+        for classificationType in classificationTypes:
+            reducedDatasets = 0
+            classifierFits = 0
+            for sweepPoint in sweepPoints:
+                pointDatasets, pointFits = self.countClassifierFits(sweepPoint)
+                reducedDatasets += pointDatasets * len(methods)
+                classifierFits += pointFits * len(methods)
+            classificationRuntime = None
+            if secondsPerFit is not None:
+                classificationRuntime = classifierFits * secondsPerFit / numCores
+            stages.append([classificationType, len(methods) * len(sweepPoints), 0, reducedDatasets, classifierFits, classificationRuntime, None])
+
+        return shape, pd.DataFrame(stages, columns = columns)
+
+    def benchmarkPrecision(self):
+        """Compares the feature rankings of all selection methods in float64 and in float32 precision (see the config's precision parameter).
+           The analysis-ready data set is copied to one directory per precision (together with a binary store in that precision), and all selectors are run on both copies.
+           For every method, the agreement of both rankings is measured as overlap of the top k features (with k being the config's topKmax) and as Spearman correlation of the ranks of all features ranked in both precisions.
+           The precision is set in a temporary config file that is loaded after the user's config files, so that selectors also read it if they run in spawned processes or on remote workers, which load the config files again.
+
+           :return: absolute path to the file containing the ranking agreement per method.
+           :rtype: str
+           """
+        datasetLocation, _ = self.preprocessData()
+        benchmarkDir = self.outputRootPath + "precisionBenchmark/"
+        methods = self.getSelectionMethods()
+        rankings = {}
+        userConfigPaths = benchutils.configPaths
+        configPaths = userConfigPaths if isinstance(userConfigPaths, list) else [userConfigPaths]
+        configFile, precisionConfig = tempfile.mkstemp(prefix = "precision_", suffix = ".ini")
+        os.close(configFile)
+        try:
+            for precision in ["float64", "float32"]:
+                with open(precisionConfig, "w") as f:
+                    f.write("[Preprocessing]\nprecision = " + precision + "\n")
+                benchutils.loadConfig(configPaths + [precisionConfig])
+                precisionDir = benchmarkDir + precision + "/"
+                loggingDir = precisionDir + "timeLogs/"
+                benchutils.createDirectory(loggingDir)
+                precisionDataset = precisionDir + os.path.basename(datasetLocation)
+                shutil.copyfile(datasetLocation, precisionDataset)
+                datastore.writeStore(precisionDataset, compact = benchutils.isCompactPrecision())
+                benchutils.logInfo("Run feature selection in " + precision + " precision")
+                executor = execution.SelectorExecutor(self.getNumCores(), precisionDataset, precisionDir + "rankings/", loggingDir, precisionDir, self.getMemoryBudget())
+                rankings[precision] = executor.run(methods)
+        finally:
+            #restore the config of the user
+            benchutils.loadConfig(userConfigPaths)
+            os.remove(precisionConfig)
+
+        topK = int(benchutils.getConfigValue("Evaluation", "topKmax"))
+        agreement = []
+        for method in methods:
+            if method not in rankings["float64"] or method not in rankings["float32"]:
+                agreement.append([method, None, None])
+                continue
+            ranks = []
+            for precision in ["float64", "float32"]:
+                ranking = benchutils.loadRanking(rankings[precision][method])
+                genes = ranking[ranking.columns[0]].drop_duplicates()
+                ranks.append(pd.Series(range(len(genes)), index = genes))
+            overlap = len(set(ranks[0].index[:topK]) & set(ranks[1].index[:topK])) / float(max(1, min(topK, len(ranks[0]))))
+            common = ranks[0].index.intersection(ranks[1].index)
+            correlation = ranks[0][common].corr(ranks[1][common], method = "spearman") if len(common) > 1 else None
+            agreement.append([method, overlap, correlation])
+
+        agreementFile = benchmarkDir + "rankingAgreement.tsv"
+        pd.DataFrame(agreement, columns = ["method", "top" + str(topK) + "Overlap", "spearmanCorrelation"]).to_csv(agreementFile, sep = "\t", index = False)
+        return agreementFile
+
+    def executePipeline(self, coordinator = None):
         """The entry point for the overall benchmarking process.
            This method is invoked when running the framework, and from here all other steps of the benchmarking process are encapsulated in own methods.
 
-        :param userConfig: absolute path to an additional user configuration file (config.ini will always be used by default) to overwrite default configuration.
-        :type userConfig: str
+        :param coordinator: coordinator of remote workers to distribute feature selection and classification tasks to, None to run all tasks locally.
+        :type coordinator: :class:`workqueue.Coordinator`
         """
         benchutils.logInfo("Welcome to Comprior!")
         benchutils.logInfo("######################## PREPROCESS DATA... ########################")
@@ -449,29 +1148,116 @@ class Pipeline():
         benchutils.logInfo("######################## ... FINISHED ########################")
 
 
-        self.evaluateInputData(datasetLocation)
-
-        self.evaluateKnowledgeBases(datasetLocation)
-
-        benchutils.logInfo("######################## SELECT FEATURES... ########################")
-        outputDir = self.selectFeatures(datasetLocation)
-        benchutils.logInfo("######################## ... FINISHED ########################")
-
-        benchutils.logInfo("######################## EVALUATE BIOMARKERS... ########################")
-        dataPath = os.path.dirname(datasetLocation)
-        self.evaluateBiomarkers(dataPath, mappedLocation, outputDir)
+        benchutils.logInfo("######################## SELECT FEATURES AND EVALUATE BIOMARKERS... ########################")
+        sweepPoints = self.getSweepPoints()
+        if sweepPoints:
+            benchutils.logInfo("Sweep over " + str(len(sweepPoints)) + " evaluation parameter combinations")
+        scheduler = self.scheduleStages(datasetLocation, mappedLocation, sweepPoints, coordinator)
+        if self.resume:
+            scheduler.run(self.isTaskComplete)
+        else:
+            scheduler.run()
+        if sweepPoints:
+            benchutils.logInfo("Sweep results are compared in " + self.compareSweepPoints(sweepPoints))
+        # record peak memory of the selectors and runtimes of all tasks to refine estimates of later runs
+        selectorMemory = {name[len("select_"):]: peak for name, peak in scheduler.peakMemory.items() if name.startswith("select_")}
+        execution.MemoryHistory.writePeakMemory(self.outputRootPath, selectorMemory, benchutils.getDatasetShape(datasetLocation))
+        execution.writeTimeouts(self.outputRootPath, {name[len("select_"):]: limit for name, limit in scheduler.timeouts.items() if name.startswith("select_")})
+        classifierFits = {}
+        for sweepPoint in sweepPoints or [None]:
+            prefix = "" if sweepPoint is None else sweepPoint[0] + "/"
+            _, methodFits = self.countClassifierFits(sweepPoint)
+            for method in self.getSelectionMethods():
+                classifierFits[prefix + "classify_" + method] = methodFits
+                classifierFits[prefix + "crossClassify_" + method] = methodFits
+        execution.TaskHistory.writeTaskRuntimes(self.outputRootPath, scheduler.runtimes, classifierFits, scheduler.peakMemory)
         benchutils.logInfo("######################## ... FINISHED ########################")
         benchutils.logInfo("Comprior is done!")
         benchutils.logInfo("Please find all results at " + benchutils.getConfigValue("General", "resultsDir") + benchutils.getConfigValue("General", "outputDir_name"))
         benchutils.logInfo("An explanation on the output folder and file structure can be found at https://comprior.readthedocs.io/en/latest/outputstructure.html#results")
 
+def runSweepTask(overrides, function, args):
+    """Entry point of the evaluation tasks of a sweep point.
+       Sets the point's config values in the task's process before running the task, so that the evaluators read them like any other config value.
+
+       :param overrides: config values of the sweep point as (category, parameter, value).
+       :type overrides: :class:`List` of tuple(str, str, str)
+       :param function: the task function.
+       :type function: callable
+       :param args: arguments for the function.
+       :type args: tuple
+       :return: the return value of the task function.
+       """
+    for category, identifier, value in overrides:
+        benchutils.setConfigValue(category, identifier, value)
+    return function(*args)
+
+def runBatch(userConfigs, coordinator = None):
+    """Runs the pipeline for multiple config files, e.g. one per data set, one after the other in the same process.
+       Libraries and web service clients are only loaded once, and knowledge base query results and identifier mappings are shared between the runs.
+       Every run writes its results to its own output directory, as specified by its config file.
+       If a run fails, the remaining runs are still executed.
+
+       :param userConfigs: absolute paths to the user config files, one per run.
+       :type userConfigs: list of str
+       :param coordinator: coordinator of remote workers that are shared by all runs, None to run all tasks locally.
+       :type coordinator: :class:`workqueue.Coordinator`
+       :return: config files of the runs that failed.
+       :rtype: list of str
+       """
+    failedRuns = []
+    for i, userConfig in enumerate(userConfigs):
+        try:
+            #only clear the caches before the first run
+            pipeline = Pipeline(userConfig, keepCaches = (i > 0))
+            pipeline.executePipeline(coordinator)
+        except Exception:
+            benchutils.logError("ERROR: Run with config " + userConfig + " failed:\n" + traceback.format_exc())
+            failedRuns.append(userConfig)
+
+    if failedRuns:
+        benchutils.logError("ERROR: " + str(len(failedRuns)) + " of " + str(len(userConfigs)) + " runs failed: " + ", ".join(failedRuns))
+    return failedRuns
+
 if __name__ == '__main__':
 
     # parse input params
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', type=str, help='User-specific config file that overwrites parts of the original config file.')
+    parser.add_argument('--resume', type=str, help='Output directory of an interrupted run. Only runs feature selectors and evaluations that did not finish in that run.')
+    parser.add_argument('--batch', type=str, nargs='+', help='Multiple user-specific config files (e.g. one per data set) to run one after the other in the same process, sharing knowledge base queries and identifier mappings.')
+    parser.add_argument('--coordinator', type=str, help='Address (host:port) to listen on for workers. Feature selection and classification tasks are then also distributed to the connected workers.')
+    parser.add_argument('--worker', type=str, help='Address (host:port) of a coordinator. Runs as worker for this coordinator instead of running the pipeline.')
+    parser.add_argument('--authkey', type=str, help='Shared secret of coordinator and workers, required for --coordinator and --worker.')
+    parser.add_argument('--plan', action='store_true', help='Only print the expected number of jobs, knowledge base queries, reduced data sets, and classifier fits, together with runtime and memory estimates per stage, without running anything.')
+    parser.add_argument('--benchmarkPrecision', action='store_true', help='Only preprocess the data set and run all feature selectors in float64 and float32 precision, and report how well the rankings of both precisions agree.')
 
     args = parser.parse_args()
-
-    pipeline = Pipeline(args.config)
-    pipeline.executePipeline()
+    if (args.coordinator or args.worker) and not args.authkey:
+        parser.error("--authkey is required for --coordinator and --worker")
+
+    if args.plan:
+        pipeline = Pipeline(args.config, dryRun = True)
+        shape, plan = pipeline.planExecution()
+        print("Input data set: " + str(shape[0]) + " samples, " + str(shape[1]) + " features")
+        print(plan.to_string(index = False, na_rep = "unknown", float_format = lambda value: "%.0f" % value))
+    elif args.benchmarkPrecision:
+        pipeline = Pipeline(args.config)
+        print("Ranking agreement of float32 and float64: " + pipeline.benchmarkPrecision())
+    elif args.worker:
+        # the worker is started via this script so that tasks referring to this module's functions can be unpickled
+        worker = workqueue.Worker(workqueue.parseAddress(args.worker), args.authkey.encode("utf-8"))
+        worker.run()
+    else:
+        coordinator = None
+        if args.coordinator:
+            coordinator = workqueue.Coordinator(workqueue.parseAddress(args.coordinator), args.authkey.encode("utf-8"))
+        try:
+            if args.batch:
+                runBatch(args.batch, coordinator)
+            else:
+                pipeline = Pipeline(args.config, args.resume)
+                pipeline.executePipeline(coordinator)
+        finally:
+            if coordinator is not None:
+                coordinator.close()
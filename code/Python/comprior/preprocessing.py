@@ -1,10 +1,12 @@
 import pandas as pd
+import numpy as np
 from abc import abstractmethod
-import benchutils, os, time
+import benchutils, os, time, tempfile
 
 class Preprocessor:
     """Super class of all preprocessor implementations.
        Inherit from this class and implement :meth:`preprocessing.Preprocessor.preprocess()` if you want to add a new preprocessor class.
+       Preprocessors that additionally implement :meth:`preprocessing.Preprocessor.process()` can be combined in a :class:`PreprocessingChain`, which passes the data set from one preprocessor to the next in memory.
 
        :param input: absolute path to the input file.
        :type input: str
@@ -30,6 +32,60 @@ class Preprocessor:
            """
         pass
 
+    def readInput(self):
+        """Reads the input data set for :meth:`preprocessing.Preprocessor.process()`.
+
+           :return: the input data set, with the first column as index.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        return pd.read_csv(self.input, index_col = 0)
+
+    def process(self, data):
+        """Preprocesses a data set in memory.
+           Override this method to make a preprocessor usable in a :class:`PreprocessingChain`.
+
+           :param data: the input data set, as returned by :meth:`preprocessing.Preprocessor.readInput()` or the preceding preprocessor of a chain.
+           :type data: :class:`pandas.DataFrame`
+           :return: the preprocessed data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        raise NotImplementedError(type(self).__name__ + " does not support in-memory preprocessing.")
+
+    def getOutputFile(self):
+        """Gets the location :meth:`preprocessing.Preprocessor.preprocess()` writes its output to.
+
+           :return: absolute path to the output file.
+           :rtype: str
+           """
+        raise NotImplementedError(type(self).__name__ + " does not define its output file.")
+
+    def writeOutput(self, data, filename):
+        """Writes a preprocessed data set to a file.
+
+           :param data: the preprocessed data set.
+           :type data: :class:`pandas.DataFrame`
+           :param filename: absolute path to the output file.
+           :type filename: str
+           """
+        data.to_csv(filename)
+
+    def getCacheInputs(self):
+        """Lists all files the preprocessor reads, used to compute its key for the :class:`caching.StageCache`.
+
+           :return: absolute paths to the input and (if available) metadata file.
+           :rtype: list of str
+           """
+        return [file for file in [self.input, self.metadata] if file is not None]
+
+    def getCacheParams(self):
+        """Lists all parameters that influence the preprocessor's output, used to compute its key for the :class:`caching.StageCache`.
+           Override this method and extend the list if a preprocessor has own parameters.
+
+           :return: preprocessor name and output location.
+           :rtype: list of str
+           """
+        return [type(self).__name__, self.output]
+
 class MappingPreprocessor(Preprocessor):
     """Maps the input data set to a desired format.
 
@@ -51,27 +107,63 @@ class MappingPreprocessor(Preprocessor):
         self.labeled = labeled
         super().__init__(input, None, output)
 
+    def getCacheParams(self):
+        """Adds the identifier formats and labeling to the cache parameters.
+
+           :return: parameters influencing the mapping.
+           :rtype: list of str
+           """
+        return super().getCacheParams() + [self.currentFormat, self.desiredFormat, self.labeled]
+
+    def readFeatureNames(self):
+        """Reads the names of the features to map from the header of the input data set, without the class label column if the data set is labeled.
+
+           :return: feature names in the order of the input data set.
+           :rtype: :class:`List` of str
+           """
+        columns = list(pd.read_csv(self.input, index_col = 0, nrows = 0).columns)
+        return columns[1:] if self.labeled else columns
+
     def preprocess(self):
         """Maps the identifiers in the input dataset to the desired format that was specified when constructing the preprocessor.
 
            :return: absolute path to the mapped file.
            :rtype: str
            """
-        inputMatrix = pd.read_csv(self.input, index_col = 0)
-
-        original_filename = self.input.split("/")[-1]
-        mapped_filename = "mapped_" + self.desiredFormat + "_" + original_filename
-        output = self.input
-        output_filepath =  "/".join(self.input.split("/")[0:-1])
-        #as the DataFormatter always transposes the data before any further processing, we can expect all genes to be in the columns
-        genesInColumn = "true"
+        output = self.getOutputFile()
         #only map genes if the current format is not the desired format
         if (self.currentFormat != self.desiredFormat):
-            output = output_filepath + "/" + mapped_filename
-            benchutils.mapDataMatrix(inputMatrix, genesInColumn, self.currentFormat, self.desiredFormat, output, self.labeled)
+            self.writeOutput(self.process(self.readInput()), output)
 
         return output
 
+    def process(self, data):
+        """Maps the identifiers in a data set to the desired format that was specified when constructing the preprocessor.
+
+           :param data: the data set with features in the columns.
+           :type data: :class:`pandas.DataFrame`
+           :return: the mapped data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        if (self.currentFormat == self.desiredFormat):
+            return data
+        #as the DataFormatter always transposes the data before any further processing, we can expect all genes to be in the columns
+        genesInColumn = "true"
+        return benchutils.mapDataMatrix(data, genesInColumn, self.currentFormat, self.desiredFormat, None, self.labeled)
+
+    def getOutputFile(self):
+        """Gets the location of the mapped data set, which is the input file if no mapping is necessary.
+
+           :return: absolute path to the mapped file.
+           :rtype: str
+           """
+        if (self.currentFormat == self.desiredFormat):
+            return self.input
+        original_filename = self.input.split("/")[-1]
+        mapped_filename = "mapped_" + self.desiredFormat + "_" + original_filename
+        output_filepath =  "/".join(self.input.split("/")[0:-1])
+        return output_filepath + "/" + mapped_filename
+
 class FilterPreprocessor(Preprocessor):
     """Filters features or samples above a user-defined threshold of missing values.
 
@@ -88,6 +180,14 @@ class FilterPreprocessor(Preprocessor):
         self.config = benchutils.getConfig("Preprocessing")
         super().__init__(input, metadata, output)
 
+    def getCacheParams(self):
+        """Adds the config's Preprocessing section to the cache parameters.
+
+           :return: parameters influencing the filtering.
+           :rtype: list of str
+           """
+        return super().getCacheParams() + [key + "=" + value for key, value in sorted(self.config.items())]
+
     def preprocess(self):
         """Depending on what is specified in the config file, filter samples and/or features.
            Remove all samples/features that have missing values above the threshold specified in the config.
@@ -95,52 +195,88 @@ class FilterPreprocessor(Preprocessor):
            :return: absolute path to the filtered output file.
            :rtype: str
            """
-        filtered_data = pd.read_csv(self.input)
-
-        if self.config.getboolean("filterMissingsInGenes"):
-            # first filter out the genes that have more missings than threshold
-            filtered_data = self.filterMissings(self.config["threshold"], filtered_data)
-        if self.config.getboolean("filterMissingsInSamples"):
-            # second transpose matrix and filter out samples that have more missings than threshold
-            filtered_samples = self.filterMissings(self.config["threshold"], filtered_data.T)
-            filtered_data = filtered_samples.T
-
-        # transpose back into original orientation and save
-        filePrefix = self.input.split("/")[-1].split(".")[
-            0]  # split path by / to receive filename, split filename by . to receive filename without ending
-        filename = self.output + filePrefix + "_filtered.csv"
-        filtered_data.to_csv(filename, index=False)
+        filename = self.getOutputFile()
+        self.writeOutput(self.process(self.readInput()), filename)
         return filename
 
-    def filterMissings(self, threshold, data):
-        """Filter the data for entries that have missing information above the given threshold.
+    def process(self, data):
+        """Depending on what is specified in the config file, filter samples and/or features of a labeled data set in memory.
 
-           :param threshold: maximum percentage of allowed missing items as string.
-           :type threshold: str
-           :param data: a DataFrame to be filtered
+           :param data: the labeled data set with sample IDs as index.
            :type data: :class:`pandas.DataFrame`
-           :return: filtered DataFrame.
+           :return: the filtered data set.
            :rtype: :class:`pandas.DataFrame`
            """
+        #name the sample IDs like pandas names unnamed columns, as when reading the labeled file without index
+        filtered_data = data.rename_axis(data.index.name if data.index.name is not None else "Unnamed: 0")
 
-        #replace NAs by 0 for counting
-        data.fillna(0).astype(bool).sum(axis=1)
+        filterGenes = self.config.getboolean("filterMissingsInGenes")
+        filterSamples = self.config.getboolean("filterMissingsInSamples")
+        if filterGenes or filterSamples:
+            filtered_data = self.filterMissings(self.config["threshold"], filtered_data, filterGenes, filterSamples)
 
-        filtered_columns = data.columns
+        return filtered_data
 
+    def getOutputFile(self):
+        """Gets the location of the filtered data set.
 
-        #find out threshold, i.e. minimum number of non-zero in real numbers
-        rowNumber = data.shape[0]
-        min_nonZeros = int(rowNumber - ((rowNumber * int(threshold))/100))
+           :return: absolute path to the filtered output file.
+           :rtype: str
+           """
+        filePrefix = self.input.split("/")[-1].split(".")[
+            0]  # split path by / to receive filename, split filename by . to receive filename without ending
+        return self.output + filePrefix + "_filtered.csv"
 
-        zero_counts = data.astype(bool).sum(axis=0)
+    def getMinNonMissing(self, threshold, count):
+        """Finds out the threshold, i.e. the number of non-missing values a gene or sample must exceed to be kept.
 
-        for columnID, nonZeros in zero_counts.items():
-            if nonZeros <= min_nonZeros:
-                filtered_columns = filtered_columns.drop(columnID)
+           :param threshold: maximum percentage of allowed missing items as string.
+           :type threshold: str
+           :param count: number of values of the gene or sample.
+           :type count: int
+           :return: minimum number of non-missing values.
+           :rtype: int
+           """
+        return int(count - ((count * int(threshold))/100))
 
+    def filterMissings(self, threshold, data, filterGenes = True, filterSamples = False):
+        """Filter the data for genes and/or samples that have missing information above the given threshold.
+           Missing values (NaN or 0) are determined once for the whole data set; genes are filtered first, and samples are filtered based on the remaining genes.
+           The class label column (if it is the first column) is never filtered.
 
-        return data[filtered_columns]
+           :param threshold: maximum percentage of allowed missing items as string.
+           :type threshold: str
+           :param data: a DataFrame to be filtered, with the sample IDs as index.
+           :type data: :class:`pandas.DataFrame`
+           :param filterGenes: whether to filter genes with too many missing values across all samples.
+           :type filterGenes: bool
+           :param filterSamples: whether to filter samples with too many missing values across all (remaining) genes.
+           :type filterSamples: bool
+           :return: filtered DataFrame.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        labeled = len(data.columns) > 0 and data.columns[0] == "classLabel"
+        values = (data.iloc[:, 1:] if labeled else data).to_numpy()
+        missing = pd.isna(values) | (values == 0)
+
+        #genes and samples must have more non-missing values than the threshold to be kept
+        keptFeatures = np.ones(values.shape[1], dtype = bool)
+        if filterGenes:
+            rowNumber = values.shape[0]
+            keptFeatures = rowNumber - missing.sum(axis = 0) > self.getMinNonMissing(threshold, rowNumber)
+
+        keptSamples = np.ones(values.shape[0], dtype = bool)
+        if filterSamples:
+            columnNumber = int(keptFeatures.sum())
+            keptSamples = columnNumber - missing[:, keptFeatures].sum(axis = 1) > self.getMinNonMissing(threshold, columnNumber)
+
+        if labeled:
+            keptFeatures = np.concatenate([[True], keptFeatures])
+        if not keptSamples.all():
+            data = data.iloc[np.flatnonzero(keptSamples)]
+        if not keptFeatures.all():
+            data = data.iloc[:, np.flatnonzero(keptFeatures)]
+        return data
 
 class DataTransformationPreprocessor(Preprocessor):
     """Transform the input data to have features in the columns for subsequent processing.
@@ -157,25 +293,133 @@ class DataTransformationPreprocessor(Preprocessor):
     def __init__(self, input, metadata, output, dataSeparator):
         self.transposeMatrix = not benchutils.getConfigBoolean("Dataset", "genesInColumns")
         self.dataSeparator = dataSeparator
+        self.blockSize = int(benchutils.getConfigValue("Preprocessing", "transposeBlockSize"))
         super().__init__(input, metadata, output)
 
+    def getCacheParams(self):
+        """Adds the transposition and separator to the cache parameters.
+
+           :return: parameters influencing the transformation.
+           :rtype: list of str
+           """
+        return super().getCacheParams() + [self.transposeMatrix, self.dataSeparator]
+
+    def readFeatureNames(self):
+        """Reads the feature names of the input data set without reading its values, i.e. the first column if the data set is transposed and its header otherwise.
+
+           :return: feature names in the order of the input data set.
+           :rtype: :class:`List` of str
+           """
+        if self.transposeMatrix:
+            return list(pd.read_csv(self.input, sep = self.dataSeparator, index_col = 0, usecols = [0]).index)
+        return list(pd.read_csv(self.input, sep = self.dataSeparator, index_col = 0, nrows = 0).columns)
+
     def preprocess(self):
         """If not already so, transpose the input data to have the features in the columns.
+           If a transposeBlockSize is set in the config, the data is transposed out of core (see :meth:`DataTransformationPreprocessor.transposeOutOfCore`).
 
            :return: absolute path to the correctly formatted output file.
            :rtype: str
            """
-        df = pd.read_csv(self.input, sep=self.dataSeparator, index_col = 0)
+        filename = self.getOutputFile()
+        if self.isOutOfCore():
+            self.transposeOutOfCore(filename)
+        else:
+            self.writeOutput(self.process(self.readInput()), filename)
+        return filename
+
+    def isOutOfCore(self):
+        """Checks if the input data is transposed block by block instead of in memory, i.e. if it must be transposed and a transposeBlockSize is set in the config.
+           Out-of-core transposition only works on files, so the preprocessor cannot be part of a :class:`PreprocessingChain` then.
+
+           :return: true if :meth:`DataTransformationPreprocessor.preprocess` transposes the data out of core.
+           :rtype: bool
+           """
+        return self.transposeMatrix and self.blockSize > 0
+
+    def transposeOutOfCore(self, filename):
+        """Transposes the input data without holding it in memory, for data sets that are larger than the available memory.
+           The input is read in blocks of blockSize rows, and every block is written transposed into a temporary memory-mapped buffer in the output directory, which holds the values in the order of the output file.
+           The output file is then written from the buffer, again in blocks of blockSize rows. Peak memory is determined by the block size instead of the size of the data set, while the buffer needs as much disk space as the values of the data set.
+           The output is the same as when transposing in memory; data sets with non-numeric values are transposed in memory.
+
+           :param filename: absolute path to the output file.
+           :type filename: str
+           """
+        numSamples, numFeatures = benchutils.getInputShape(self.input, self.dataSeparator, False)
+        bufferFile, bufferPath = tempfile.mkstemp(prefix = "tmp_transpose_", suffix = ".buffer", dir = self.output)
+        os.close(bufferFile)
+        try:
+            buffer = np.memmap(bufferPath, dtype = np.float64, mode = "w+", shape = (numSamples, max(1, numFeatures)))
+            samples = None
+            features = None
+            dtypes = []
+            start = 0
+            for block in pd.read_csv(self.input, sep = self.dataSeparator, index_col = 0, chunksize = self.blockSize):
+                if not all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in block.dtypes):
+                    benchutils.logWarning("WARNING: " + self.input + " contains non-numeric values, transpose it in memory.")
+                    self.writeOutput(self.process(self.readInput()), filename)
+                    return
+                if block.shape[1] != numSamples or start + len(block) > numFeatures:
+                    benchutils.logWarning("WARNING: Could not determine the shape of " + self.input + " in advance, transpose it in memory.")
+                    self.writeOutput(self.process(self.readInput()), filename)
+                    return
+                if samples is None:
+                    samples = block.columns
+                    features = block.index
+                else:
+                    features = features.append(block.index)
+                dtypes.extend(block.dtypes)
+                end = start + len(block)
+                buffer[:, start:end] = block.to_numpy(dtype = np.float64).T
+                start = end
+            if samples is None:
+                #no rows at all, nothing to stream
+                self.writeOutput(self.process(self.readInput()), filename)
+                return
+
+            #integer data stays integer when transposing in memory, so convert it back
+            valueType = np.result_type(*dtypes) if dtypes else np.float64
+            with open(filename, "w") as output:
+                for rowStart in range(0, len(samples), self.blockSize):
+                    rowEnd = min(rowStart + self.blockSize, len(samples))
+                    rows = pd.DataFrame(buffer[rowStart:rowEnd, :start], index = samples[rowStart:rowEnd], columns = features)
+                    if valueType != np.float64:
+                        rows = rows.astype(valueType)
+                    rows.to_csv(output, header = rowStart == 0)
+        finally:
+            os.remove(bufferPath)
+
+    def readInput(self):
+        """Reads the input data set with the user-defined separator.
+
+           :return: the input data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
         #ATTENTION: this processing assumes that the data is formatted in a way that header and index are automatically recognized. remove trailing commas/separators at first line of the file for this to be achieved
+        return pd.read_csv(self.input, sep=self.dataSeparator, index_col = 0)
+
+    def process(self, data):
+        """If not already so, transpose a data set to have the features in the columns.
+
+           :param data: the input data set.
+           :type data: :class:`pandas.DataFrame`
+           :return: the correctly formatted data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
         if self.transposeMatrix:
-            df = df.T
+            data = data.T
+        return data
 
+    def getOutputFile(self):
+        """Gets the location of the transposed data set.
+
+           :return: absolute path to the correctly formatted output file.
+           :rtype: str
+           """
         filePrefix = self.input.split("/")[-1].split(".")[
             0]  # split path by / to receive filename, split filename by . to receive filename without ending
-        filename = self.output + filePrefix + "_transposed.csv"
-
-        df.to_csv(filename)
-        return filename
+        return self.output + filePrefix + "_transposed.csv"
 
 class MetaDataPreprocessor(Preprocessor):
     """Add labels to input data.
@@ -200,6 +444,14 @@ class MetaDataPreprocessor(Preprocessor):
         self.separator = separator
         super().__init__(input, metadata, output)
 
+    def getCacheParams(self):
+        """Adds the class label column, metadata orientation and separator to the cache parameters.
+
+           :return: parameters influencing the labeling.
+           :rtype: list of str
+           """
+        return super().getCacheParams() + [self.diseaseColumn, self.transposeMetadataMatrix, self.separator]
+
     def preprocess(self):
         """Labels all samples of a data set.
            Labels are taken from the corresponding metadata file and the metadata attribute that was specified in the config file.
@@ -208,31 +460,80 @@ class MetaDataPreprocessor(Preprocessor):
            :return: absolute path to the labeled data set.
            :rtype: str
            """
-        df = pd.read_csv(self.input, index_col = 0)
-        diseaseCodes = pd.read_csv(self.metadata, sep = self.separator, index_col = 0, quotechar = '"')
+        filename = self.getOutputFile()
+        self.writeOutput(self.process(self.readInput()), filename)
+        return filename
+
+    def process(self, df):
+        """Labels all samples of a data set in memory, see :meth:`preprocessing.MetaDataPreprocessor.preprocess()`.
+
+           :param df: the data set with sample IDs as index.
+           :type df: :class:`pandas.DataFrame`
+           :return: the labeled data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        df.insert(0, column="classLabel", value=self.getLabels(df.index))
 
-        diseaseColumn = []
+        #samples whose class label is empty in the metadata are removed
+        return df.dropna(subset=['classLabel'])
 
+    def getLabels(self, samples):
+        """Gets the class labels of the given samples from the metadata.
+           Samples without metadata information are assigned to class "NotAvailable"; samples whose class label is empty in the metadata get a missing value.
+
+           :param samples: sample IDs.
+           :type samples: :class:`pandas.Index`
+           :return: class label for every sample, in the order of samples.
+           :rtype: :class:`numpy.ndarray`
+           """
+        labels = self.readLabels()
+
+        #match samples by their IDs as text, as the IDs in data and metadata may be parsed as different types
+        labels.index = labels.index.astype(str)
+        labels = labels[~labels.index.duplicated()]
+        sampleIDs = samples.astype(str)
+        found = sampleIDs.isin(labels.index)
+        diseaseColumn = labels.astype(object).reindex(sampleIDs)
+        diseaseColumn[~found] = "NotAvailable"
+
+        missingSamples = list(samples[~found])
+        if missingSamples:
+            benchutils.logWarning("WARNING: No classLabel code found for " + str(len(missingSamples)) + " samples (" + ", ".join(str(sample) for sample in missingSamples[:10])
+                                  + (", ..." if len(missingSamples) > 10 else "") + "). Assign class NotAvailable.")
+        return diseaseColumn.infer_objects().to_numpy()
+
+    def readLabels(self):
+        """Reads the class labels of all samples from the metadata file.
+           If the sample IDs are located in the rows, only the ID and class label column are parsed.
+
+           :return: class label per sample ID; empty if the metadata does not contain the class label attribute.
+           :rtype: :class:`pandas.Series`
+           """
         if self.transposeMetadataMatrix:
-            diseaseCodes = diseaseCodes.T
+            header = pd.read_csv(self.metadata, sep = self.separator, quotechar = '"', nrows = 0).columns
+            if self.diseaseColumn not in header[1:]:
+                benchutils.logWarning("WARNING: Metadata " + self.metadata + " has no attribute " + self.diseaseColumn + ".")
+                return pd.Series(dtype = object)
+            diseaseCodes = pd.read_csv(self.metadata, sep = self.separator, quotechar = '"', usecols = [header[0], self.diseaseColumn], index_col = 0)
+            return diseaseCodes[self.diseaseColumn]
 
-        #iterate through all sample IDs and select the corresponding disease/annotation from the metadata for it
-        for sample in df.index:
-            try:
-                diseaseCode = diseaseCodes[sample][self.diseaseColumn]
-            except:
-                diseaseCode = "NotAvailable"
-                benchutils.logWarning("WARNING: No classLabel code found for sample " + str(sample) + ". Assign class NotAvailable.")
-            diseaseColumn.append(diseaseCode)
+        diseaseCodes = pd.read_csv(self.metadata, sep = self.separator, index_col = 0, quotechar = '"')
+        if self.diseaseColumn not in diseaseCodes.index:
+            benchutils.logWarning("WARNING: Metadata " + self.metadata + " has no attribute " + self.diseaseColumn + ".")
+            return pd.Series(dtype = object)
+        labels = diseaseCodes.loc[self.diseaseColumn]
+        #use the first row if the attribute occurs several times
+        return labels.iloc[0] if isinstance(labels, pd.DataFrame) else labels
 
-        df.insert(0, column="classLabel", value=diseaseColumn)
+    def getOutputFile(self):
+        """Gets the location of the labeled data set.
 
-        df_without_missings = df.dropna(subset=['classLabel'])
+           :return: absolute path to the labeled data set.
+           :rtype: str
+           """
         filePrefix = self.input.split("/")[-1].split(".")[
             0]  # split path by / to receive filename, split filename by . to receive filename without ending
-        filename = self.output + filePrefix + "_withClassLabels.csv"
-        df_without_missings.to_csv(filename)
-        return filename
+        return self.output + filePrefix + "_withClassLabels.csv"
 
 ####### PREPROCESSOR: moves a dataset into its respective folder #######
 class DataMovePreprocessor(Preprocessor):
@@ -257,4 +558,306 @@ class DataMovePreprocessor(Preprocessor):
         os.system("cp " + self.input + " " + self.output)
         return self.output
 
+    def process(self, data):
+        """Keeps the data set as it is, as moving only changes its location.
+
+           :param data: the data set.
+           :type data: :class:`pandas.DataFrame`
+           :return: the unchanged data set.
+           :rtype: :class:`pandas.DataFrame`
+           """
+        return data
+
+    def getOutputFile(self):
+        """Gets the new location of the data set.
+
+           :return: absolute path to the new file location.
+           :rtype: str
+           """
+        return self.output
+
+class PreprocessingChain(Preprocessor):
+    """Runs several preprocessors one after the other in memory, passing the data set from one preprocessor to the next (see :meth:`preprocessing.Preprocessor.process()`) instead of writing and parsing a file after every step.
+       Only the final data set is written to the output file. With snapshots enabled, every preprocessor's output is additionally written to the file the preprocessor would write when running on its own, e.g. for debugging.
+
+       :param preprocessors: the preprocessors in the order they are applied. The first one reads the chain's input file.
+       :type preprocessors: :class:`List` of :class:`Preprocessor`
+       :param output: absolute path to the output file.
+       :type output: str
+       :param snapshots: whether to write the output of every preprocessor.
+       :type snapshots: bool
+       :param data: the input data set if it is already in memory (e.g. the result of a former chain), None to read it from the input file.
+       :type data: :class:`pandas.DataFrame`
+       :param result: the final data set after running the chain, None if the chain was not run (e.g. because its output was cached).
+       :type result: :class:`pandas.DataFrame`
+       """
+    def __init__(self, preprocessors, output, snapshots = False, data = None):
+        self.preprocessors = preprocessors
+        self.snapshots = snapshots
+        self.data = data
+        self.result = None
+        super().__init__(preprocessors[0].input, preprocessors[0].metadata, output)
+
+    def getCacheInputs(self):
+        """Lists the chain's input file and the metadata files of all preprocessors; the input files of later preprocessors are produced by the chain itself.
+
+           :return: absolute paths to all files the chain reads.
+           :rtype: list of str
+           """
+        inputs = [self.input]
+        for preprocessor in self.preprocessors:
+            if preprocessor.metadata is not None and preprocessor.metadata not in inputs:
+                inputs.append(preprocessor.metadata)
+        return inputs
+
+    def getCacheParams(self):
+        """Combines the cache parameters of all preprocessors.
+
+           :return: parameters influencing the chain's output.
+           :rtype: list of str
+           """
+        params = super().getCacheParams()
+        for preprocessor in self.preprocessors:
+            params.extend(preprocessor.getCacheParams())
+        return params
+
+    def preprocess(self):
+        """Applies all preprocessors to the input data set and writes the final data set.
+
+           :return: absolute path to the output file.
+           :rtype: str
+           """
+        data = self.data if self.data is not None else self.preprocessors[0].readInput()
+        for preprocessor in self.preprocessors:
+            data = preprocessor.process(data)
+            if self.snapshots:
+                preprocessor.writeOutput(data, preprocessor.getOutputFile())
+        self.preprocessors[-1].writeOutput(data, self.output)
+        self.result = data
+        return self.output
+
+class FusedPreprocessor(PreprocessingChain):
+    """Transposes, maps, labels, and filters a data set in a single pass over the input file, instead of running these preprocessors one after the other.
+       The input file is read in blocks of rows into a temporary memory-mapped buffer in the output directory of the transformation step, which grows with the number of rows read, so the IDs of the rows are collected along the way.
+       Data sets with features in the rows are transposed from that buffer into a second one, feature block by feature block; class labels are attached and missing values are counted from the buffer, and the analysis-ready data set is written block by block.
+       So the input file is parsed exactly once (apart from its header line) and the output file is written exactly once, while memory is bounded by the block size (the config's transposeBlockSize, or BLOCK_SIZE if it is not set).
+       The output is the same as the one of a :class:`PreprocessingChain` of the same preprocessors; data sets with non-numeric values are preprocessed by that chain instead.
+
+       :param dataFormatter: the preprocessor defining the orientation and separator of the input file.
+       :type dataFormatter: :class:`DataTransformationPreprocessor`
+       :param mappingPreprocessor: the preprocessor defining the identifier formats.
+       :type mappingPreprocessor: :class:`MappingPreprocessor`
+       :param metadataAnnotator: the preprocessor providing the class labels.
+       :type metadataAnnotator: :class:`MetaDataPreprocessor`
+       :param filterPreprocessor: the preprocessor defining how to filter missing values.
+       :type filterPreprocessor: :class:`FilterPreprocessor`
+       :param output: absolute path to the output file.
+       :type output: str
+       """
+    #number of rows that are read and written at a time if no transposeBlockSize is set in the config
+    BLOCK_SIZE = 1000
+
+    def __init__(self, dataFormatter, mappingPreprocessor, metadataAnnotator, filterPreprocessor, output):
+        super().__init__([dataFormatter, mappingPreprocessor, metadataAnnotator, filterPreprocessor], output)
+
+    def preprocess(self):
+        """Transposes, maps, labels, and filters the input data set and writes the analysis-ready data set.
+
+           :return: absolute path to the output file.
+           :rtype: str
+           """
+        dataFormatter, mappingPreprocessor, metadataAnnotator, filterPreprocessor = self.preprocessors
+        blockSize = dataFormatter.blockSize if dataFormatter.blockSize > 0 else self.BLOCK_SIZE
+        mapping = mappingPreprocessor.currentFormat != mappingPreprocessor.desiredFormat
+
+        #IDs of the columns of the input file, parsing only its header line; the IDs of the rows are collected while reading the values
+        header = pd.read_csv(self.input, sep = dataFormatter.dataSeparator, index_col = 0, nrows = 0)
+        bufferPaths = []
+        try:
+            bufferPaths.append(self.createBufferFile())
+            blocks = self.readBlocks(bufferPaths[0], blockSize, header)
+            if blocks is None:
+                benchutils.logWarning("WARNING: " + self.input + " contains non-numeric values or could not be read block by block, preprocess it in memory.")
+                return super().preprocess()
+            buffer, rowIDs, dtypes = blocks
+
+            if dataFormatter.transposeMatrix:
+                samples, features = header.columns.rename(None), rowIDs
+            else:
+                #mapping transposes the data set, which drops the name of the sample IDs
+                samples, features = rowIDs.rename(None) if mapping else rowIDs, header.columns
+            if mapping:
+                targets = benchutils.mapFeaturePositions(list(features), mappingPreprocessor.currentFormat, mappingPreprocessor.desiredFormat)
+                positions = np.array([position for position, _ in targets], dtype = int)
+                featureNames = pd.Index([name for _, name in targets])
+            else:
+                positions = np.arange(len(features))
+                featureNames = features
+            valueTypes = self.getValueTypes(dtypes, positions, mapping)
+            labels = metadataAnnotator.getLabels(samples)
+
+            if dataFormatter.transposeMatrix:
+                bufferPaths.append(self.createBufferFile())
+                buffer = self.transposeBuffer(buffer, bufferPaths[1], blockSize, len(samples), positions)
+                columns = np.arange(len(positions))
+            else:
+                columns = positions
+            #samples whose class label is empty in the metadata are removed
+            keptSamples, keptFeatures = self.filterBuffer(buffer, blockSize, ~pd.isna(labels), columns)
+            self.writeBlocks(buffer, blockSize, samples[keptSamples], np.flatnonzero(keptSamples), labels[keptSamples],
+                             featureNames[keptFeatures], columns[keptFeatures], [valueTypes[i] for i in np.flatnonzero(keptFeatures)])
+        finally:
+            for bufferPath in bufferPaths:
+                os.remove(bufferPath)
+        self.result = None
+        return self.output
+
+    def createBufferFile(self):
+        """Creates an empty temporary file for a buffer in the output directory of the transformation step.
 
+           :return: absolute path to the buffer file.
+           :rtype: str
+           """
+        bufferFile, bufferPath = tempfile.mkstemp(prefix = "tmp_fused_", suffix = ".buffer", dir = self.preprocessors[0].output)
+        os.close(bufferFile)
+        return bufferPath
+
+    def readBlocks(self, bufferPath, blockSize, header):
+        """Reads the input file block by block and writes its values into a buffer with the rows and columns of the input file.
+           The buffer's capacity is doubled whenever it is full, as the number of rows is not known before the file was read.
+
+           :param bufferPath: absolute path to the buffer file.
+           :type bufferPath: str
+           :param blockSize: number of rows to read at a time.
+           :type blockSize: int
+           :param header: the header of the input file (without rows).
+           :type header: :class:`pandas.DataFrame`
+           :return: the buffer, the IDs of the rows, and the value types of every block's columns, None if the input file cannot be read block by block.
+           :rtype: tuple(:class:`numpy.memmap`, :class:`pandas.Index`, :class:`List` of lists of :class:`numpy.dtype`)
+           """
+        numColumns = len(header.columns)
+        buffer = np.memmap(bufferPath, dtype = np.float64, mode = "w+", shape = (blockSize, max(1, numColumns)))
+        rowIDs = []
+        dtypes = []
+        start = 0
+        for block in pd.read_csv(self.input, sep = self.preprocessors[0].dataSeparator, index_col = 0, chunksize = blockSize):
+            if block.shape[1] != numColumns or not all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in block.dtypes):
+                return None
+            end = start + len(block)
+            if end > buffer.shape[0]:
+                buffer.flush()
+                #opening the buffer file with a larger shape extends it, keeping the values read so far
+                buffer = np.memmap(bufferPath, dtype = np.float64, mode = "r+", shape = (max(end, 2 * buffer.shape[0]), buffer.shape[1]))
+            buffer[start:end, :numColumns] = block.to_numpy(dtype = np.float64)
+            rowIDs.append(block.index)
+            dtypes.append(list(block.dtypes))
+            start = end
+        rowIDs = rowIDs[0].append(rowIDs[1:]) if rowIDs else header.index
+        return buffer, rowIDs, dtypes
+
+    def getValueTypes(self, dtypes, positions, mapping):
+        """Determines the type of the values of every mapped feature, as the preprocessors of a :class:`PreprocessingChain` would read and convert them.
+
+           :param dtypes: value types of every block's columns, as returned by :meth:`FusedPreprocessor.readBlocks`.
+           :type dtypes: :class:`List` of lists of :class:`numpy.dtype`
+           :param positions: position of every mapped feature among the features of the input file.
+           :type positions: :class:`numpy.ndarray`
+           :param mapping: whether the features are mapped, which (like transposing) converts all values to a common type.
+           :type mapping: bool
+           :return: type of the values of every mapped feature.
+           :rtype: :class:`List` of :class:`numpy.dtype`
+           """
+        if not dtypes:
+            return [np.dtype(np.float64)] * len(positions)
+        if self.preprocessors[0].transposeMatrix or mapping:
+            #transposing or mapping the data set converts all values to their common type
+            return [np.result_type(*[dtype for blockTypes in dtypes for dtype in blockTypes])] * len(positions)
+        columnTypes = [np.result_type(*column) for column in zip(*dtypes)]
+        return [columnTypes[position] for position in positions]
+
+    def transposeBuffer(self, buffer, bufferPath, blockSize, numSamples, positions):
+        """Copies the values of all mapped features from a buffer with features in the rows into a new buffer with samples in the rows, block of features by block of features.
+
+           :param buffer: buffer with the values of the input file (features x samples).
+           :type buffer: :class:`numpy.memmap`
+           :param bufferPath: absolute path to the file of the new buffer.
+           :type bufferPath: str
+           :param blockSize: number of features to copy at a time.
+           :type blockSize: int
+           :param numSamples: number of samples.
+           :type numSamples: int
+           :param positions: row of every mapped feature in the buffer.
+           :type positions: :class:`numpy.ndarray`
+           :return: the new buffer (samples x mapped features).
+           :rtype: :class:`numpy.memmap`
+           """
+        transposed = np.memmap(bufferPath, dtype = np.float64, mode = "w+", shape = (max(1, numSamples), max(1, len(positions))))
+        for start in range(0, len(positions), blockSize):
+            transposed[:numSamples, start:start + blockSize] = buffer[positions[start:start + blockSize], :numSamples].T
+        return transposed
+
+    def filterBuffer(self, buffer, blockSize, labeled, columns):
+        """Determines the samples and features to keep, like :meth:`FilterPreprocessor.filterMissings`.
+
+           :param buffer: buffer with the values, with samples in the rows.
+           :type buffer: :class:`numpy.memmap`
+           :param blockSize: number of samples to count at a time.
+           :type blockSize: int
+           :param labeled: whether every sample has a class label.
+           :type labeled: :class:`numpy.ndarray`
+           :param columns: column of every mapped feature in the buffer.
+           :type columns: :class:`numpy.ndarray`
+           :return: whether to keep every sample and every mapped feature.
+           :rtype: tuple(:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+           """
+        filterPreprocessor = self.preprocessors[-1]
+        threshold = filterPreprocessor.config["threshold"]
+        keptSamples = np.asarray(labeled, dtype = bool).copy()
+        keptFeatures = np.ones(len(columns), dtype = bool)
+        rows = np.flatnonzero(keptSamples)
+
+        if filterPreprocessor.config.getboolean("filterMissingsInGenes"):
+            missing = np.zeros(len(columns), dtype = int)
+            for start in range(0, len(rows), blockSize):
+                values = buffer[rows[start:start + blockSize]][:, columns]
+                missing += (np.isnan(values) | (values == 0)).sum(axis = 0)
+            keptFeatures = len(rows) - missing > filterPreprocessor.getMinNonMissing(threshold, len(rows))
+
+        if filterPreprocessor.config.getboolean("filterMissingsInSamples"):
+            columnNumber = int(keptFeatures.sum())
+            for start in range(0, len(rows), blockSize):
+                values = buffer[rows[start:start + blockSize]][:, columns[keptFeatures]]
+                missing = (np.isnan(values) | (values == 0)).sum(axis = 1)
+                keptSamples[rows[start:start + blockSize]] = columnNumber - missing > filterPreprocessor.getMinNonMissing(threshold, columnNumber)
+        return keptSamples, keptFeatures
+
+    def writeBlocks(self, buffer, blockSize, samples, rows, labels, featureNames, columns, valueTypes):
+        """Writes the labeled and filtered data set from the buffer, block by block.
+
+           :param buffer: buffer with the values, with samples in the rows.
+           :type buffer: :class:`numpy.memmap`
+           :param blockSize: number of samples to write at a time.
+           :type blockSize: int
+           :param samples: IDs of the samples to write.
+           :type samples: :class:`pandas.Index`
+           :param rows: rows of the samples to write in the buffer.
+           :type rows: :class:`numpy.ndarray`
+           :param labels: class labels of the samples to write.
+           :type labels: :class:`numpy.ndarray`
+           :param featureNames: names of the features to write.
+           :type featureNames: :class:`pandas.Index`
+           :param columns: columns of the features to write in the buffer.
+           :type columns: :class:`numpy.ndarray`
+           :param valueTypes: type of the values of every feature to write.
+           :type valueTypes: :class:`List` of :class:`numpy.dtype`
+           """
+        #name the sample IDs like pandas names unnamed columns, as when reading the labeled file without index
+        samples = samples.rename(samples.name if samples.name is not None else "Unnamed: 0")
+        changedTypes = {featureNames[i]: valueType for i, valueType in enumerate(valueTypes) if valueType != np.float64}
+        with open(self.output, "w") as output:
+            for start in range(0, max(1, len(rows)), blockSize):
+                block = pd.DataFrame(buffer[rows[start:start + blockSize]][:, columns], index = samples[start:start + blockSize], columns = featureNames)
+                if changedTypes:
+                    block = block.astype(changedTypes)
+                block.insert(0, "classLabel", labels[start:start + blockSize])
+                block.to_csv(output, header = start == 0)
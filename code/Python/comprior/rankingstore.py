@@ -0,0 +1,195 @@
+import os, sqlite3
+import pandas as pd
+import benchutils
+
+#seconds to wait for another process that is writing to the repository
+LOCK_TIMEOUT = 60.0
+#top k features that were already queried by this process, by ranking file, file version, and k
+topKCache = {}
+
+
+def getRepositoryPath(rankingsDir):
+    """Gets the location of the ranking repository of a rankings directory, e.g. geneRankings.db for geneRankings/.
+       The repository is located next to the directory, so that it is not mistaken for a ranking.
+
+       :param rankingsDir: absolute path to the directory that contains the ranking files.
+       :type rankingsDir: str
+       :return: absolute path to the repository's database file.
+       :rtype: str
+       """
+    return os.path.normpath(rankingsDir) + ".db"
+
+
+class RankingRepository():
+    """Stores the rankings of all methods of a rankings directory in a single indexed database (SQLite), with one row per ranked feature containing its rank and score.
+       Evaluations query the top k features of a ranking, or look up the ranks of given features across methods, without parsing the whole ranking file every time.
+       The ranking files written by the selectors (in Python, R, or Java) stay the source of the rankings and are kept as export: a ranking is (re-)imported from its file whenever the file is newer than the repository's copy, e.g. because the selector ran again or on a remote worker.
+
+       :param rankingsDir: absolute path to the directory that contains the ranking files (<method>.csv).
+       :type rankingsDir: str
+       :param repositoryFile: absolute path to the database file, defaults to :func:`getRepositoryPath` of the rankings directory.
+       :type repositoryFile: str
+       """
+    def __init__(self, rankingsDir, repositoryFile = None):
+        self.rankingsDir = rankingsDir
+        self.repositoryFile = repositoryFile if repositoryFile is not None else getRepositoryPath(rankingsDir)
+        self.connection = sqlite3.connect(self.repositoryFile, timeout = LOCK_TIMEOUT, isolation_level = None)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS sources (method TEXT PRIMARY KEY, modified REAL, size INTEGER, featureColumn TEXT, scoreColumn TEXT)")
+        #features are stored with the type they are parsed with from the ranking file (e.g. integer gene IDs), so no type affinity
+        self.connection.execute("CREATE TABLE IF NOT EXISTS rankings (method TEXT, rank INTEGER, feature, score, PRIMARY KEY (method, rank)) WITHOUT ROWID")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS featureIndex ON rankings (method, feature)")
+        super().__init__()
+
+    def close(self):
+        """Closes the connection to the database.
+           """
+        self.connection.close()
+
+    def getRankingFile(self, method):
+        """Gets the location of a method's ranking file.
+
+           :param method: selection method.
+           :type method: str
+           :return: absolute path to the ranking file.
+           :rtype: str
+           """
+        return os.path.join(self.rankingsDir, method + ".csv")
+
+    def listMethods(self):
+        """Lists all methods that have a ranking file in the rankings directory.
+
+           :return: method names, in the order of the directory listing.
+           :rtype: :class:`List` of str
+           """
+        methods = []
+        for file in os.listdir(self.rankingsDir):
+            if os.path.isfile(os.path.join(self.rankingsDir, file)):
+                methods.append(file.split(".")[0])  # get method name from filename without ending
+        return methods
+
+    def update(self, method):
+        """Imports a method's ranking file unless the repository's copy is up to date.
+
+           :param method: selection method.
+           :type method: str
+           :return: names of the feature and score column of the ranking file.
+           :rtype: tuple(str, str)
+           """
+        stat = os.stat(self.getRankingFile(method))
+        source = self.getSource(method, stat)
+        if source is not None:
+            return source
+
+        ranking = benchutils.loadRanking(self.getRankingFile(method))
+        columns = list(ranking.columns) + ["score"] * (2 - len(ranking.columns))
+        features = ranking[columns[0]].tolist()
+        scores = ranking[columns[1]].tolist() if columns[1] in ranking.columns else [None] * len(features)
+        rows = [(method, rank, toSqlValue(feature), toSqlValue(score)) for rank, (feature, score) in enumerate(zip(features, scores), 1)]
+        #replace the ranking in one transaction, so that concurrent readers see either the old or the new ranking
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            #another process may have imported the ranking while we were waiting for the transaction
+            source = self.getSource(method, stat)
+            if source is not None:
+                self.connection.execute("COMMIT")
+                return source
+            self.connection.execute("DELETE FROM rankings WHERE method = ?", (method,))
+            self.connection.executemany("INSERT INTO rankings (method, rank, feature, score) VALUES (?, ?, ?, ?)", rows)
+            self.connection.execute("INSERT OR REPLACE INTO sources (method, modified, size, featureColumn, scoreColumn) VALUES (?, ?, ?, ?, ?)",
+                                    (method, stat.st_mtime, stat.st_size, str(columns[0]), str(columns[1])))
+            self.connection.execute("COMMIT")
+        except:
+            self.connection.execute("ROLLBACK")
+            raise
+        benchutils.logDebug("DEBUG: Imported ranking of " + method + " (" + str(len(rows)) + " features) into " + self.repositoryFile)
+        return str(columns[0]), str(columns[1])
+
+    def getSource(self, method, stat):
+        """Gets the column names of a method's ranking if the repository's copy was imported from the current version of the ranking file.
+
+           :param method: selection method.
+           :type method: str
+           :param stat: status of the ranking file (see :func:`os.stat`).
+           :type stat: :class:`os.stat_result`
+           :return: names of the feature and score column, None if the ranking must be imported.
+           :rtype: tuple(str, str)
+           """
+        source = self.connection.execute("SELECT modified, size, featureColumn, scoreColumn FROM sources WHERE method = ?", (method,)).fetchone()
+        if source is not None and source[0] == stat.st_mtime and source[1] == stat.st_size:
+            return source[2], source[3]
+        return None
+
+    def getTopK(self, method, k = None):
+        """Gets the k highest ranked features of a method.
+           If k is larger than the ranking, the whole ranking is returned.
+           Results are memoized per ranking file and k within a process, so evaluators asking for the same top k features again do not query or parse anything.
+
+           :param method: selection method.
+           :type method: str
+           :param k: number of features, None for all features.
+           :type k: int
+           :return: feature names in the order of the ranking.
+           :rtype: :class:`pandas.Series`
+           """
+        rankingFile = self.getRankingFile(method)
+        stat = os.stat(rankingFile)
+        #the file version is part of the key, so rankings that are written again are queried again
+        key = (os.path.abspath(rankingFile), stat.st_mtime, stat.st_size, k)
+        if key not in topKCache:
+            topKCache[key] = self.queryTopK(method, k, stat)
+        return topKCache[key].copy()
+
+    def queryTopK(self, method, k, stat):
+        """Queries the k highest ranked features of a method (see :meth:`RankingRepository.getTopK`).
+           If the ranking was not imported yet, only the first k rows of its file are parsed instead of importing the whole ranking.
+
+           :param method: selection method.
+           :type method: str
+           :param k: number of features, None for all features.
+           :type k: int
+           :param stat: status of the ranking file (see :func:`os.stat`).
+           :type stat: :class:`os.stat_result`
+           :return: feature names in the order of the ranking.
+           :rtype: :class:`pandas.Series`
+           """
+        if k is not None and self.getSource(method, stat) is None:
+            ranking = benchutils.loadRanking(self.getRankingFile(method), max(0, k))
+            return ranking[ranking.columns[0]].reset_index(drop = True)
+        featureColumn, _ = self.update(method)
+        limit = max(0, k) if k is not None else -1
+        rows = self.connection.execute("SELECT feature FROM rankings WHERE method = ? ORDER BY rank LIMIT ?", (method, limit)).fetchall()
+        return pd.Series([row[0] for row in rows], name = featureColumn, dtype = None if rows else object)
+
+    def getRanks(self, method, features):
+        """Looks up the ranks of the given features in a method's ranking, e.g. to compare the ranks of features across methods (see :meth:`evaluation.RankingsEvaluator.loadGeneRanks`).
+
+           :param method: selection method.
+           :type method: str
+           :param features: names of the features to look up.
+           :type features: :class:`List` of str
+           :return: rank (starting at 1) for every given feature that is part of the ranking.
+           :rtype: dict
+           """
+        self.update(method)
+        ranks = {}
+        features = [toSqlValue(feature) for feature in features]
+        #stay below SQLite's limit of variables per query
+        for start in range(0, len(features), 500):
+            batch = features[start:start + 500]
+            query = "SELECT feature, rank FROM rankings WHERE method = ? AND feature IN (" + ",".join(["?"] * len(batch)) + ")"
+            ranks.update(self.connection.execute(query, [method] + batch).fetchall())
+        return ranks
+
+def toSqlValue(value):
+    """Converts a value of a ranking (e.g. a numpy number) to the corresponding Python type that can be stored in the database.
+
+       :param value: feature name or score.
+       :type value: object
+       :return: the value as Python type, None for missing values.
+       :rtype: object
+       """
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
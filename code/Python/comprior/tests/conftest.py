@@ -0,0 +1,29 @@
+import os, sys
+import pytest
+
+#the Comprior modules import each other by their module names, as when running them from the comprior directory
+COMPRIOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, COMPRIOR_DIR)
+
+import benchutils
+
+CONFIG_FILE = os.path.join(COMPRIOR_DIR, "..", "..", "configs", "config.ini")
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Loads the default config with all data directories located in a temporary directory, and restores the former config afterwards.
+
+       :return: absolute path to the temporary Comprior installation.
+       :rtype: str
+       """
+    homePath = str(tmp_path / "comprior") + "/"
+    os.makedirs(homePath)
+    overrideFile = str(tmp_path / "test.ini")
+    with open(overrideFile, "w") as f:
+        f.write("[General]\nhomePath = " + homePath + "\n")
+
+    formerConfig, formerConfigPaths = benchutils.config, benchutils.configPaths
+    benchutils.loadConfig([os.path.abspath(CONFIG_FILE), overrideFile])
+    yield homePath
+    benchutils.config, benchutils.configPaths = formerConfig, formerConfigPaths
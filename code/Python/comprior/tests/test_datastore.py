@@ -0,0 +1,74 @@
+import os
+import numpy as np
+import pandas as pd
+import benchutils
+import datastore
+
+
+def writeDataset(dataFile):
+    data = pd.DataFrame({datastore.LABEL_COLUMN: ["tumor", "normal", "tumor"],
+                         "TP53": [1.5, 2.0, np.nan], "BRCA1": [0, 3, 1], "EGFR": [0.25, -1.0, 4.0]},
+                        index = pd.Index(["S1", "S2", "S3"], name = "sample"))
+    data.to_csv(dataFile)
+    return pd.read_csv(dataFile, index_col = 0)
+
+def makeOlder(path, seconds = 10):
+    for root, directories, files in os.walk(path):
+        for name in directories + files:
+            modified = os.path.getmtime(os.path.join(root, name)) - seconds
+            os.utime(os.path.join(root, name), (modified, modified))
+
+
+def test_store_round_trip(tmp_path):
+    dataFile = str(tmp_path / "data.csv")
+    expected = writeDataset(dataFile)
+    assert datastore.writeStore(dataFile) == datastore.getStorePath(dataFile)
+    assert datastore.isStoreAvailable(dataFile)
+
+    pd.testing.assert_frame_equal(datastore.loadDataset(dataFile), expected, check_dtype = False)
+    pd.testing.assert_frame_equal(datastore.loadDataset(dataFile, attach = True), expected, check_dtype = False)
+    assert datastore.loadFeatureNames(dataFile) == ["TP53", "BRCA1", "EGFR"]
+    #only the requested features are loaded, in the order of the data set
+    pd.testing.assert_frame_equal(datastore.loadDataset(dataFile, ["EGFR", "TP53", "unknown"]),
+                                  expected[[datastore.LABEL_COLUMN, "TP53", "EGFR"]], check_dtype = False)
+    withSamples = datastore.loadDataset(dataFile, sampleColumn = True)
+    assert list(withSamples.columns[:2]) == ["sample", datastore.LABEL_COLUMN]
+
+def test_store_older_than_csv_is_ignored(tmp_path):
+    dataFile = str(tmp_path / "data.csv")
+    writeDataset(dataFile)
+    datastore.writeStore(dataFile)
+    makeOlder(datastore.getStorePath(dataFile))
+
+    #the CSV file is overwritten after the store was written, e.g. when it is restored from the stage cache
+    changed = pd.DataFrame({datastore.LABEL_COLUMN: ["normal"], "MYC": [7.0]}, index = pd.Index(["S9"], name = "sample"))
+    changed.to_csv(dataFile)
+    assert not datastore.isStoreAvailable(dataFile)
+    pd.testing.assert_frame_equal(datastore.loadDataset(dataFile), pd.read_csv(dataFile, index_col = 0))
+    assert datastore.loadFeatureNames(dataFile) == ["MYC"]
+
+def test_cleanup_removes_stores(tmp_path):
+    directory = str(tmp_path / "ready") + "/"
+    os.makedirs(directory)
+    for name in ["a", "b_X", "c"]:
+        writeDataset(directory + name + ".csv")
+    datastore.writeStore(directory + "a.csv")
+    open(directory + ".gitignore", "w").close()
+
+    #without recursion, subdirectories are kept but all files are removed
+    benchutils.removeDirectoryContent(directory)
+    assert sorted(os.listdir(directory)) == [".gitignore", "a" + datastore.STORE_SUFFIX]
+
+    benchutils.removeDirectoryContent(directory, True)
+    assert os.listdir(directory) == [".gitignore"]
+    #missing directories are nothing to remove
+    benchutils.removeDirectoryContent(str(tmp_path / "missing") + "/", True)
+
+def test_cleanup_results_removes_filtered_views(config):
+    viewsDir = benchutils.getConfigValue("General", "intermediateDir") + "filteredViews/"
+    os.makedirs(viewsDir)
+    writeDataset(viewsDir + "view.csv")
+    datastore.writeStore(viewsDir + "view.csv")
+
+    benchutils.cleanupResults()
+    assert os.listdir(viewsDir) == []
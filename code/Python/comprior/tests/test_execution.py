@@ -0,0 +1,113 @@
+import os, time
+import pytest
+import execution
+
+#tasks run in separate processes, so they report what they did through files
+
+
+def appendName(logFile, name, delay = 0):
+    time.sleep(delay)
+    with open(logFile, "a") as f:
+        f.write(name + "\n")
+    return name
+
+def fail():
+    raise RuntimeError("task failed on purpose")
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+def failOnce(flagFile):
+    if not os.path.isfile(flagFile):
+        open(flagFile, "w").close()
+        raise RuntimeError("task failed on purpose")
+    return "done"
+
+def readLog(logFile):
+    if not os.path.isfile(logFile):
+        return []
+    with open(logFile, "r") as f:
+        return [line.strip() for line in f]
+
+
+def test_dependencies_run_in_order(config, tmp_path):
+    logFile = str(tmp_path / "order.log")
+    scheduler = execution.StageScheduler(3, str(tmp_path))
+    #added in reverse order and with higher priority, so only the dependencies can enforce the order
+    scheduler.addTask("c", appendName, (logFile, "c"), dependencies = ["b"], priority = 2)
+    scheduler.addTask("b", appendName, (logFile, "b"), dependencies = ["a"], priority = 1)
+    scheduler.addTask("a", appendName, (logFile, "a", 0.5))
+    results = scheduler.run()
+
+    assert readLog(logFile) == ["a", "b", "c"]
+    assert results == {"a": "a", "b": "b", "c": "c"}
+    assert scheduler.failures == {}
+
+def test_failed_dependency_skips_dependents(config, tmp_path):
+    logFile = str(tmp_path / "order.log")
+    scheduler = execution.StageScheduler(2, str(tmp_path))
+    scheduler.addTask("fail", fail)
+    scheduler.addTask("child", appendName, (logFile, "child"), dependencies = ["fail"])
+    scheduler.addTask("grandchild", appendName, (logFile, "grandchild"), dependencies = ["child"])
+    #waiting for a task does not require it to succeed
+    scheduler.addTask("cleanup", appendName, (logFile, "cleanup"), waitFor = ["fail"])
+    scheduler.addTask("independent", appendName, (logFile, "independent"))
+    results = scheduler.run()
+
+    assert list(scheduler.failures.keys()) == ["fail"]
+    assert "task failed on purpose" in scheduler.failures["fail"]
+    assert sorted(scheduler.skipped) == ["child", "grandchild"]
+    assert results == {"cleanup": "cleanup", "independent": "independent"}
+    assert sorted(readLog(logFile)) == ["cleanup", "independent"]
+
+def test_cyclic_dependencies(config, tmp_path):
+    scheduler = execution.StageScheduler(2, str(tmp_path))
+    scheduler.addTask("a", sleep, (0,), dependencies = ["b"])
+    scheduler.addTask("b", sleep, (0,), dependencies = ["a"])
+    with pytest.raises(ValueError, match = "Cyclic task dependencies"):
+        scheduler.run()
+
+def test_unknown_dependency(config, tmp_path):
+    scheduler = execution.StageScheduler(2, str(tmp_path))
+    scheduler.addTask("a", sleep, (0,), dependencies = ["missing"])
+    with pytest.raises(ValueError, match = "unknown task missing"):
+        scheduler.run()
+
+def test_wall_time_cancels_task(config, tmp_path):
+    scheduler = execution.StageScheduler(2, str(tmp_path))
+    scheduler.addTask("slow", sleep, (60,), wallTime = 1)
+    scheduler.addTask("fast", sleep, (0,))
+    start = time.time()
+    results = scheduler.run()
+
+    assert time.time() - start < 30
+    assert results == {"fast": 0}
+    assert "slow" in scheduler.failures
+    assert "wall-clock time limit" in scheduler.timeouts["slow"]
+
+def test_resume_from_journal(config, tmp_path):
+    journal = str(tmp_path / "journal.txt")
+    logFile = str(tmp_path / "order.log")
+    flagFile = str(tmp_path / "failed")
+
+    def addTasks(scheduler):
+        scheduler.addTask("a", appendName, (logFile, "a"))
+        scheduler.addTask("b", failOnce, (flagFile,), dependencies = ["a"])
+        scheduler.addTask("c", appendName, (logFile, "c"), dependencies = ["b"])
+
+    scheduler = execution.StageScheduler(2, str(tmp_path), journal = journal)
+    addTasks(scheduler)
+    scheduler.run()
+    assert list(scheduler.failures.keys()) == ["b"]
+    assert scheduler.skipped == ["c"]
+    assert readLog(journal) == ["a"]
+
+    #the resumed run only runs the tasks that did not finish successfully before
+    scheduler = execution.StageScheduler(2, str(tmp_path), journal = journal)
+    addTasks(scheduler)
+    results = scheduler.run(lambda name, journaled: name in journaled)
+    assert scheduler.completed == ["a"]
+    assert results == {"b": "done", "c": "c"}
+    assert readLog(logFile) == ["a", "c"]
+    assert sorted(readLog(journal)) == ["a", "b", "c"]
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+import datastore
+import genestatistics
+
+stats = pytest.importorskip("scipy.stats")
+
+
+def createDataset(missingValues = False):
+    random = np.random.RandomState(3)
+    labels = ["tumor"] * 13 + ["normal"] * 11 + ["metastasis"] * 6
+    data = pd.DataFrame({"normal": random.normal(size = len(labels)),
+                         #values far from 0, whose sums of squares are large compared to their variance
+                         "offset": 100 + random.normal(scale = 0.5, size = len(labels)),
+                         "integer": random.randint(0, 5, size = len(labels)),
+                         "shifted": random.normal(size = len(labels)) + np.repeat([0.0, 1.0, 3.0], [13, 11, 6]),
+                         "constant": np.full(len(labels), 0.1)})
+    if missingValues:
+        data.iloc[[2, 20], 0] = np.nan
+    data.insert(0, datastore.LABEL_COLUMN, labels)
+    return data
+
+def referenceAnova(data):
+    #one-way ANOVA from the deviations of the values from their class means and from the overall mean
+    labels = data[datastore.LABEL_COLUMN]
+    classes = sorted(set(labels))
+    fValues = {}
+    for feature in data.columns[1:]:
+        values = data[feature].to_numpy(dtype = np.float64)
+        groups = [values[(labels == label).to_numpy()] for label in classes]
+        betweenSquares = sum(len(group) * (group.mean() - values.mean()) ** 2 for group in groups)
+        withinSquares = sum(((group - group.mean()) ** 2).sum() for group in groups)
+        fValues[feature] = (betweenSquares / (len(classes) - 1)) / (withinSquares / (len(values) - len(classes)))
+    return pd.Series(fValues), len(classes) - 1, len(labels) - len(classes)
+
+def roundTrip(tmp_path, data):
+    dataFile = str(tmp_path / "data.csv")
+    data.to_csv(dataFile)
+    genestatistics.writeStatistics(dataFile, data)
+    return genestatistics.loadStatistics(dataFile)
+
+
+def test_summary_matches_reference(tmp_path):
+    data = createDataset(missingValues = True)
+    statistics = roundTrip(tmp_path, data)
+    values = data.iloc[:, 1:]
+
+    assert list(statistics.index) == list(values.columns)
+    np.testing.assert_array_equal(statistics["missing"], values.isna().sum())
+    #variance as computed by VarianceThreshold (population variance), ignoring missing values; constant features have exactly 0 instead of rounding errors
+    np.testing.assert_allclose(statistics["variance"], [np.var(values[feature].dropna()) for feature in values.columns], rtol = 1e-10, atol = 1e-20)
+    np.testing.assert_allclose(statistics["mean"], values.mean(), rtol = 1e-10)
+    np.testing.assert_allclose(statistics["median"], values.median(), rtol = 1e-10)
+    assert statistics.loc["constant", "variance"] == 0
+    for label in genestatistics.getClasses(statistics):
+        classValues = values[data[datastore.LABEL_COLUMN] == label]
+        np.testing.assert_array_equal(statistics["count_" + label], classValues.count())
+        np.testing.assert_allclose(statistics["sum_" + label], classValues.sum(), rtol = 1e-10)
+        np.testing.assert_allclose(statistics["sumSquares_" + label], (classValues ** 2).sum(), rtol = 1e-10)
+
+def test_compact_variance_matches_reference():
+    data = createDataset()
+    statistics = genestatistics.computeStatistics(data, compact = True)
+    compactValues = data.iloc[:, 1:].to_numpy(dtype = np.float32).astype(np.float64)
+    np.testing.assert_allclose(statistics["variance"], np.var(compactValues, axis = 0), rtol = 1e-10, atol = 1e-20)
+
+def test_anova_matches_reference(tmp_path):
+    data = createDataset()
+    fValues, pValues = genestatistics.computeAnova(roundTrip(tmp_path, data))
+    expected, degreesBetween, degreesWithin = referenceAnova(data)
+
+    features = ["normal", "offset", "integer", "shifted"]
+    np.testing.assert_allclose(fValues[features], expected[features], rtol = 1e-6)
+    np.testing.assert_allclose(pValues[features], stats.f.sf(expected[features], degreesBetween, degreesWithin), rtol = 1e-6)
+    assert fValues["shifted"] > fValues["normal"]
+    #the F-value of constant features is undefined, as in f_classif
+    assert np.isnan(fValues["constant"])
+
+def test_anova_needs_labels_without_missing_values():
+    assert genestatistics.computeAnova(genestatistics.computeStatistics(createDataset(missingValues = True))) is None
+    assert genestatistics.computeAnova(genestatistics.computeStatistics(createDataset().iloc[:, 1:])) is None
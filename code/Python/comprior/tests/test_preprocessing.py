@@ -0,0 +1,86 @@
+import os, filecmp
+import numpy as np
+import pandas as pd
+import pytest
+import benchutils
+import preprocessing
+
+SAMPLES = ["S" + str(i) for i in range(23)]
+GENES = ["G" + str(i) for i in range(41)]
+
+
+def mapIdentifiers(itemList, originalFormat, desiredFormat):
+    #some identifiers cannot be mapped, some are mapped to the same identifier, and some to several identifiers
+    rows = []
+    for position, item in enumerate(itemList):
+        if position % 7 == 3:
+            continue
+        rows.append((item, "M" + str(position // 2)))
+        if position % 5 == 0:
+            rows.append((item, "X" + str(position)))
+    return pd.DataFrame(rows, columns = [originalFormat, desiredFormat])
+
+def writeDataset(dataFile, kind, genesInColumns):
+    random = np.random.RandomState(1)
+    if kind == "integer":
+        values = random.randint(0, 4, size = (len(SAMPLES), len(GENES)))
+    else:
+        values = random.normal(size = (len(SAMPLES), len(GENES)))
+        values[random.rand(*values.shape) < 0.2] = np.nan
+        values[random.rand(*values.shape) < 0.1] = 0
+    data = pd.DataFrame(values, index = pd.Index(SAMPLES, name = "sample"), columns = GENES)
+    if kind == "mixed":
+        data["G5"] = random.randint(0, 3, size = len(SAMPLES))
+    if not genesInColumns:
+        data = data.T
+        data.index.name = "gene"
+    data.to_csv(dataFile, sep = "\t")
+
+def writeMetadata(metadataFile):
+    #some samples have no class label or no metadata at all
+    labels = [("A" if i % 3 else "B") if i % 5 else None for i in range(len(SAMPLES))]
+    metadata = pd.DataFrame({"diagnosis": labels}, index = SAMPLES).drop(SAMPLES[7])
+    metadata.to_csv(metadataFile, sep = "\t")
+
+def createPreprocessors(inputFile, metadataFile, outputDir, mapping):
+    dataFormatter = preprocessing.DataTransformationPreprocessor(inputFile, metadataFile, outputDir, "\t")
+    mappingPreprocessor = preprocessing.MappingPreprocessor(dataFormatter.getOutputFile(), outputDir, "symbol", "entrez" if mapping else "symbol", False)
+    metadataAnnotator = preprocessing.MetaDataPreprocessor(mappingPreprocessor.getOutputFile(), metadataFile, outputDir, "\t")
+    filterPreprocessor = preprocessing.FilterPreprocessor(metadataAnnotator.getOutputFile(), metadataFile, outputDir)
+    return [dataFormatter, mappingPreprocessor, metadataAnnotator, filterPreprocessor]
+
+
+@pytest.mark.parametrize("kind", ["float", "integer", "mixed"])
+@pytest.mark.parametrize("genesInColumns", [True, False])
+@pytest.mark.parametrize("mapping", [True, False])
+@pytest.mark.parametrize("blockSize", [0, 4])
+def test_fused_output_matches_chain(config, tmp_path, monkeypatch, kind, genesInColumns, mapping, blockSize):
+    monkeypatch.setattr(benchutils, "mapIdentifiers", mapIdentifiers)
+    for category, identifier, value in [("Dataset", "classLabelName", "diagnosis"), ("Dataset", "metadataIDsInColumns", "false"),
+                                        ("Dataset", "genesInColumns", str(genesInColumns).lower()),
+                                        ("Preprocessing", "transposeBlockSize", str(blockSize)),
+                                        ("Preprocessing", "filterMissingsInGenes", "true"), ("Preprocessing", "filterMissingsInSamples", "true"),
+                                        ("Preprocessing", "threshold", "30")]:
+        benchutils.setConfigValue(category, identifier, value)
+    inputFile = str(tmp_path / "input.csv")
+    metadataFile = str(tmp_path / "metadata.csv")
+    writeDataset(inputFile, kind, genesInColumns)
+    writeMetadata(metadataFile)
+
+    outputs = []
+    for name in ["chain", "fused"]:
+        outputDir = str(tmp_path / name) + "/"
+        os.makedirs(outputDir)
+        preprocessors = createPreprocessors(inputFile, metadataFile, outputDir, mapping)
+        output = str(tmp_path / (name + ".csv"))
+        if name == "fused":
+            preprocessing.FusedPreprocessor(*preprocessors, output).preprocess()
+            #no buffer files are left behind
+            assert os.listdir(outputDir) == []
+        else:
+            preprocessing.PreprocessingChain(preprocessors, output).preprocess()
+        outputs.append(output)
+
+    assert filecmp.cmp(outputs[0], outputs[1], shallow = False)
+    preprocessed = pd.read_csv(outputs[1], index_col = 0)
+    assert 0 < len(preprocessed) < len(SAMPLES)
@@ -0,0 +1,83 @@
+import os
+import pandas as pd
+import pytest
+import benchutils
+import rankingstore
+
+
+def writeRanking(rankingsDir, method, features, scores = None):
+    ranking = pd.DataFrame({"attributeName": features})
+    if scores is not None:
+        ranking["score"] = scores
+    rankingFile = os.path.join(rankingsDir, method + ".csv")
+    ranking.to_csv(rankingFile, sep = "\t", index = False)
+    return rankingFile
+
+def makeNewer(path, seconds = 10):
+    #rankings written within the resolution of the file system's modification time are only recognized as new by their size
+    modified = os.path.getmtime(path) + seconds
+    os.utime(path, (modified, modified))
+
+def rankingFromFile(rankingFile, k = None):
+    ranking = benchutils.loadRanking(rankingFile)
+    features = ranking[ranking.columns[0]]
+    return list(features if k is None else features.head(k))
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    rankingsDir = str(tmp_path / "geneRankings")
+    os.makedirs(rankingsDir)
+    #every test starts without top k features of former tests
+    monkeypatch.setattr(rankingstore, "topKCache", {})
+    repository = rankingstore.RankingRepository(rankingsDir)
+    yield repository
+    repository.close()
+
+
+def test_top_k_matches_ranking_file(repository):
+    rankingFiles = {"InfoGain": writeRanking(repository.rankingsDir, "InfoGain", ["TP53", "BRCA1", "EGFR", "MYC", "KRAS"], [0.9, 0.7, 0.7, 0.2, 0.1]),
+                    #integer feature names (e.g. Entrez IDs) and rankings without scores
+                    "Random": writeRanking(repository.rankingsDir, "Random", [7157, 672, 1956])}
+    assert sorted(repository.listMethods()) == ["InfoGain", "Random"]
+
+    for method, rankingFile in rankingFiles.items():
+        #the first queries parse the top k rows of the ranking files, the later ones query the imported rankings
+        for imported in [False, True]:
+            if imported:
+                repository.update(method)
+                rankingstore.topKCache.clear()
+            for k in [0, 2, 3, 100, None]:
+                topK = repository.getTopK(method, k)
+                assert list(topK) == rankingFromFile(rankingFile, k)
+                assert topK.name == "attributeName"
+
+def test_ranks_match_ranking_file(repository):
+    features = ["G" + str(i) for i in range(1200)]
+    writeRanking(repository.rankingsDir, "Variance", features, list(range(1200, 0, -1)))
+    ranking = rankingFromFile(os.path.join(repository.rankingsDir, "Variance.csv"))
+    expected = {feature: rank for rank, feature in enumerate(ranking, 1)}
+
+    #more features than fit into a single query, including features that are not ranked
+    ranks = repository.getRanks("Variance", features[::-1] + ["unknown"])
+    assert ranks == expected
+    assert repository.getRanks("Variance", ["G3", "unknown"]) == {"G3": 4}
+
+def test_rewritten_ranking_is_queried_again(repository):
+    rankingFile = writeRanking(repository.rankingsDir, "ReliefF", ["A", "B", "C"], [3, 2, 1])
+    assert list(repository.getTopK("ReliefF", 2)) == ["A", "B"]
+    assert repository.getRanks("ReliefF", ["A", "C"]) == {"A": 1, "C": 3}
+
+    #the selector ran again, e.g. on a remote worker
+    writeRanking(repository.rankingsDir, "ReliefF", ["C", "A", "B"], [3, 2, 1])
+    makeNewer(rankingFile)
+    assert list(repository.getTopK("ReliefF", 2)) == rankingFromFile(rankingFile, 2) == ["C", "A"]
+    assert list(repository.getTopK("ReliefF")) == rankingFromFile(rankingFile)
+    assert repository.getRanks("ReliefF", ["A", "C"]) == {"A": 2, "C": 1}
+
+def test_empty_ranking(repository):
+    rankingFile = os.path.join(repository.rankingsDir, "Failed.csv")
+    open(rankingFile, "w").close()
+    assert list(repository.getTopK("Failed", 5)) == rankingFromFile(rankingFile, 5) == []
+    assert list(repository.getTopK("Failed")) == []
+    assert repository.getRanks("Failed", ["A"]) == {}
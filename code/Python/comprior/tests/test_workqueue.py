@@ -0,0 +1,148 @@
+import os, time, signal, threading, multiprocessing
+import pytest
+import execution
+import workqueue
+
+AUTHKEY = b"comprior-test"
+
+#input and output files are given relative to the working directory, so that the coordinator and every worker have their own files like on separate hosts
+
+
+def addNumber(inputFile, outputFile, number):
+    with open(inputFile, "r") as f:
+        value = int(f.read()) + number
+    with open(outputFile, "w") as f:
+        f.write(str(value))
+    return value, os.getcwd()
+
+def readInput(inputFile):
+    with open(inputFile, "r") as f:
+        return f.read()
+
+def runSlowlyOnce(markerDir):
+    #the first attempt reports its process and the worker's process (its parent) and waits to be killed
+    attempt = len(os.listdir(markerDir))
+    with open(os.path.join(markerDir, "attempt" + str(attempt)), "w") as f:
+        f.write(str(os.getpid()) + " " + str(os.getppid()))
+    if attempt == 0:
+        time.sleep(60)
+    return attempt
+
+def runWorker(workerDir, address):
+    os.chdir(workerDir)
+    workqueue.Worker(address, AUTHKEY).run()
+
+def writeFile(path, content):
+    directory = os.path.dirname(path)
+    if directory != "" and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, "w") as f:
+        f.write(content)
+
+def waitFor(condition, timeout = 30):
+    start = time.time()
+    while not condition():
+        if time.time() - start > timeout:
+            raise TimeoutError("Condition was not fulfilled within " + str(timeout) + " s.")
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def cluster(config, tmp_path, monkeypatch):
+    """Starts a coordinator on localhost and two workers, each in its own working directory.
+
+       :return: the coordinator's working directory, the coordinator, and working directory and process of every worker.
+       :rtype: tuple(str, :class:`workqueue.Coordinator`, list of tuple(str, :class:`multiprocessing.Process`))
+       """
+    coordinatorDir = str(tmp_path / "coordinator")
+    os.makedirs(coordinatorDir)
+    monkeypatch.chdir(coordinatorDir)
+    coordinator = workqueue.Coordinator(("localhost", 0), AUTHKEY)
+    workers = []
+    for i in range(2):
+        workerDir = str(tmp_path / ("worker" + str(i)))
+        os.makedirs(workerDir)
+        process = multiprocessing.Process(target = runWorker, args = (workerDir, coordinator.listener.address))
+        process.start()
+        workers.append((workerDir, process))
+    waitFor(lambda: len(coordinator.idleWorkers) == 2)
+    yield coordinatorDir, coordinator, workers
+
+    #workers exit once the coordinator disconnects them
+    coordinator.close()
+    for _, process in workers:
+        process.join(10)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def test_run_tasks_on_workers(cluster, tmp_path):
+    coordinatorDir, coordinator, workers = cluster
+    writeFile("data/input.txt", "40")
+    scheduler = execution.StageScheduler(1, str(tmp_path), coordinator = coordinator)
+    for i in range(4):
+        outputFile = "data/output" + str(i) + ".txt"
+        scheduler.addTask("add" + str(i), addNumber, ("data/input.txt", outputFile, i), inputs = ["data/input.txt"], outputs = [outputFile])
+    results = scheduler.run()
+
+    assert scheduler.failures == {}
+    assert sorted(value for value, _ in results.values()) == [40, 41, 42, 43]
+    #tasks ran on the workers, which received the input file and sent back their output files
+    workerDirs = [workerDir for workerDir, _ in workers]
+    remoteDirs = set(directory for _, directory in results.values() if directory in workerDirs)
+    assert remoteDirs
+    for workerDir in remoteDirs:
+        assert readInput(os.path.join(workerDir, "data", "input.txt")) == "40"
+    for i in range(4):
+        assert readInput(os.path.join(coordinatorDir, "data", "output" + str(i) + ".txt")) == str(40 + i)
+
+def test_rerun_task_of_killed_worker(cluster, tmp_path):
+    _, coordinator, workers = cluster
+    markerDir = str(tmp_path / "markers")
+    os.makedirs(markerDir)
+    killed = []
+
+    def killWorker():
+        #kill the worker running the first attempt, and the attempt itself, which runs in its own process group
+        firstAttempt = os.path.join(markerDir, "attempt0")
+        waitFor(lambda: os.path.isfile(firstAttempt) and os.path.getsize(firstAttempt) > 0)
+        with open(firstAttempt, "r") as f:
+            taskPid, workerPid = [int(pid) for pid in f.read().split()]
+        os.kill(workerPid, signal.SIGKILL)
+        os.killpg(taskPid, signal.SIGKILL)
+        killed.append(workerPid)
+
+    killer = threading.Thread(target = killWorker, daemon = True)
+    killer.start()
+    scheduler = execution.StageScheduler(1, str(tmp_path), coordinator = coordinator)
+    scheduler.addTask("slow", runSlowlyOnce, (markerDir,), outputs = [os.path.join(markerDir, "*")])
+    start = time.time()
+    results = scheduler.run()
+    killer.join(10)
+
+    assert time.time() - start < 30
+    assert killed and killed[0] in [process.pid for _, process in workers]
+    #the task ran again after its worker was lost
+    assert results == {"slow": 1}
+    assert scheduler.failures == {}
+
+def test_resend_stale_input(cluster, tmp_path):
+    coordinatorDir, coordinator, workers = cluster
+    #every worker has an outdated version of the input file
+    for workerDir, _ in workers:
+        writeFile(os.path.join(workerDir, "data", "input.txt"), "stale")
+    writeFile("data/input.txt", "current version")
+
+    scheduler = execution.StageScheduler(1, str(tmp_path), coordinator = coordinator)
+    for i in range(2):
+        scheduler.addTask("read" + str(i), readInput, ("data/input.txt",), inputs = ["data/input.txt"], outputs = ["data/none"])
+    results = scheduler.run()
+    assert results == {"read0": "current version", "read1": "current version"}
+    assert "current version" in [readInput(os.path.join(workerDir, "data", "input.txt")) for workerDir, _ in workers]
+
+    #a changed input file is sent again
+    writeFile("data/input.txt", "changed again")
+    scheduler = execution.StageScheduler(1, str(tmp_path), coordinator = coordinator)
+    scheduler.addTask("read", readInput, ("data/input.txt",), inputs = ["data/input.txt"], outputs = ["data/none"])
+    assert scheduler.run() == {"read": "changed again"}
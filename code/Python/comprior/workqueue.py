@@ -0,0 +1,290 @@
+import os, glob, threading, tempfile
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+import benchutils
+import execution
+import caching
+
+
+def parseAddress(address):
+    """Parses a network address.
+
+       :param address: address in the format host:port, e.g. localhost:6000.
+       :type address: str
+       :return: host and port.
+       :rtype: tuple(str, int)
+       """
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+def expandPatterns(patterns):
+    """Finds all files matching the given file patterns.
+
+       :param patterns: absolute file paths, which may contain wildcards (see :mod:`glob`).
+       :type patterns: list of str
+       :return: absolute paths to all matching files.
+       :rtype: list of str
+       """
+    files = set()
+    for pattern in patterns:
+        files.update(file for file in glob.glob(pattern) if os.path.isfile(file))
+    return sorted(files)
+
+def readFiles(paths):
+    """Reads the content of files for sending them to another host.
+
+       :param paths: absolute paths to the files.
+       :type paths: list of str
+       :return: binary content for every file path.
+       :rtype: dict
+       """
+    files = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            files[path] = f.read()
+    return files
+
+def writeFiles(files):
+    """Writes files that were received from another host to the same paths.
+       Every file is written to a temporary file first and renamed afterwards, so that processes reading the file never see it half-written.
+
+       :param files: binary content for every absolute file path.
+       :type files: dict
+       """
+    for path, content in files.items():
+        benchutils.createDirectory(os.path.dirname(path))
+        tmpFile = path + "." + str(os.getpid()) + ".tmp"
+        with open(tmpFile, "wb") as f:
+            f.write(content)
+        os.rename(tmpFile, path)
+
+
+class Coordinator():
+    """Distributes tasks of a :class:`execution.StageScheduler` to workers on other hosts (see :class:`Worker`).
+       Workers connect via TCP sockets and run one task at a time; every task that declares its output files (see :meth:`execution.StageScheduler.addTask`) can be sent to an idle worker.
+       Before a task is started, the worker receives the current config and all input files it does not have in the same version yet. After the task finished, the worker sends back the task's result and output files, which are written to the same paths on the coordinator.
+       Workers must have Comprior installed at the same location (the config's homePath), as file paths are not translated between hosts.
+
+       :param address: host and port to listen on for workers.
+       :type address: tuple(str, int)
+       :param authkey: shared secret that workers must know to connect.
+       :type authkey: bytes
+       :param idleWorkers: connections to the workers that are not running a task.
+       :type idleWorkers: list of :class:`multiprocessing.connection.Connection`
+       """
+    #seconds the scheduler waits for running tasks before checking for newly connected workers
+    POLL_INTERVAL = 1.0
+    #number of workers that may be waiting to be accepted at the same time
+    BACKLOG = 64
+
+    def __init__(self, address, authkey):
+        self.listener = Listener(address, backlog = self.BACKLOG, authkey = authkey)
+        self.closed = False
+        self.idleWorkers = []
+        self.lock = threading.Lock()
+        #workers may connect at any time, so accept them in the background
+        acceptThread = threading.Thread(target = self.acceptWorkers, daemon = True)
+        acceptThread.start()
+        super().__init__()
+
+    def acceptWorkers(self):
+        """Accepts connections of new workers until the coordinator is closed.
+           """
+        while True:
+            try:
+                connection = self.listener.accept()
+            except multiprocessing.AuthenticationError:
+                benchutils.logWarning("WARNING: Rejected worker with wrong authentication key.")
+                continue
+            except (OSError, EOFError, AttributeError) as e:
+                #accepting fails once the listener is closed
+                if self.closed:
+                    return
+                benchutils.logWarning("WARNING: Could not accept worker: " + str(e))
+                continue
+            benchutils.logInfo("Worker connected from " + str(self.listener.last_accepted))
+            with self.lock:
+                self.idleWorkers.append(connection)
+
+    def hasIdleWorker(self):
+        """Checks if any worker is available to run a task.
+
+           :return: true if at least one connected worker is idle.
+           :rtype: bool
+           """
+        with self.lock:
+            return len(self.idleWorkers) > 0
+
+    def readConfig(self):
+        """Reads the config files of the current run, so that workers use the same config.
+
+           :return: file name and content of every config file, in the order they were loaded.
+           :rtype: list of tuple(str, str)
+           """
+        configPaths = benchutils.configPaths
+        if isinstance(configPaths, str):
+            configPaths = [configPaths]
+        configFiles = []
+        for path in configPaths:
+            if os.path.isfile(path):
+                with open(path, "r") as f:
+                    configFiles.append((os.path.basename(path), f.read()))
+        return configFiles
+
+    def startTask(self, task, outputRootPath):
+        """Sends a task to an idle worker, together with the config and the input files the worker is missing.
+
+           :param task: the task to run.
+           :type task: :class:`execution.Task`
+           :param outputRootPath: absolute path to the output directory of the current run.
+           :type outputRootPath: str
+           :return: connection to the worker running the task, or None if the worker disconnected.
+           :rtype: :class:`multiprocessing.connection.Connection`
+           """
+        with self.lock:
+            connection = self.idleWorkers.pop(0)
+        inputFiles = expandPatterns(task.inputs)
+        try:
+            connection.send(("files", [(path, caching.hashFile(path)) for path in inputFiles]))
+            missingFiles = connection.recv()
+            connection.send(("task", task.name, task.function, task.args, readFiles(missingFiles), task.outputs,
+                             self.readConfig(), outputRootPath, task.wallTime, task.cpuTime))
+        except (OSError, EOFError):
+            connection.close()
+            return None
+        benchutils.logDebug("DEBUG: Sent task " + task.name + " with " + str(len(missingFiles)) + " input files to a worker")
+        return connection
+
+    def collectResult(self, connection):
+        """Receives the result of a task from a worker and writes the task's output files.
+           The worker is available for the next task afterwards.
+
+           :param connection: connection to the worker that ran the task.
+           :type connection: :class:`multiprocessing.connection.Connection`
+           :return: the task's return value, error message (None if successful), peak memory in MB, and the exceeded time limit (None if the task was not cancelled); None if the worker disconnected.
+           :rtype: tuple(object, str, float, str)
+           """
+        try:
+            result, error, peakMemory, timeout, outputFiles = connection.recv()
+        except (OSError, EOFError):
+            connection.close()
+            return None
+        writeFiles(outputFiles)
+        with self.lock:
+            self.idleWorkers.append(connection)
+        return result, error, peakMemory, timeout
+
+    def close(self):
+        """Stops accepting workers and disconnects all idle workers, which makes them exit.
+           """
+        self.closed = True
+        self.listener.close()
+        with self.lock:
+            for connection in self.idleWorkers:
+                connection.close()
+            self.idleWorkers = []
+
+
+class Worker():
+    """Runs tasks that are sent by a :class:`Coordinator`, one at a time, until the coordinator disconnects.
+       Every task runs in its own process, just like on the coordinator.
+
+       :param address: host and port of the coordinator.
+       :type address: tuple(str, int)
+       :param authkey: shared secret of the coordinator.
+       :type authkey: bytes
+       """
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self.configDir = tempfile.mkdtemp(prefix = "comprior_worker_")
+        self.configFiles = None
+        super().__init__()
+
+    def loadConfig(self, configFiles, outputRootPath):
+        """Loads the config of the coordinator's run, unless it is already loaded, and prepares the directories the tasks need.
+
+           :param configFiles: file name and content of every config file.
+           :type configFiles: list of tuple(str, str)
+           :param outputRootPath: absolute path to the output directory of the coordinator's run.
+           :type outputRootPath: str
+           """
+        if configFiles == self.configFiles:
+            return
+        configPaths = []
+        for i, (name, content) in enumerate(configFiles):
+            configPath = os.path.join(self.configDir, str(i) + "_" + name)
+            with open(configPath, "w") as f:
+                f.write(content)
+            configPaths.append(configPath)
+        benchutils.loadConfig(configPaths)
+        self.configFiles = configFiles
+
+        benchutils.createDirectory(outputRootPath)
+        benchutils.createDirectory(benchutils.getConfigValue("General", "intermediateDir"))
+        benchutils.createDirectory(benchutils.getConfigValue("General", "externalKbDir"))
+        benchutils.createDirectory(benchutils.getConfigValue("General", "intermediateDir") + "identifierMappings/")
+        benchutils.createDirectory(benchutils.getConfigValue("General", "queryCacheDir"))
+        benchutils.createLogger(outputRootPath)
+
+    def findMissingFiles(self, files):
+        """Finds the input files that do not exist on this host or differ from the coordinator's version.
+
+           :param files: absolute path and hash of every input file.
+           :type files: list of tuple(str, str)
+           :return: absolute paths to the missing files.
+           :rtype: list of str
+           """
+        return [path for path, fileHash in files if not os.path.isfile(path) or caching.hashFile(path) != fileHash]
+
+    def runTask(self, name, function, args, inputFiles, outputs, configFiles, outputRootPath, wallTime, cpuTime):
+        """Runs a task and collects its output files.
+
+           :param name: task name.
+           :type name: str
+           :param function: the function to execute.
+           :type function: callable
+           :param args: arguments for the function.
+           :type args: tuple
+           :param inputFiles: binary content of the input files that were missing on this host.
+           :type inputFiles: dict
+           :param outputs: file patterns of the task's output files.
+           :type outputs: list of str
+           :param configFiles: file name and content of every config file of the coordinator's run.
+           :type configFiles: list of tuple(str, str)
+           :param outputRootPath: absolute path to the output directory of the coordinator's run.
+           :type outputRootPath: str
+           :param wallTime: wall-clock time limit of the task in seconds. 0 means no limit.
+           :type wallTime: float
+           :param cpuTime: CPU time limit of the task in seconds. 0 means no limit.
+           :type cpuTime: float
+           :return: the task's return value, error message (None if successful), peak memory in MB, the exceeded time limit (None if the task was not cancelled), and binary content of its output files.
+           :rtype: tuple(object, str, float, str, dict)
+           """
+        self.loadConfig(configFiles, outputRootPath)
+        writeFiles(inputFiles)
+        benchutils.logInfo("Run task " + name + " for coordinator " + str(self.address))
+
+        scheduler = execution.StageScheduler(1, outputRootPath)
+        scheduler.addTask(name, function, args, wallTime = wallTime, cpuTime = cpuTime)
+        scheduler.run()
+        error = scheduler.failures.get(name)
+        outputFiles = readFiles(expandPatterns(outputs)) if error is None else {}
+        return scheduler.results.get(name), error, scheduler.peakMemory.get(name, 0), scheduler.timeouts.get(name), outputFiles
+
+    def run(self):
+        """Connects to the coordinator and runs its tasks until it disconnects.
+           """
+        connection = Client(self.address, authkey = self.authkey)
+        try:
+            while True:
+                try:
+                    message = connection.recv()
+                except (OSError, EOFError):
+                    break
+                if message[0] == "files":
+                    connection.send(self.findMissingFiles(message[1]))
+                elif message[0] == "task":
+                    connection.send(self.runTask(*message[1:]))
+        finally:
+            connection.close()